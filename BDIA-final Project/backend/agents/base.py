@@ -1,10 +1,10 @@
 from typing import Dict, Any, Optional, Union
 from abc import ABC, abstractmethod
-#from langchain_community.chat_models import ChatOpenAI
-from langchain_openai import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
 from pydantic import BaseModel, Field
 from backend.utils.llm.base import llm_manager
+from backend.utils.llm.client_registry import get_chat_model
+from backend.utils.llm.scheduler import Priority, llm_priority
 from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory, StateManager, RetryStrategy
 import asyncio
 
@@ -21,11 +21,11 @@ class AgentOutput(BaseModel):
     error: Optional[WorkflowError] = None
 
 class BaseAgent(ABC):
+    # Enrichment agents yield to interactive traffic in the outbound scheduler
+    priority: Priority = Priority.BACKGROUND
+    
     def __init__(self, model_name: str = "gpt-4-turbo-preview"):
-        self.llm = ChatOpenAI(
-            model_name=model_name,
-            temperature=0.7
-        )
+        self.llm = get_chat_model(model=model_name, temperature=0.7)
         self.state_manager = StateManager()
         self.retry_strategy = RetryStrategy()
         
@@ -71,6 +71,10 @@ class BaseAgent(ABC):
     
     async def _execute_with_retry(self, func, *args, **kwargs) -> Any:
         """Execute function with retry logic"""
+        with llm_priority(self.priority):
+            return await self._execute_attempts(func, *args, **kwargs)
+    
+    async def _execute_attempts(self, func, *args, **kwargs) -> Any:
         error = None
         for attempt in range(self.retry_strategy.max_attempts):
             try:
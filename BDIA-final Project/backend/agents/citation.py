@@ -2,7 +2,7 @@ from typing import List, Optional
 from pydantic import BaseModel
 from .base import BaseAgent, AgentInput, AgentOutput
 from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory
-from google.cloud import bigquery
+from backend.utils.bigquery_repository import bigquery_repository
 from backend.utils.logging_config import logger
 
 class Citation(BaseModel):
@@ -24,7 +24,7 @@ class CitationOutput(AgentOutput):
 class CitationAgent(BaseAgent):
     def __init__(self):
         super().__init__()
-        self.client = bigquery.Client()
+        self.repository = bigquery_repository
 
     def _create_system_prompt(self) -> str:
         return "Citation assistant for course materials"
@@ -77,33 +77,19 @@ class CitationAgent(BaseAgent):
     async def _fetch_urls_from_bigquery(self, course_title: str) -> List[dict]:
         """Fetch URLs and titles from BigQuery for the given course"""
         try:
-            query = """
-            SELECT course_id, lecture_id, title, url
-            FROM `finalproject-442400.coursesdata.LectureNotes`
-            WHERE LOWER(course_id) LIKE LOWER(@course_title)
-            """
-            
-            job_config = bigquery.QueryJobConfig(
-                query_parameters=[
-                    bigquery.ScalarQueryParameter(
-                        "course_title", 
-                        "STRING", 
-                        f"%{course_title}%"
-                    )
-                ]
+            logger.info(f"Fetching lecture URLs for course: {course_title}")
+            results = await self.repository.fetch(
+                "lecture_urls",
+                {"course_pattern": f"%{course_title}%"}
             )
             
-            logger.info(f"Executing query for course: {course_title}")
-            query_job = self.client.query(query, job_config=job_config)
-            results = query_job.result()
-            
             citations = []
             for row in results:
-                if row.url:
+                if row['url']:
                     citations.append({
-                        'title': row.title,
-                        'url': row.url,
-                        'lecture_id': row.lecture_id
+                        'title': row['title'],
+                        'url': row['url'],
+                        'lecture_id': row['lecture_id']
                     })
             
             logger.info(f"Found {len(citations)} citations")
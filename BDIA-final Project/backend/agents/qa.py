@@ -1,6 +1,7 @@
 from typing import List
 from pydantic import BaseModel, Field
 from .base import BaseAgent, AgentInput, AgentOutput
+from backend.utils.llm.scheduler import Priority
 from langchain.schema import Document
 from backend.utils.llm.prompt_templates import QA_PROMPT
 from backend.rag.context_manager import QueryComplexity, ContextWindowManager
@@ -18,6 +19,8 @@ class QAOutput(AgentOutput):
     citations: List[str] = Field(default_factory=list)
 
 class QAAgent(BaseAgent):
+    priority = Priority.INTERACTIVE
+    
     def __init__(self):
         super().__init__()
         self.context_manager = ContextWindowManager()
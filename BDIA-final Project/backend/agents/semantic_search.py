@@ -1,6 +1,7 @@
 from typing import Any, List, Dict, Optional
 from pydantic import BaseModel, Field
 from .base import BaseAgent, AgentInput, AgentOutput
+from backend.utils.llm.scheduler import Priority
 from langchain.schema import Document
 from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory
 
@@ -20,6 +21,8 @@ class SearchOutput(AgentOutput):
     total_found: int
 
 class SemanticSearchAgent(BaseAgent):
+    priority = Priority.INTERACTIVE
+    
     def _create_system_prompt(self) -> str:
         return """You are a semantic search expert. Analyze queries to:
         1. Understand semantic intent
@@ -1,10 +1,10 @@
 from typing import List, Dict, Optional, Any
-from google.cloud import bigquery
 from .base import BaseAgent, AgentInput, AgentOutput
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory
+from backend.utils.bigquery_repository import bigquery_repository
 
 class Summary(BaseModel):
     title: str
@@ -26,24 +26,12 @@ class SummarizationOutput(AgentOutput):
 class SummarizationAgent(BaseAgent):
     def __init__(self):
         super().__init__()
-        self.client = bigquery.Client()
+        self.repository = bigquery_repository
 
     async def fetch_course_description(self, course_title: str) -> str:
-        query = """
-        SELECT description
-        FROM `finalproject-442400.coursesdata.Course`
-        WHERE title = @course_title
-        """
-        job_config = bigquery.QueryJobConfig(
-            query_parameters=[
-                bigquery.ScalarQueryParameter("course_title", "STRING", course_title)
-            ]
-        )
-        query_job = self.client.query(query, job_config=job_config)
-        results = query_job.result()
-
-        for row in results:
-            return row.description
+        row = await self.repository.fetch_one("course_description", {"course_title": course_title})
+        if row is not None:
+            return row["description"]
         return "No description available for this course."
 
     async def summarize(self, course_title: str) -> str:
@@ -2,7 +2,7 @@ from typing import Dict, List, Optional
 from pydantic import BaseModel
 from .base import BaseAgent, AgentInput, AgentOutput
 from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory
-from google.cloud import bigquery
+from backend.utils.bigquery_repository import bigquery_repository
 from backend.utils.logging_config import logger
 
 class TopicSegmentInput(AgentInput):
@@ -21,7 +21,7 @@ class TopicSegmentOutput(AgentOutput):
 class TopicSegmentationAgent(BaseAgent):
     def __init__(self):
         super().__init__()
-        self.client = bigquery.Client()
+        self.repository = bigquery_repository
 
     def _create_system_prompt(self) -> str:
         return "Topic segmentation assistant for course materials"
@@ -46,33 +46,18 @@ class TopicSegmentationAgent(BaseAgent):
     async def _fetch_topics_from_bigquery(self, course_title: str) -> List[Dict]:
         """Fetch titles from BigQuery for the given course"""
         try:
-            query = """
-            SELECT course_id, title
-            FROM `finalproject-442400.coursesdata.LectureNotes`
-            WHERE LOWER(course_id) LIKE LOWER(@course_title)
-            ORDER BY lecture_id
-            """
-            
-            job_config = bigquery.QueryJobConfig(
-                query_parameters=[
-                    bigquery.ScalarQueryParameter(
-                        "course_title", 
-                        "STRING", 
-                        f"%{course_title.replace(' ', '_')}%"
-                    )
-                ]
+            logger.info(f"Fetching lecture titles for course: {course_title}")
+            results = await self.repository.fetch(
+                "lecture_titles",
+                {"course_pattern": f"%{course_title.replace(' ', '_')}%"}
             )
             
-            logger.info(f"Executing query for course: {course_title}")
-            query_job = self.client.query(query, job_config=job_config)
-            results = query_job.result()
-            
             topics = []
             for i, row in enumerate(results, 1):
-                if row.title:
-                    formatted_title = self._format_title(row.title)
+                if row['title']:
+                    formatted_title = self._format_title(row['title'])
                     topics.append({
-                        'original_title': row.title,
+                        'original_title': row['title'],
                         'formatted_title': formatted_title,
                         'segment_number': i
                     })
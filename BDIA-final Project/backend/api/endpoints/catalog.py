@@ -0,0 +1,79 @@
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+from backend.utils.bigquery_repository import bigquery_repository
+from backend.utils.logging_config import logger
+
+router = APIRouter()
+
+MAX_PAGE_SIZE = 100
+# Clients may reuse a response for this long before revalidating with If-None-Match
+CACHE_CONTROL = "public, max-age=60"
+
+def _format_card(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Pre-render a course card the way the dashboard displays it"""
+    topics = ", ".join(row.get("topics") or []) or "N/A"
+    subtopics = ", ".join(row.get("subtopics") or []) or "N/A"
+    instructors = row.get("instructors") or []
+    return {
+        "playlist_id": row.get("playlist_id"),
+        "title": row.get("title"),
+        "description": row.get("description") or "N/A",
+        "instructors": ", ".join(instructors) if instructors else "N/A",
+        "topics": f"{topics} ({subtopics})" if subtopics != "N/A" else topics
+    }
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+def _conditional_response(request: Request, content: Any) -> Response:
+    """JSON response with an ETag, or 304 when the client already has this body"""
+    body = json.dumps(content, separators=(",", ":"), default=str).encode("utf-8")
+    etag = _etag(body)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def _course_cards() -> List[Dict[str, Any]]:
+    # Served from the catalog snapshot when present, else one cached BigQuery query
+    return [_format_card(row) for row in await bigquery_repository.fetch("course_cards")]
+
+@router.get("/courses")
+async def list_courses(
+    request: Request,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(6, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Paginated course cards for the dashboard"""
+    try:
+        cards = await _course_cards()
+        total_pages = max(1, -(-len(cards) // page_size))
+        start = (page - 1) * page_size
+        return _conditional_response(request, {
+            "items": cards[start:start + page_size],
+            "page": page,
+            "page_size": page_size,
+            "total": len(cards),
+            "total_pages": total_pages
+        })
+    except Exception as e:
+        logger.error(f"Failed to list catalog courses: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to list courses: {str(e)}")
+
+@router.get("/courses/{playlist_id}")
+async def get_course(request: Request, playlist_id: str):
+    """One course card by playlist id"""
+    try:
+        card: Optional[Dict[str, Any]] = next(
+            (card for card in await _course_cards() if card["playlist_id"] == playlist_id),
+            None
+        )
+    except Exception as e:
+        logger.error(f"Failed to fetch catalog course {playlist_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch course: {str(e)}")
+    if card is None:
+        raise HTTPException(status_code=404, detail=f"Course not found: {playlist_id}")
+    return _conditional_response(request, card)
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from typing import List, Optional
+from functools import lru_cache
 from pydantic import BaseModel
 from datetime import datetime
 from backend.api.models.base import BaseResponse
@@ -16,13 +17,17 @@ class CitationResponse(BaseResponse):
     citations: List[Citation]
     generated_at: datetime = datetime.now()
 
+@lru_cache()
+def get_citation_agent() -> CitationAgent:
+    """One agent per process so its LLM and BigQuery clients are reused"""
+    return CitationAgent()
+
 @router.post("/generate", response_model=CitationResponse)
 async def generate_citation(request: CitationRequest):
     try:
         logger.info("Generating citation for content: " + str(request.content))
         
-        # Initialize citation agent
-        agent = CitationAgent()
+        agent = get_citation_agent()
         
         # Create input data with all required fields including query
         input_data = CitationInput(
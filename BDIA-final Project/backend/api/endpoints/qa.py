@@ -1,41 +1,119 @@
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from ..models.base import BaseResponse
 from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory
 from backend.utils.logging_config import logger
-from typing import Dict, Any
-from openai import OpenAI
+from backend.utils.llm.openai_utils import stream_manager
+from backend.rag.embeddings import EduSearchEmbeddings
+from backend.rag.answer_cache import answer_cache
+from backend.utils.llm.scheduler import Priority, llm_priority
+from typing import AsyncGenerator, Dict, Any, List, Optional
+import json
 
 router = APIRouter()
-client = OpenAI()  # Initialize the OpenAI client
+embeddings = EduSearchEmbeddings()
+
+QA_MODEL = "gpt-4-turbo-preview"
+QA_MAX_TOKENS = 150
+
+def _build_messages(query: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": "You are a helpful educational assistant."},
+        {"role": "user", "content": query}
+    ]
+
+async def _embed_question(query: str) -> Optional[List[float]]:
+    """Embed the question for the answer cache; a failure just skips the cache"""
+    try:
+        return await embeddings.embed_query(query)
+    except Exception as e:
+        logger.warning(f"Answer cache skipped, embedding failed: {str(e)}")
+        return None
+
+async def _stream_answer(
+    query: str,
+    question_vector: Optional[List[float]],
+    course: Optional[str]
+) -> AsyncGenerator[str, None]:
+    """Yield NDJSON events: one ``token`` per delta, then ``done`` or ``error``"""
+    parts = []
+    try:
+        with llm_priority(Priority.INTERACTIVE):
+            async for token in stream_manager.stream_completion(
+                _build_messages(query),
+                model=QA_MODEL,
+                max_tokens=QA_MAX_TOKENS
+            ):
+                parts.append(token)
+                yield json.dumps({"type": "token", "content": token}) + "\n"
+        
+        logger.info("Answer streamed successfully")
+        data = {
+            "answer": "".join(parts),
+            "confidence": 0.9,
+            "citations": []
+        }
+        if question_vector is not None:
+            answer_cache.store(question_vector, query, data, course)
+        yield json.dumps({"type": "done", "data": data}) + "\n"
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band
+        logger.error(f"Error streaming answer: {str(e)}")
+        yield json.dumps({
+            "type": "error",
+            "message": str(e),
+            "error_code": "QA_STREAM_ERROR"
+        }) + "\n"
 
 @router.post("/api/v1/qa", response_model=BaseResponse)
 async def question_answering(request: Dict[str, Any]):
+    query = request.get("question", "")
     try:
-        query = request.get("question", "")
         logger.info(f"Processing question: {query[:100]}...")
+        course = request.get("course_title")
         
-        # New OpenAI API call format
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": "You are a helpful educational assistant."},
-                {"role": "user", "content": query}
-            ],
-            max_tokens=150
-        )
+        question_vector = await _embed_question(query)
+        cached = answer_cache.lookup(question_vector, course) if question_vector is not None else None
+        if cached is not None:
+            logger.info("Answer served from the semantic answer cache")
+            data = {**cached, "cached": True}
+            if request.get("stream", False):
+                events = [
+                    json.dumps({"type": "token", "content": data["answer"]}) + "\n",
+                    json.dumps({"type": "done", "data": data}) + "\n"
+                ]
+                return StreamingResponse(iter(events), media_type="application/x-ndjson")
+            return JSONResponse(content={"success": True, "data": data}, status_code=200)
+        
+        if request.get("stream", False):
+            return StreamingResponse(
+                _stream_answer(query, question_vector, course),
+                media_type="application/x-ndjson",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+        
+        with llm_priority(Priority.INTERACTIVE):
+            response = await stream_manager.generate_completion(
+                _build_messages(query),
+                model=QA_MODEL,
+                max_tokens=QA_MAX_TOKENS
+            )
         
         answer = response.choices[0].message.content
         logger.info("Answer generated successfully")
         
+        data = {
+            "answer": answer,
+            "confidence": 0.9,
+            "citations": []
+        }
+        if question_vector is not None:
+            answer_cache.store(question_vector, query, data, course)
+        
         return JSONResponse(
             content={
                 "success": True,
-                "data": {
-                    "answer": answer,
-                    "confidence": 0.9,
-                    "citations": []
-                }
+                "data": data
             },
             status_code=200
         )
@@ -58,4 +136,4 @@ async def question_answering(request: Dict[str, Any]):
                 "error_details": {"query": query}
             },
             status_code=500
-        )
\ No newline at end of file
+        )
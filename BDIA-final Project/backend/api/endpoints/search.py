@@ -2,10 +2,16 @@ from fastapi import APIRouter, Depends, HTTPException
 from backend.app.dependencies import get_pinecone_index
 from backend.utils.vectorDb.pinecone_client import PineconeClient
 from typing import List, Optional, Dict
+from pydantic import BaseModel
+from backend.rag.retrieval_cache import invalidate_course_cache, retrieval_cache
+from backend.rag.answer_cache import answer_cache
 from ..models.base import BaseResponse
 
 router = APIRouter()
 
+class CacheInvalidationRequest(BaseModel):
+    course: Optional[str] = None
+
 @router.get("/search", response_model=BaseResponse)
 async def semantic_search(
     query: str,
@@ -33,4 +39,16 @@ async def semantic_search(
         return BaseResponse(
             success=False,
             message=f"Search operation failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/cache/invalidate")
+async def invalidate_cache(request: CacheInvalidationRequest):
+    """Drop cached retrievals and answers for a re-indexed course (all courses if omitted)"""
+    removed = invalidate_course_cache(request.course)
+    return {
+        "success": True,
+        "course": request.course,
+        "invalidated": removed,
+        "cache": retrieval_cache.stats(),
+        "answer_cache": answer_cache.stats()
+    }
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from typing import List, Optional
+from functools import lru_cache
 from pydantic import BaseModel
 from backend.api.models.base import BaseResponse
 from backend.agents.topic_segmentation import TopicSegmentationAgent, TopicSegmentInput
@@ -13,13 +14,17 @@ class SegmentRequest(BaseModel):
 class SegmentResponse(BaseResponse):
     segments: List[dict]
 
+@lru_cache()
+def get_segmentation_agent() -> TopicSegmentationAgent:
+    """One agent per process so its LLM and BigQuery clients are reused"""
+    return TopicSegmentationAgent()
+
 @router.post("/api/v1/segments")
 async def get_segments(request: SegmentRequest):
     try:
         logger.info(f"Fetching segments for course: {request.course_title}")
         
-        # Initialize agent
-        agent = TopicSegmentationAgent()
+        agent = get_segmentation_agent()
         
         # Process request
         input_data = TopicSegmentInput(
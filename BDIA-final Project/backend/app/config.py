@@ -25,11 +25,41 @@ class Settings(BaseSettings):
     BIGQUERY_DATASET: Optional[str] = None
     BIGQUERY_TABLE: Optional[str] = None
     GOOGLE_APPLICATION_CREDENTIALS: Optional[str] = None
+    BIGQUERY_LECTURE_NOTES_TABLE: str = "LectureNotes"
+    BIGQUERY_COURSES_TABLE: str = "Courses"
+    BIGQUERY_MAX_WORKERS: int = 8
+    BIGQUERY_CACHE_SIZE: int = 500
+    BIGQUERY_CACHE_TTL: float = 600.0
+    BIGQUERY_QUERY_TIMEOUT: float = 30.0
+    
+    # Parquet course catalog exported by the pipeline; served before BigQuery.
+    # The DAG mirrors it to gs://<bucket>/catalog/, which is synced into
+    # CATALOG_SNAPSHOT_PATH when CATALOG_GCS_BUCKET is set
+    CATALOG_SNAPSHOT_PATH: Optional[str] = "data/catalog"
+    CATALOG_RELOAD_INTERVAL: float = 30.0
+    CATALOG_GCS_BUCKET: Optional[str] = os.getenv("GCS_BUCKET_NAME")
+    CATALOG_GCS_PREFIX: str = "catalog"
+    CATALOG_SYNC_INTERVAL: float = 300.0
 
     # Model settings
     DEFAULT_MODEL: str = "gpt-4-turbo-preview"
     temperature: float = 0.7
     
+    # Shared LLM HTTP connection pool
+    LLM_HTTP2: bool = True
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_TIMEOUT: float = 60.0
+    
+    # Outbound OpenAI scheduler (per-model RPM/TPM buckets, AIMD concurrency)
+    LLM_SCHEDULER_ENABLED: bool = True
+    LLM_INITIAL_CONCURRENCY: float = 8.0
+    LLM_MIN_CONCURRENCY: float = 1.0
+    LLM_MAX_CONCURRENCY: float = 64.0
+    LLM_CONCURRENCY_BACKOFF: float = 0.5
+    LLM_DEFAULT_COMPLETION_TOKENS: int = 512
+    
     # Context window settings
     MAX_CONTEXT_TOKENS: int = 4000
     MIN_CHUNK_SIZE: int = 100
@@ -38,8 +68,52 @@ class Settings(BaseSettings):
     
     # Embedding settings
     EMBEDDING_MODEL: str = "text-embedding-3-small"
-    EMBEDDING_CACHE_SIZE: int = 1000
+    EMBEDDING_CACHE_SIZE: int = 10000
+    EMBEDDING_CACHE_PATH: Optional[str] = "data/embedding_cache.sqlite3"
+    EMBEDDING_CACHE_DISK_MAX_ENTRIES: int = 200000
+    EMBEDDING_BATCH_SIZE: int = 512
+    EMBEDDING_BATCH_MAX_TOKENS: int = 250000
+    EMBEDDING_MAX_CONCURRENCY: int = 4
+    
+    # Vector store settings
+    VECTOR_STORE_BACKEND: str = "pinecone"  # "pinecone" or "local"
+    LOCAL_VECTOR_STORE_PATH: str = "data/vector_store"
+    LOCAL_VECTOR_INDEX: str = "ivf_flat"  # "ivf_flat" or "flat"
+    LOCAL_VECTOR_NPROBE: int = 8
+    LOCAL_VECTOR_EXACT_THRESHOLD: int = 5000
+    LOCAL_VECTOR_REBUILD_SKEW: float = 4.0  # retrain IVF lists once they outgrow this factor
+    
+    # Retrieval cache settings
+    RETRIEVAL_CACHE_SIZE: int = 1000
+    RETRIEVAL_CACHE_TTL: float = 900.0
     
+    # Semantic answer cache settings
+    ANSWER_CACHE_SIZE: int = 5000
+    ANSWER_CACHE_TTL: float = 86400.0
+    ANSWER_CACHE_THRESHOLD: float = 0.92
+
+    # Hybrid retrieval settings
+    SPARSE_INDEX_PATH: Optional[str] = "data/sparse_index"
+    RRF_K: int = 60
+    RETRIEVAL_DENSE_TIMEOUT: float = 10.0
+    RETRIEVAL_EXPANSION_TIMEOUT: float = 3.0
+    RETRIEVAL_KEYWORD_TIMEOUT: float = 0.5
+
+    # Rerank/compression settings
+    RERANKER: str = "cosine"  # "cosine", "cross_encoder", "llm" or "none"
+    RERANKER_FETCH_MULTIPLIER: int = 2
+    RERANKER_SENTENCE_THRESHOLD: float = 0.2  # share of query terms a sentence must contain
+    RERANKER_CROSS_ENCODER_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+    # Query analysis settings
+    QUERY_ANALYSIS_CACHE_SIZE: int = 2000
+    QUERY_ANALYSIS_CACHE_TTL: float = 3600.0
+    QUERY_FAST_PATH_MAX_WORDS: int = 8
+
+    # Tokenizer settings
+    TOKEN_COUNT_CACHE_SIZE: int = 50000
+    TOKENIZER_THREADS: int = 4
+
     # API settings
     API_V1_PREFIX: str = "/api/v1"
     
@@ -2,6 +2,7 @@ from typing import AsyncGenerator
 from fastapi import Depends
 from functools import lru_cache
 from backend.utils.vectorDb.pinecone_client import PineconeClient
+from backend.utils.vectorDb.local_client import get_vector_client
 
 class DependencyContainer:
     def __init__(self):
@@ -9,6 +10,9 @@ class DependencyContainer:
         
     def register(self, service_class: type, *args, **kwargs):
         self._services[service_class] = lambda: service_class(*args, **kwargs)
+    
+    def register_factory(self, service_class: type, factory):
+        self._services[service_class] = factory
         
     def get(self, service_class: type):
         if service_class not in self._services:
@@ -17,8 +21,8 @@ class DependencyContainer:
 
 container = DependencyContainer()
 
-# Register PineconeClient
-container.register(PineconeClient)
+# Register the configured vector store (Pinecone or local) under PineconeClient
+container.register_factory(PineconeClient, get_vector_client)
 
 @lru_cache()
 def get_container() -> DependencyContainer:
@@ -1,15 +1,20 @@
 import json
+import asyncio
 from fastapi import FastAPI, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from .core.security import get_api_key
 from backend.config import get_settings
-from backend.api.endpoints import notes, qa, search, materials, playlists, reports, citation, summarization, segments
+from backend.api.endpoints import notes, qa, search, materials, playlists, reports, citation, summarization, segments, catalog
 from .middleware.rate_limit import RateLimitMiddleware
 from fastapi.responses import JSONResponse
 from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory, StateManager
 from backend.utils.logging_config import setup_logging, logger
 from backend.utils.model_loader import get_model_loader
+from backend.utils.llm.client_registry import client_registry
+from backend.utils.llm.scheduler import outbound_scheduler
+from backend.utils.bigquery_repository import bigquery_repository
+from backend.utils.course_catalog import course_catalog
 from backend.utils.json_encoder import CustomJSONEncoder, serialize_datetime
 from fastapi.encoders import jsonable_encoder
 import time
@@ -104,6 +109,11 @@ app.include_router(
     prefix="/api/v1/playlists",
     tags=["playlists"]
 )
+app.include_router(
+    catalog.router,
+    prefix="/api/v1/catalog",
+    tags=["catalog"]
+)
 app.include_router(
     reports.router,
     prefix="/api/v1/reports",
@@ -134,7 +144,11 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "llm_scheduler": outbound_scheduler.stats(),
+        "course_catalog": course_catalog.stats()
+    }
 
 # Initialize state manager for error handling
 state_manager = StateManager()
@@ -144,6 +158,13 @@ async def startup_event():
     logger.info("Starting application...")
     try:
         settings = get_settings()
+        # Pull and memory-map the catalog snapshot up front so the first request doesn't pay for it
+        try:
+            await asyncio.to_thread(course_catalog.sync)
+        except Exception as e:
+            logger.warning(f"Initial catalog sync failed: {str(e)}")
+        course_catalog.refresh()
+        course_catalog.start_sync()
         model_loader = get_model_loader()
         await model_loader.get_model("gpt-4-turbo-preview", temperature=0.7)
         logger.info("Application startup complete")
@@ -154,6 +175,9 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down application...")
+    await client_registry.aclose()
+    bigquery_repository.close()
+    course_catalog.stop_sync()
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
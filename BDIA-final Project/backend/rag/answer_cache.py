@@ -0,0 +1,146 @@
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+import itertools
+import re
+import time
+import numpy as np
+from backend.app.config import get_settings
+
+settings = get_settings()
+
+ALL_COURSES = "*"
+NON_KEY_CHARS = re.compile(r"[^0-9a-z]+")
+
+
+def course_key(course: Optional[str]) -> Optional[str]:
+    """Canonical course key shared by the caches and their invalidation.
+
+    Endpoints see display titles ("Intro to CS: Part 1") while the pipeline
+    tags vectors with directory names ("Intro_to_CS__Part_1"); both map to
+    "intro_to_cs_part_1".
+    """
+    if not course:
+        return None
+    return NON_KEY_CHARS.sub("_", course.lower()).strip("_") or None
+
+
+class SemanticAnswerCache:
+    """Answers keyed by question embedding, looked up by nearest neighbour per course.
+
+    A paraphrase hits when its cosine similarity to a cached question of the
+    same course meets ``threshold``. Entries expire after ``ttl_seconds`` and
+    the least recently used are evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 5000, ttl_seconds: float = 86400.0):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        # Per-course (entry ids, unit-vector matrix), rebuilt lazily after writes
+        self._indexes: Dict[str, tuple] = {}
+        self._ids = itertools.count()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def _course_key(course: Optional[str]) -> str:
+        return course_key(course) or ALL_COURSES
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def _index(self, course: str):
+        index = self._indexes.get(course)
+        if index is None:
+            ids = [entry_id for entry_id, entry in self._entries.items() if entry["course"] == course]
+            matrix = (
+                np.stack([self._entries[entry_id]["vector"] for entry_id in ids])
+                if ids else np.zeros((0, 0), dtype=np.float32)
+            )
+            index = self._indexes[course] = (ids, matrix)
+        return index
+
+    def lookup(self, vector: List[float], course: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Return the cached payload of the most similar question, if close enough"""
+        course = self._course_key(course)
+        query = self._unit(vector)
+        while True:
+            ids, matrix = self._index(course)
+            if not ids:
+                break
+            similarities = matrix @ query
+            best = int(np.argmax(similarities))
+            entry_id = ids[best]
+            entry = self._entries[entry_id]
+            if entry["expires_at"] < time.monotonic():
+                # Expired best match; drop it and look again
+                self._remove(entry_id)
+                continue
+            if similarities[best] >= self.threshold:
+                self._entries.move_to_end(entry_id)
+                self._stats["hits"] += 1
+                return {**entry["payload"], "similarity": float(similarities[best])}
+            break
+        self._stats["misses"] += 1
+        return None
+
+    def store(self, vector: List[float], question: str, payload: Dict[str, Any], course: Optional[str] = None):
+        course = self._course_key(course)
+        self._entries[next(self._ids)] = {
+            "course": course,
+            "question": question,
+            "vector": self._unit(vector),
+            "payload": payload,
+            "expires_at": time.monotonic() + self.ttl_seconds
+        }
+        self._indexes.pop(course, None)
+        self._stats["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self._stats["evictions"] += 1
+
+    def invalidate_course(self, course: Optional[str] = None) -> int:
+        """Drop answers for a re-indexed course, plus course-agnostic answers.
+
+        Without a course the whole cache is cleared.
+        """
+        if course is None:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._indexes.clear()
+        else:
+            course = self._course_key(course)
+            stale = [
+                entry_id for entry_id, entry in self._entries.items()
+                if entry["course"] in (course, ALL_COURSES)
+            ]
+            for entry_id in stale:
+                self._remove(entry_id)
+            removed = len(stale)
+        self._stats["invalidations"] += removed
+        return removed
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        self._indexes.pop(entry["course"], None)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Process-wide so the QA endpoint and every RAG chain share answers
+answer_cache = SemanticAnswerCache(
+    threshold=settings.ANSWER_CACHE_THRESHOLD,
+    max_entries=settings.ANSWER_CACHE_SIZE,
+    ttl_seconds=settings.ANSWER_CACHE_TTL
+)
@@ -1,11 +1,16 @@
-from typing import List, Dict, Optional
+from typing import List, Optional, Tuple
 from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory, StateManager
-import tiktoken
+from backend.rag.embeddings import EduSearchEmbeddings
+from backend.utils.llm.tokenizer import get_token_counter
+from backend.rag.context_packing import PackedContext, pack_documents
+import numpy as np
 from pydantic import BaseModel
 from enum import Enum
 
+# Metadata key under which retrievers attach the stored vector of a document
+EMBEDDING_METADATA_KEY = "embedding"
+
 class QueryComplexity(Enum):
     BASIC = "basic"
     INTERMEDIATE = "intermediate"
@@ -16,35 +21,30 @@ class ContextConfig(BaseModel):
     min_chunk_size: int = 100
     overlap_ratio: float = 0.2
     token_buffer: int = 200  # Buffer for system messages and other overhead
+    dedup_threshold: float = 0.8  # MinHash Jaccard above which units count as duplicates
 
 class ContextWindowManager:
     def __init__(self, config: Optional[ContextConfig] = None):
         self.config = config or ContextConfig()
-        self.tokenizer = tiktoken.encoding_for_model("gpt-4")
-        #self.token_counter = tiktoken.encoding_for_model("gpt-4")
+        self.token_counter = get_token_counter("gpt-4")
         self.state_manager = StateManager()
+        self.embeddings = EduSearchEmbeddings()
+    
+    def get_embeddings(self) -> EduSearchEmbeddings:
+        return self.embeddings
     
     def _count_tokens(self, text: str) -> int:
         """Accurately count tokens using the model's tokenizer"""
-        return len(self.token_counter.encode(text))
+        return self.token_counter.count(text)
     
-    def _get_chunk_params(self, complexity: QueryComplexity) -> Dict[str, int]:
-        """Get chunk parameters based on query complexity"""
+    def _get_max_unit_tokens(self, complexity: QueryComplexity) -> int:
+        """Largest paragraph kept whole when packing; longer ones split into sentences"""
         if complexity == QueryComplexity.BASIC:
-            return {
-                "chunk_size": 800,
-                "chunk_overlap": 100
-            }
+            return 150
         elif complexity == QueryComplexity.INTERMEDIATE:
-            return {
-                "chunk_size": 1200,
-                "chunk_overlap": 200
-            }
+            return 250
         else:  # ADVANCED
-            return {
-                "chunk_size": 1500,
-                "chunk_overlap": 300
-            }
+            return 400
     
     async def optimize_context(
         self, 
@@ -54,22 +54,8 @@ class ContextWindowManager:
     ) -> List[Document]:
         """Optimize context window based on query relevance and token limits"""
         try:
-            # Get chunk parameters based on complexity
-            chunk_params = self._get_chunk_params(complexity)
-            
-            # Initialize text splitter with dynamic parameters
-            self.text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=chunk_params["chunk_size"],
-                chunk_overlap=chunk_params["chunk_overlap"],
-                length_function=self._count_tokens,
-                separators=["\n\n", "\n", ". ", " ", ""]
-            )
-            
-            # Sort documents by relevance
-            sorted_docs = await self._sort_by_relevance(docs, query)
-            
-            # Manage context window size
-            return await self._fit_to_context_window(sorted_docs)
+            packed = await self.pack_context(docs, query, complexity)
+            return packed.documents
             
         except Exception as e:
             error = WorkflowError(
@@ -86,60 +72,66 @@ class ContextWindowManager:
             await self.state_manager.handle_error(error)
             return docs  # Return original docs if optimization fails
     
-    async def _sort_by_relevance(self, docs: List[Document], query: str) -> List[Document]:
+    async def pack_context(
+        self,
+        docs: List[Document],
+        query: str,
+        complexity: QueryComplexity = QueryComplexity.INTERMEDIATE
+    ) -> PackedContext:
+        """Rank documents by relevance and pack them into the token budget"""
+        ranked_docs, scores = await self._rank_by_relevance(docs, query)
+        return await self._fit_to_context_window(
+            ranked_docs,
+            scores,
+            max_unit_tokens=self._get_max_unit_tokens(complexity)
+        )
+    
+    async def _rank_by_relevance(
+        self,
+        docs: List[Document],
+        query: str
+    ) -> Tuple[List[Document], List[float]]:
         """Sort documents by relevance using semantic similarity"""
         try:
             # Calculate similarity scores
             scores = await self._calculate_similarity_scores(docs, query)
             
             # Sort documents by score
-            sorted_docs = sorted(
+            ranked = sorted(
                 zip(docs, scores),
                 key=lambda x: x[1],
                 reverse=True
             )
             
-            return [doc for doc, _ in sorted_docs]
+            return [doc for doc, _ in ranked], [score for _, score in ranked]
         except Exception as e:
             await self._handle_sorting_error(e, len(docs))
-            return docs
+            return docs, [1.0] * len(docs)
     
-    async def _fit_to_context_window(self, docs: List[Document]) -> List[Document]:
-        """Fit documents into context window while maintaining coherence"""
-        total_tokens = 0
-        fitted_docs = []
-        available_tokens = self.config.max_tokens - self.config.token_buffer
+    async def _fit_to_context_window(
+        self,
+        docs: List[Document],
+        scores: List[float],
+        max_unit_tokens: int
+    ) -> PackedContext:
+        """Knapsack-pack deduplicated paragraph/sentence units into the token budget"""
+        packed = pack_documents(
+            docs,
+            scores,
+            budget=self.config.max_tokens - self.config.token_buffer,
+            counter=self.token_counter,
+            min_chunk_size=self.config.min_chunk_size,
+            max_unit_tokens=max_unit_tokens,
+            dedup_threshold=self.config.dedup_threshold
+        )
         
-        for doc in docs:
-            doc_tokens = self._count_tokens(doc.page_content)
-            
-            if total_tokens + doc_tokens <= available_tokens:
-                fitted_docs.append(doc)
-                total_tokens += doc_tokens
-            else:
-                # Try to split document if it's large enough
-                if doc_tokens > self.config.min_chunk_size:
-                    chunks = self.text_splitter.split_text(doc.page_content)
-                    
-                    for chunk in chunks:
-                        chunk_tokens = self._count_tokens(chunk)
-                        if total_tokens + chunk_tokens <= available_tokens:
-                            fitted_docs.append(Document(
-                                page_content=chunk,
-                                metadata={
-                                    **doc.metadata,
-                                    "is_chunk": True,
-                                    "original_doc_id": doc.metadata.get("doc_id")
-                                }
-                            ))
-                            total_tokens += chunk_tokens
-                        else:
-                            break
-                
-                if total_tokens >= available_tokens:
-                    break
-        
-        return fitted_docs
+        self.state_manager.update_context_metrics(
+            total_tokens=packed.budget_tokens,
+            used_tokens=packed.used_tokens,
+            candidate_tokens=packed.candidate_tokens,
+            duplicate_units=packed.duplicate_units
+        )
+        return packed
     
     async def _calculate_similarity_scores(
         self, 
@@ -150,21 +142,59 @@ class ContextWindowManager:
         try:
             embeddings = self.get_embeddings()
             query_embedding = await embeddings.embed_query(query)
-            
-            scores = []
-            for doc in docs:
-                doc_embedding = await embeddings.embed_documents([doc.page_content])
-                score = self._cosine_similarity(query_embedding, doc_embedding[0])
-                scores.append(score)
-            
-            return scores
+            doc_matrix = await self._get_document_vectors(docs, embeddings)
+            return self._cosine_scores(query_embedding, doc_matrix).tolist()
         except Exception as e:
             await self._handle_embedding_error(e)
             return [1.0] * len(docs)  # Return neutral scores on error
     
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        """Calculate cosine similarity between two vectors"""
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-        norm1 = sum(a * a for a in vec1) ** 0.5
-        norm2 = sum(b * b for b in vec2) ** 0.5
-        return dot_product / (norm1 * norm2) if norm1 * norm2 != 0 else 0
\ No newline at end of file
+    async def _get_document_vectors(
+        self,
+        docs: List[Document],
+        embeddings: EduSearchEmbeddings
+    ) -> np.ndarray:
+        """Build the document matrix, reusing vectors returned by the vector store.
+        
+        Only documents without an attached vector are embedded, all in one
+        batched call.
+        """
+        vectors: List[Optional[List[float]]] = [
+            doc.metadata.get(EMBEDDING_METADATA_KEY) or None for doc in docs
+        ]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        
+        if missing:
+            embedded = await embeddings.embed_documents(
+                [docs[i].page_content for i in missing]
+            )
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+        
+        return np.asarray(vectors, dtype=np.float32)
+    
+    @staticmethod
+    def _cosine_scores(query_vector: List[float], doc_matrix: np.ndarray) -> np.ndarray:
+        """Score every document row against the query with one matrix-vector product"""
+        query = np.asarray(query_vector, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        doc_norms = np.linalg.norm(doc_matrix, axis=1)
+        denominators = doc_norms * query_norm
+        denominators[denominators == 0] = np.inf
+        return (doc_matrix @ query) / denominators
+    
+    async def _handle_sorting_error(self, error: Exception, num_docs: int):
+        await self.state_manager.add_error(WorkflowError(
+            code="RELEVANCE_SORTING_ERROR",
+            message=str(error),
+            severity=ErrorSeverity.LOW,
+            category=ErrorCategory.PROCESSING,
+            context={"num_docs": num_docs}
+        ))
+    
+    async def _handle_embedding_error(self, error: Exception):
+        await self.state_manager.add_error(WorkflowError(
+            code="SIMILARITY_EMBEDDING_ERROR",
+            message=str(error),
+            severity=ErrorSeverity.LOW,
+            category=ErrorCategory.API
+        ))
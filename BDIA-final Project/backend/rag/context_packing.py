@@ -0,0 +1,242 @@
+from typing import List, NamedTuple, Tuple
+import re
+import zlib
+import numpy as np
+from pydantic import BaseModel
+from langchain.schema import Document
+from backend.utils.llm.tokenizer import TokenCounter
+
+PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+WORD_PATTERN = re.compile(r"\w+")
+
+MINHASH_PERMUTATIONS = 64
+# Largest prime below 2^32: crc32 values and coefficients are reduced below it,
+# so a * x + b stays under 2^64 and the modulus actually mixes the hashes
+MINHASH_PRIME = (1 << 32) - 5
+SHINGLE_SIZE = 3
+# Above this many DP cells, token weights are coarsened to keep packing fast
+MAX_DP_CELLS = 4_000_000
+
+# Universal hash family (a * x + b) mod p with a, b drawn below p
+_rng = np.random.default_rng(1)
+_MINHASH_A = _rng.integers(1, MINHASH_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+_MINHASH_B = _rng.integers(0, MINHASH_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+class PackingUnit(NamedTuple):
+    doc_index: int
+    position: int
+    text: str
+    separator: str
+    tokens: int
+    value: float
+
+
+class PackedContext(BaseModel):
+    """Packed documents plus the token budget accounting"""
+    documents: List[Document]
+    budget_tokens: int
+    used_tokens: int
+    candidate_tokens: int
+    candidate_units: int
+    packed_units: int
+    duplicate_units: int
+
+    @property
+    def remaining_tokens(self) -> int:
+        return self.budget_tokens - self.used_tokens
+
+
+def split_sentences(text: str) -> List[Tuple[str, bool]]:
+    """Split into ``(sentence, ends_paragraph)`` pairs"""
+    sentences: List[Tuple[str, bool]] = []
+    for paragraph in PARAGRAPH_SPLIT.split(text):
+        parts = [part for part in SENTENCE_SPLIT.split(paragraph.strip()) if part]
+        sentences.extend((part, i == len(parts) - 1) for i, part in enumerate(parts))
+    return sentences
+
+
+def _minhash_signatures(texts: List[str]) -> np.ndarray:
+    signatures = np.full((len(texts), MINHASH_PERMUTATIONS), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for row, text in enumerate(texts):
+        words = WORD_PATTERN.findall(text.lower())
+        shingles = {
+            " ".join(words[i:i + SHINGLE_SIZE])
+            for i in range(max(1, len(words) - SHINGLE_SIZE + 1))
+        }
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) % MINHASH_PRIME for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        # (a * x + b) mod p for every permutation at once
+        permuted = (np.outer(hashes, _MINHASH_A) + _MINHASH_B) % np.uint64(MINHASH_PRIME)
+        signatures[row] = permuted.min(axis=0)
+    return signatures
+
+
+def find_near_duplicates(texts: List[str], threshold: float) -> List[bool]:
+    """Flag texts whose estimated Jaccard similarity to an earlier text meets ``threshold``"""
+    if not texts:
+        return []
+    signatures = _minhash_signatures(texts)
+    duplicate = [False] * len(texts)
+    kept: List[int] = []
+    for i in range(len(texts)):
+        if kept:
+            similarity = (signatures[kept] == signatures[i]).mean(axis=1)
+            if similarity.max() >= threshold:
+                duplicate[i] = True
+                continue
+        kept.append(i)
+    return duplicate
+
+
+def solve_knapsack(weights: List[int], values: List[float], capacity: int) -> List[int]:
+    """0/1 knapsack via a NumPy DP over capacities; returns selected item indices"""
+    if capacity <= 0 or not weights:
+        return []
+
+    scale = max(1, -(-len(weights) * capacity // MAX_DP_CELLS))
+    # Round weights up and capacity down so the coarse solution never overflows
+    scaled = [-(-w // scale) for w in weights]
+    capacity = capacity // scale
+
+    best = np.zeros(capacity + 1, dtype=np.float64)
+    take = np.zeros((len(weights), capacity + 1), dtype=bool)
+    for i, (weight, value) in enumerate(zip(scaled, values)):
+        if weight > capacity:
+            continue
+        candidate = best[:capacity + 1 - weight] + value
+        improved = candidate > best[weight:]
+        take[i, weight:] = improved
+        best[weight:] = np.where(improved, candidate, best[weight:])
+
+    selected = []
+    remaining = int(np.argmax(best))
+    for i in range(len(weights) - 1, -1, -1):
+        if take[i, remaining]:
+            selected.append(i)
+            remaining -= scaled[i]
+    return selected[::-1]
+
+
+def pack_documents(
+    docs: List[Document],
+    scores: List[float],
+    budget: int,
+    counter: TokenCounter,
+    min_chunk_size: int,
+    max_unit_tokens: int,
+    dedup_threshold: float = 0.8
+) -> PackedContext:
+    """Pack the most relevant, non-redundant text of ``docs`` into ``budget`` tokens.
+
+    Documents no larger than ``min_chunk_size`` tokens stay atomic; larger ones
+    are split into sentences. Sentences that near-duplicate a more relevant one
+    (e.g. chunk overlaps) are dropped, and the survivors are regrouped into
+    paragraph-bounded units of at most ``max_unit_tokens``. Each unit is worth
+    its token count weighted by its document's relevance.
+    """
+    doc_tokens = counter.count_many(doc.page_content for doc in docs)
+    pieces: List[Tuple[int, str, bool]] = []
+    for doc_index, (doc, tokens) in enumerate(zip(docs, doc_tokens)):
+        if tokens <= min_chunk_size:
+            pieces.append((doc_index, doc.page_content.strip(), True))
+        else:
+            pieces.extend((doc_index, text, ends) for text, ends in split_sentences(doc.page_content))
+
+    # Rank by relevance so the earliest copy of a duplicate is the one kept
+    order = sorted(range(len(pieces)), key=lambda i: (-scores[pieces[i][0]], pieces[i][0], i))
+    flags = find_near_duplicates([pieces[i][1] for i in order], dedup_threshold)
+    duplicate = [False] * len(pieces)
+    for i, flag in zip(order, flags):
+        duplicate[i] = flag
+    piece_tokens = counter.count_many(text for _, text, _ in pieces)
+
+    units: List[PackingUnit] = []
+    units_per_doc = [0] * len(docs)
+    group: List[int] = []
+
+    def close_group():
+        if not group:
+            return
+        doc_index = pieces[group[0]][0]
+        tokens = sum(piece_tokens[i] for i in group)
+        units.append(PackingUnit(
+            doc_index=doc_index,
+            position=group[0],
+            text=" ".join(pieces[i][1] for i in group),
+            separator="\n\n" if pieces[group[-1]][2] else " ",
+            tokens=tokens,
+            value=max(float(scores[doc_index]), 1e-3) * tokens
+        ))
+        units_per_doc[doc_index] += 1
+        group.clear()
+
+    for i, (doc_index, _, ends_paragraph) in enumerate(pieces):
+        if group and (
+            pieces[group[0]][0] != doc_index
+            or sum(piece_tokens[j] for j in group) + piece_tokens[i] > max_unit_tokens
+        ):
+            close_group()
+        if duplicate[i] or piece_tokens[i] == 0:
+            close_group()
+            continue
+        group.append(i)
+        if ends_paragraph:
+            close_group()
+    close_group()
+
+    selected = [
+        units[i]
+        for i in solve_knapsack([u.tokens for u in units], [u.value for u in units], budget)
+    ]
+
+    documents = _reassemble(docs, scores, selected, units_per_doc, duplicate, pieces)
+    return PackedContext(
+        documents=documents,
+        budget_tokens=budget,
+        used_tokens=sum(counter.count_many(doc.page_content for doc in documents)),
+        candidate_tokens=sum(doc_tokens),
+        candidate_units=len(units),
+        packed_units=len(selected),
+        duplicate_units=sum(duplicate)
+    )
+
+
+def _reassemble(
+    docs: List[Document],
+    scores: List[float],
+    selected: List[PackingUnit],
+    units_per_doc: List[int],
+    duplicate: List[bool],
+    pieces: List[Tuple[int, str, bool]]
+) -> List[Document]:
+    """Rebuild documents in relevance order with units in their original order"""
+    trimmed = [False] * len(docs)
+    for (doc_index, _, _), is_duplicate in zip(pieces, duplicate):
+        trimmed[doc_index] = trimmed[doc_index] or is_duplicate
+
+    by_doc = {}
+    for unit in selected:
+        by_doc.setdefault(unit.doc_index, []).append(unit)
+
+    documents = []
+    for doc_index in sorted(by_doc, key=lambda i: (-scores[i], i)):
+        doc = docs[doc_index]
+        units = sorted(by_doc[doc_index], key=lambda unit: unit.position)
+        if len(units) == units_per_doc[doc_index] and not trimmed[doc_index]:
+            documents.append(doc)
+            continue
+        content = "".join(unit.text + unit.separator for unit in units).strip()
+        documents.append(Document(
+            page_content=content,
+            metadata={
+                **doc.metadata,
+                "is_chunk": True,
+                "original_doc_id": doc.metadata.get("doc_id")
+            }
+        ))
+    return documents
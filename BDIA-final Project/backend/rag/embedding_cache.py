@@ -0,0 +1,250 @@
+from typing import Dict, List, Optional, Iterable, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+import numpy as np
+from backend.app.config import get_settings
+
+
+class EmbeddingCache:
+    """Process-wide, content-addressed embedding cache.
+
+    Keys are ``sha256(model, dimensions, normalized text)`` so identical
+    questions share an entry across requests and instances. Entries live in a
+    bounded LRU memory tier backed by an optional SQLite tier that stores
+    vectors as float16 blobs and survives restarts.
+
+    The memory tier is guarded by its own lock and never waits on SQLite. Async
+    callers should use ``aget_many``/``aput_many``, which run disk work in a
+    worker thread so the event loop is not blocked.
+    """
+
+    # Disk hits only refresh last_access in batches of this size (or on the
+    # next write), so reads stay read-only in the common case
+    TOUCH_FLUSH_SIZE = 256
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        path: Optional[str] = None,
+        disk_max_entries: int = 200000
+    ):
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "disk_evictions": 0
+        }
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._disk_count = 0
+        self._touched: Dict[str, float] = {}
+        if path:
+            self._open_disk_tier(Path(path))
+
+    def _open_disk_tier(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings (last_access)")
+        self._db.commit()
+        # Counted once here; inserts and evictions keep it current afterwards
+        self._disk_count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Normalize unicode and whitespace so trivially different inputs share a key"""
+        return " ".join(unicodedata.normalize("NFKC", text).split())
+
+    @classmethod
+    def make_key(cls, model: str, dimensions: int, text: str) -> str:
+        payload = f"{model}\x00{dimensions}\x00{cls.normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        return self.get_many([key]).get(key)
+
+    async def aget(self, key: str) -> Optional[List[float]]:
+        return (await self.aget_many([key])).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """Look up keys in memory first, then on disk; disk hits are promoted"""
+        found, pending = self._get_memory(keys)
+        if pending:
+            found.update(self._get_disk(pending))
+        return found
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """Same as ``get_many`` but reads the disk tier off the event loop"""
+        found, pending = self._get_memory(keys)
+        if pending:
+            found.update(await asyncio.to_thread(self._get_disk, pending))
+        return found
+
+    def put(self, key: str, vector: List[float]):
+        self.put_many([(key, vector)])
+
+    async def aput(self, key: str, vector: List[float]):
+        await self.aput_many([(key, vector)])
+
+    def put_many(self, items: Iterable[Tuple[str, List[float]]]):
+        rows = self._put_memory(items)
+        if rows:
+            self._write_disk(rows)
+
+    async def aput_many(self, items: Iterable[Tuple[str, List[float]]]):
+        """Same as ``put_many`` but writes the disk tier off the event loop"""
+        rows = self._put_memory(items)
+        if rows:
+            await asyncio.to_thread(self._write_disk, rows)
+
+    def _get_memory(self, keys: Iterable[str]) -> Tuple[Dict[str, List[float]], List[str]]:
+        found: Dict[str, List[float]] = {}
+        pending: List[str] = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    found[key] = vector.tolist()
+                else:
+                    pending.append(key)
+            if self._db is None:
+                self._stats["misses"] += len(pending)
+                pending = []
+        return found, pending
+
+    def _get_disk(self, keys: List[str]) -> Dict[str, List[float]]:
+        with self._db_lock:
+            rows = self._read_disk(keys)
+
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key, vector in rows:
+                self._stats["disk_hits"] += 1
+                self._remember(key, vector)
+                found[key] = vector.tolist()
+            self._stats["misses"] += len(keys) - len(found)
+        return found
+
+    def _put_memory(self, items: Iterable[Tuple[str, List[float]]]) -> List[Tuple[str, bytes, float]]:
+        rows = []
+        with self._lock:
+            for key, vector in items:
+                array = np.asarray(vector, dtype=np.float32)
+                self._remember(key, array)
+                if self._db is not None:
+                    rows.append((key, array.astype(np.float16).tobytes(), time.time()))
+        return rows
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _read_disk(self, keys: List[str]) -> List[Tuple[str, np.ndarray]]:
+        results = []
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._db.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                batch
+            ).fetchall()
+            results.extend(
+                (key, np.frombuffer(blob, dtype=np.float16).astype(np.float32))
+                for key, blob in rows
+            )
+
+        now = time.time()
+        self._touched.update((key, now) for key, _ in results)
+        if len(self._touched) >= self.TOUCH_FLUSH_SIZE:
+            self._flush_touched()
+            self._db.commit()
+        return results
+
+    def _write_disk(self, rows: List[Tuple[str, bytes, float]]):
+        with self._db_lock:
+            # Apply pending touches first so eviction sees recent reads
+            self._flush_touched()
+            inserted = self._db.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                rows
+            ).rowcount
+            if inserted < len(rows):
+                self._db.executemany(
+                    "UPDATE embeddings SET vector = ?, last_access = ? WHERE key = ?",
+                    [(vector, accessed, key) for key, vector, accessed in rows]
+                )
+            self._disk_count += inserted
+            self._trim_disk()
+            self._db.commit()
+
+    def _flush_touched(self):
+        if self._touched:
+            self._db.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _trim_disk(self):
+        overflow = self._disk_count - self.disk_max_entries
+        if overflow > 0:
+            deleted = self._db.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                "SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            ).rowcount
+            self._disk_count -= deleted
+            with self._lock:
+                self._stats["disk_evictions"] += deleted
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        stats["disk_entries"] = self._disk_count
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._touched.clear()
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+                self._disk_count = 0
+
+
+@lru_cache()
+def get_embedding_cache() -> EmbeddingCache:
+    settings = get_settings()
+    return EmbeddingCache(
+        max_entries=settings.EMBEDDING_CACHE_SIZE,
+        path=settings.EMBEDDING_CACHE_PATH or None,
+        disk_max_entries=settings.EMBEDDING_CACHE_DISK_MAX_ENTRIES
+    )
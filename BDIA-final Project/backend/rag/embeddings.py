@@ -1,25 +1,41 @@
 from typing import List, Optional, Dict
-from langchain.embeddings import OpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from app.config import get_settings
+from backend.app.config import get_settings
+import asyncio
 import numpy as np
 from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory, StateManager
+from backend.rag.embedding_cache import get_embedding_cache
+from backend.utils.llm.tokenizer import get_token_counter
+from backend.utils.llm.client_registry import get_openai_client
 
 settings = get_settings()
 
 class EduSearchEmbeddings:
     def __init__(self):
         self.model = "text-embedding-3-small"
-        self.cache = {}
+        self.dimensions = 384
+        self.client = get_openai_client()
+        self.token_counter = get_token_counter(self.model)
+        self.batch_size = settings.EMBEDDING_BATCH_SIZE
+        self.batch_max_tokens = settings.EMBEDDING_BATCH_MAX_TOKENS
+        self.max_input_tokens = 8191  # text-embedding-3 per-input limit
+        self._semaphore = asyncio.Semaphore(settings.EMBEDDING_MAX_CONCURRENCY)
+        # Shared across instances and backed by disk, see embedding_cache.py
+        self.cache = get_embedding_cache()
         self.state_manager = StateManager()
 
+    def _cache_key(self, text: str) -> str:
+        return self.cache.make_key(self.model, self.dimensions, text)
+
     async def embed_query(self, query: str) -> List[float]:
         try:
-            if query in self.cache:
-                return self.cache[query]
+            key = self._cache_key(query)
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                return cached
 
             embedding = await self._get_embedding(query)
-            self.cache[query] = embedding
+            await self.cache.aput(key, embedding)
             return embedding
 
         except Exception as e:
@@ -35,15 +51,21 @@ class EduSearchEmbeddings:
 
     async def embed_documents(self, texts: List[str]) -> List[List[float]]:
         try:
-            embeddings = []
-            for text in texts:
-                if text in self.cache:
-                    embeddings.append(self.cache[text])
-                else:
-                    embedding = await self._get_embedding(text)
-                    self.cache[text] = embedding
-                    embeddings.append(embedding)
-            return embeddings
+            keys = [self._cache_key(text) for text in texts]
+            cached = await self.cache.aget_many(keys)
+
+            # Deduplicate misses so each distinct text is embedded once
+            missing: Dict[str, str] = {}
+            for text, key in zip(texts, keys):
+                if key not in cached and key not in missing:
+                    missing[key] = text
+
+            if missing:
+                fresh = dict(zip(missing, await self._embed_batched(list(missing.values()))))
+                await self.cache.aput_many(fresh.items())
+                cached.update(fresh)
+
+            return [cached[key] for key in keys]
         except Exception as e:
             error = WorkflowError(
                 code="BATCH_EMBEDDING_ERROR",
@@ -58,10 +80,56 @@ class EduSearchEmbeddings:
     async def _get_embedding(self, text: str) -> List[float]:
         """Generate embedding for a single query text"""
         try:
-            return await self.embeddings.aembed_query(text)
+            return (await self._embed_batched([text]))[0]
         except Exception as e:
             raise Exception(f"Error generating query embedding: {str(e)}")
 
+    def _pack_batches(self, texts: List[str]) -> List[List[int]]:
+        """Group text indices into requests bounded by item count and token budget"""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+
+        for i, num_tokens in enumerate(self.token_counter.count_many(texts)):
+            if num_tokens > self.max_input_tokens:
+                # The API rejects oversize inputs, so keep the leading window
+                tokens = self.token_counter.encode(texts[i])
+                texts[i] = self.token_counter.decode(tokens[:self.max_input_tokens])
+                num_tokens = self.max_input_tokens
+
+            if current and (
+                len(current) >= self.batch_size
+                or current_tokens + num_tokens > self.batch_max_tokens
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+
+            current.append(i)
+            current_tokens += num_tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _embed_batched(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with packed, concurrent requests and return them in input order"""
+        texts = list(texts)
+        batches = self._pack_batches(texts)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+
+        async def run(batch: List[int]):
+            async with self._semaphore:
+                response = await self.client.embeddings.create(
+                    model=self.model,
+                    input=[texts[i] for i in batch],
+                    dimensions=self.dimensions
+                )
+            for item in response.data:
+                results[batch[item.index]] = item.embedding
+
+        await asyncio.gather(*(run(batch) for batch in batches))
+        return results
+
     async def get_text_embeddings(
         self,
         texts: List[str],
@@ -87,7 +155,7 @@ class EduSearchEmbeddings:
                     all_metadata.extend([chunk_metadata] * len(chunks))
 
             # Generate embeddings for all chunks
-            embeddings = await self.embeddings.aembed_documents(all_chunks)
+            embeddings = await self.embed_documents(all_chunks)
 
             # Combine embeddings with their metadata
             result = []
@@ -133,7 +201,7 @@ class EduSearchEmbeddings:
     async def batch_process_texts(
         self,
         texts: List[str],
-        batch_size: int = 5,
+        batch_size: int = 500,
         metadata: Optional[List[Dict]] = None
     ) -> List[Dict]:
         """Process large numbers of texts in batches"""
@@ -155,4 +223,4 @@ class EduSearchEmbeddings:
 
     def get_embedding_dimension(self) -> int:
         """Return the dimension of the embeddings"""
-        return 384  # Your Pinecone index dimension
\ No newline at end of file
+        return self.dimensions  # Your Pinecone index dimension
\ No newline at end of file
@@ -1,11 +1,19 @@
-from typing import Dict, Any, Literal, List, Optional
+from typing import Dict, Any, Literal, List, Optional, get_args
+from functools import lru_cache
 from pydantic import BaseModel
 from utils.llm.base import get_llm
 from utils.llm.prompt_templates import QUERY_ANALYSIS_PROMPT
 from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory, StateManager
-from .context_manager import QueryComplexity, ContextConfig
+from backend.utils.async_cache import AsyncTTLCache
+from backend.app.config import get_settings
+from backend.utils.llm.tokenizer import get_token_counter
+from .context_manager import ContextConfig
+from .sparse_index import tokenize
 
-import tiktoken
+import json
+import re
+
+settings = get_settings()
 
 QueryType = Literal["factual", "conceptual", "procedural", "analytical"]
 Complexity = Literal["basic", "intermediate", "advanced"]
@@ -18,51 +26,54 @@ class QueryAnalysis(BaseModel):
     requires_citations: bool
     token_estimate: int = 0
     context_config: Optional[ContextConfig] = None
+    
+    def retrieval_hints(self) -> Dict[str, Any]:
+        """The analysis keys ``AdaptiveRetriever.retrieve`` reads"""
+        return {
+            "depth": self.complexity,
+            "topics": self.topics,
+            "requires_factual": self.query_type == "factual"
+        }
+
+# Leading phrases that identify the query type confidently enough to skip the LLM
+QUERY_TYPE_PATTERNS = [
+    ("analytical", re.compile(r"^(compare|contrast|analy[sz]e|evaluate|assess|critique)\b")),
+    ("procedural", re.compile(r"^(how (do|does|can|to|should|would)|steps? (to|for)|walk me through)\b")),
+    ("conceptual", re.compile(r"^(why|explain|describe|what is the (idea|intuition|purpose))\b")),
+    ("factual", re.compile(r"^(what|who|when|where|which|define|list|name|is|are|does)\b"))
+]
+COMPLEX_KEYWORDS = ("explain", "compare", "analyze", "evaluate", "synthesize")
+CITATION_KEYWORDS = ("cite", "citation", "source", "reference")
+
+analysis_cache = AsyncTTLCache(
+    max_entries=settings.QUERY_ANALYSIS_CACHE_SIZE,
+    ttl_seconds=settings.QUERY_ANALYSIS_CACHE_TTL
+)
 
 class QueryRouter:
     def __init__(self):
         self.llm = get_llm()
         self.state_manager = StateManager()
-        self.tokenizer = tiktoken.encoding_for_model("gpt-4")
+        self.token_counter = get_token_counter("gpt-4")
+        # One JSON-mode call returns every analysis field, complexity included
+        self.analysis_chain = QUERY_ANALYSIS_PROMPT | self.llm.bind(
+            response_format={"type": "json_object"}
+        )
+    
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        return " ".join(query.lower().split()).rstrip("?!. ")
     
     async def analyze_query(self, query: str) -> QueryAnalysis:
         """Analyze query to determine type, complexity, and requirements"""
         try:
-            # Get LLM analysis
-            analysis_response = await self.llm.apredict_messages([
-                ("system", QUERY_ANALYSIS_PROMPT),
-                ("human", query)
-            ])
-            
-            # Parse LLM response
-            parsed_analysis = self._parse_llm_response(analysis_response)
-            
-            # Determine complexity
-            complexity = await self._determine_complexity(query)
-            
-            # Estimate token requirements
-            token_estimate = self._estimate_token_requirements(
-                query, 
-                complexity,
-                parsed_analysis["query_type"]
-            )
-            
-            # Generate context configuration
-            context_config = self._generate_context_config(
-                complexity,
-                token_estimate,
-                parsed_analysis["requires_context"]
-            )
-            
-            return QueryAnalysis(
-                query_type=parsed_analysis["query_type"],
-                complexity=complexity,
-                topics=parsed_analysis["topics"],
-                requires_context=parsed_analysis["requires_context"],
-                requires_citations=parsed_analysis["requires_citations"],
-                token_estimate=token_estimate,
-                context_config=context_config
+            normalized = self._normalize_query(query)
+            analysis = await analysis_cache.get_or_compute(
+                normalized,
+                lambda: self._analyze(query, normalized)
             )
+            # Callers may adjust the context config, so never share the cached model
+            return analysis.model_copy(deep=True)
             
         except Exception as e:
             error = WorkflowError(
@@ -75,6 +86,71 @@ class QueryRouter:
             await self.state_manager.add_error(error)
             return self._get_default_analysis()
     
+    async def _analyze(self, query: str, normalized: str) -> QueryAnalysis:
+        parsed_analysis = self._heuristic_analysis(normalized)
+        if parsed_analysis is None:
+            response = await self.analysis_chain.ainvoke({"query": query})
+            parsed_analysis = self._parse_llm_response(response.content)
+        
+        # Estimate token requirements
+        token_estimate = self._estimate_token_requirements(
+            query,
+            parsed_analysis["complexity"],
+            parsed_analysis["query_type"]
+        )
+        
+        # Generate context configuration
+        context_config = self._generate_context_config(
+            parsed_analysis["complexity"],
+            token_estimate,
+            parsed_analysis["requires_context"]
+        )
+        
+        return QueryAnalysis(
+            query_type=parsed_analysis["query_type"],
+            complexity=parsed_analysis["complexity"],
+            topics=parsed_analysis["topics"],
+            requires_context=parsed_analysis["requires_context"],
+            requires_citations=parsed_analysis["requires_citations"],
+            token_estimate=token_estimate,
+            context_config=context_config
+        )
+    
+    def _heuristic_analysis(self, normalized: str) -> Optional[Dict[str, Any]]:
+        """Classify short, plainly phrased queries without calling the LLM"""
+        words = normalized.split()
+        if len(words) > settings.QUERY_FAST_PATH_MAX_WORDS:
+            return None
+        
+        query_type = next(
+            (name for name, pattern in QUERY_TYPE_PATTERNS if pattern.match(normalized)),
+            None
+        )
+        if query_type is None:
+            return None
+        
+        has_complex_keywords = any(word in normalized for word in COMPLEX_KEYWORDS)
+        return {
+            "query_type": query_type,
+            "complexity": "intermediate" if has_complex_keywords or query_type == "analytical" else "basic",
+            "topics": tokenize(normalized),
+            "requires_context": True,
+            "requires_citations": any(word in normalized for word in CITATION_KEYWORDS)
+        }
+    
+    def _parse_llm_response(self, content: str) -> Dict[str, Any]:
+        """Parse the JSON analysis, falling back to defaults for missing or invalid fields"""
+        data = json.loads(content)
+        query_type = data.get("query_type", "factual")
+        complexity = str(data.get("complexity", "intermediate")).lower()
+        return {
+            "query_type": query_type if query_type in get_args(QueryType) else "factual",
+            "complexity": complexity if complexity in get_args(Complexity) else "intermediate",
+            "topics": [str(topic) for topic in data.get("topics", [])],
+            "requires_context": bool(data.get("requires_context", True)),
+            "requires_citations": bool(data.get("requires_citations", False))
+        }
+    
     def _estimate_token_requirements(
         self, 
         query: str, 
@@ -82,7 +158,7 @@ class QueryRouter:
         query_type: QueryType
     ) -> int:
         """Estimate token requirements based on query characteristics"""
-        base_tokens = len(self.tokenizer.encode(query))
+        base_tokens = self.token_counter.count(query)
         
         # Complexity multipliers
         complexity_multipliers = {
@@ -139,43 +215,6 @@ class QueryRouter:
             
         return config
     
-    async def _determine_complexity(self, query: str) -> QueryComplexity:
-        """Determine query complexity using heuristics and LLM"""
-        try:
-            # Basic heuristics
-            word_count = len(query.split())
-            has_complex_keywords = any(word in query.lower() for word in [
-                "explain", "compare", "analyze", "evaluate", "synthesize"
-            ])
-            
-            # LLM-based complexity assessment
-            complexity_response = await self.llm.apredict_messages([
-                ("system", "Analyze the complexity of this query and respond with BASIC, INTERMEDIATE, or ADVANCED."),
-                ("human", query)
-            ])
-            
-            # Combine heuristics and LLM assessment
-            if "ADVANCED" in complexity_response or (
-                word_count > 30 and has_complex_keywords
-            ):
-                return QueryComplexity.ADVANCED
-            elif "INTERMEDIATE" in complexity_response or (
-                word_count > 15 or has_complex_keywords
-            ):
-                return QueryComplexity.INTERMEDIATE
-            else:
-                return QueryComplexity.BASIC
-                
-        except Exception as e:
-            await self.state_manager.add_error(WorkflowError(
-                code="COMPLEXITY_DETERMINATION_ERROR",
-                message=str(e),
-                severity=ErrorSeverity.LOW,
-                category=ErrorCategory.PROCESSING,
-                context={"query": query}
-            ))
-            return QueryComplexity.INTERMEDIATE  # Default to intermediate
-    
     def _get_default_analysis(self) -> QueryAnalysis:
         """Return default analysis for error cases"""
         return QueryAnalysis(
@@ -190,4 +229,10 @@ class QueryRouter:
                 min_chunk_size=150,
                 overlap_ratio=0.15
             )
-        )
\ No newline at end of file
+        )
+
+
+@lru_cache()
+def get_query_router() -> QueryRouter:
+    """One router per process, so every chain shares its analysis chain"""
+    return QueryRouter()
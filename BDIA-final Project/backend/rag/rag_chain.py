@@ -2,11 +2,14 @@ from typing import Dict, List, Optional
 from langchain.chains import LLMChain
 from langchain.schema import Document
 from utils.llm.base import get_llm
-from utils.llm.prompt_templates import QUERY_ANALYSIS_PROMPT, QA_PROMPT
+from utils.llm.prompt_templates import QA_PROMPT
 from .retriever import AdaptiveRetriever
 from .context_manager import ContextWindowManager, QueryComplexity, ContextConfig
 from .feedback import RAGFeedback
+from .query_router import get_query_router
 from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory, StateManager
+from backend.rag.answer_cache import answer_cache
+from backend.utils.llm.scheduler import Priority, llm_priority
 
 class AdaptiveRAGChain:
     def __init__(self):
@@ -27,23 +30,33 @@ class AdaptiveRAGChain:
         )
         self.llm = get_llm()
         self.retriever = AdaptiveRetriever()
-        self.query_analyzer = LLMChain(
-            llm=self.llm,
-            prompt=QUERY_ANALYSIS_PROMPT
-        )
+        # Cached analysis with a heuristic fast path, shared with the orchestrator
+        self.query_router = get_query_router()
         self.qa_chain = LLMChain(
             llm=self.llm,
             prompt=QA_PROMPT
         )
         self.feedback = RAGFeedback()
     
-    async def process_query(self, query: str) -> Dict:
+    async def process_query(self, query: str, course: Optional[str] = None) -> Dict:
+        # A user is waiting on this answer; jump ahead of background LLM work
+        with llm_priority(Priority.INTERACTIVE):
+            return await self._process_query(query, course)
+    
+    async def _process_query(self, query: str, course: Optional[str]) -> Dict:
         try:
+            # Paraphrases of an answered question are served from the answer cache
+            question_vector = await self._embed_question(query)
+            if question_vector is not None:
+                cached = answer_cache.lookup(question_vector, course)
+                if cached is not None:
+                    return {**cached, "query": query, "cached": True}
+            
             # Analyze query
-            analysis = await self.query_analyzer.arun(query=query)
+            analysis = await self.query_router.analyze_query(query)
             
             # Get relevant documents
-            docs = await self.retriever.retrieve(query, analysis)
+            docs = await self.retriever.retrieve(query, analysis.retrieval_hints())
             
             # Optimize context window
             optimized_docs = await self.context_manager.optimize_context(docs, query)
@@ -59,15 +72,18 @@ class AdaptiveRAGChain:
             await self.feedback.log_interaction(
                 query=query,
                 response=response,
-                metadata={"analysis": analysis, "docs_count": len(docs)}
+                metadata={"analysis": analysis.model_dump(), "docs_count": len(docs)}
             )
             
-            return {
+            result = {
                 "query": query,
-                "analysis": analysis,
+                "analysis": analysis.model_dump(),
                 "response": response,
                 "sources": self._get_sources(optimized_docs)
             }
+            if question_vector is not None:
+                answer_cache.store(question_vector, query, result, course)
+            return result
         except Exception as e:
             error = WorkflowError(
                 code="RAG_PROCESSING_ERROR",
@@ -79,6 +95,13 @@ class AdaptiveRAGChain:
             await self.state_manager.add_error(error)
             return self._create_error_response(error)
     
+    async def _embed_question(self, query: str) -> Optional[List[float]]:
+        """Embed the question for the answer cache; a failure just skips the cache"""
+        try:
+            return await self.context_manager.get_embeddings().embed_query(query)
+        except Exception:
+            return None
+    
     def _format_context(self, docs: List[Document]) -> str:
         return "\n\n".join(doc.page_content for doc in docs)
     
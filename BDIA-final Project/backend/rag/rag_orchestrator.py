@@ -3,7 +3,7 @@ from .retriever import AdaptiveRetriever
 from .embeddings import EduSearchEmbeddings
 from utils.llm.base import get_llm
 from agents.qa_agent import QAAgent
-from .query_router import QueryRouter
+from .query_router import get_query_router
 
 class RAGOrchestrator:
     def __init__(self):
@@ -11,7 +11,7 @@ class RAGOrchestrator:
         self.retriever = AdaptiveRetriever()
         self.qa_agent = QAAgent()
         self.llm = get_llm()
-        self.query_router = QueryRouter()
+        self.query_router = get_query_router()
     
     async def process_query(self, query: str) -> Dict[str, Any]:
         # Analyze query
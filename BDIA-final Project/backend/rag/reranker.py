@@ -0,0 +1,155 @@
+from typing import List, Optional
+from abc import ABC, abstractmethod
+import asyncio
+import re
+import numpy as np
+from langchain.schema import Document
+from backend.app.config import get_settings
+from backend.rag.embeddings import EduSearchEmbeddings
+from backend.rag.context_manager import EMBEDDING_METADATA_KEY
+from backend.rag.sparse_index import tokenize
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class BaseReranker(ABC):
+    """Reorders retrieved chunks and optionally compresses them before QA"""
+
+    @abstractmethod
+    async def rerank(self, query: str, docs: List[Document], k: int) -> List[Document]:
+        pass
+
+
+class NoopReranker(BaseReranker):
+    async def rerank(self, query: str, docs: List[Document], k: int) -> List[Document]:
+        return docs[:k]
+
+
+class CosineSentenceReranker(BaseReranker):
+    """Rank chunks by cosine similarity to the query, then drop off-topic sentences.
+
+    Runs locally on CPU: chunk vectors come from the vector store, and chunks
+    stored without one keep their retrieval score instead of being re-embedded.
+    Sentences are scored by the share of query terms they contain. The only
+    embedding lookup is the query itself; pass the retriever's
+    ``EduSearchEmbeddings`` so it is served from the cache the dense search filled.
+    """
+
+    def __init__(
+        self,
+        embeddings: Optional[EduSearchEmbeddings] = None,
+        sentence_threshold: float = 0.2,
+        min_sentences: int = 3
+    ):
+        self.embeddings = embeddings or EduSearchEmbeddings()
+        self.sentence_threshold = sentence_threshold
+        self.min_sentences = min_sentences
+
+    async def rerank(self, query: str, docs: List[Document], k: int) -> List[Document]:
+        if not docs:
+            return []
+
+        scores = await self._document_scores(query, docs)
+        order = np.argsort(-scores, kind="stable")[:k]
+        ranked = [(docs[i], float(scores[i])) for i in order]
+        return self._prune_sentences(query, ranked)
+
+    async def _document_scores(self, query: str, docs: List[Document]) -> np.ndarray:
+        # Stored retrieval scores are the vector store's cosine similarities
+        scores = np.asarray([doc.metadata.get("score") or 0.0 for doc in docs], dtype=np.float32)
+        stored = [i for i, doc in enumerate(docs) if doc.metadata.get(EMBEDDING_METADATA_KEY)]
+        if stored:
+            query_vector = _unit_rows(np.asarray(await self.embeddings.embed_query(query), dtype=np.float32))
+            matrix = _unit_rows(np.asarray(
+                [docs[i].metadata[EMBEDDING_METADATA_KEY] for i in stored], dtype=np.float32
+            ))
+            scores[stored] = matrix @ query_vector
+        return scores
+
+    def _prune_sentences(self, query: str, ranked) -> List[Document]:
+        query_terms = set(tokenize(query))
+        split = [SENTENCE_SPLIT.split(doc.page_content.strip()) for doc, _ in ranked]
+
+        results = []
+        for (doc, score), parts in zip(ranked, split):
+            content = doc.page_content
+            # Short chunks are kept whole; pruning them saves little and loses context
+            if query_terms and len(parts) >= self.min_sentences:
+                scored = [
+                    (part, len(query_terms.intersection(tokenize(part))) / len(query_terms))
+                    for part in parts
+                ]
+                kept = [part for part, s in scored if s >= self.sentence_threshold]
+                content = " ".join(kept or [max(scored, key=lambda item: item[1])[0]])
+            results.append(Document(
+                page_content=content,
+                metadata={**doc.metadata, 'rerank_score': score}
+            ))
+        return results
+
+
+class CrossEncoderReranker(BaseReranker):
+    """Score (query, chunk) pairs with a small local cross-encoder on CPU"""
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            raise ImportError("RERANKER=cross_encoder requires the sentence-transformers package")
+        self.model = CrossEncoder(model_name, device="cpu")
+
+    async def rerank(self, query: str, docs: List[Document], k: int) -> List[Document]:
+        if not docs:
+            return []
+        scores = await asyncio.to_thread(
+            self.model.predict, [(query, doc.page_content) for doc in docs]
+        )
+        order = np.argsort(-np.asarray(scores))[:k]
+        return [
+            Document(
+                page_content=docs[i].page_content,
+                metadata={**docs[i].metadata, 'rerank_score': float(scores[i])}
+            ) for i in order
+        ]
+
+
+class LLMExtractorReranker(BaseReranker):
+    """Opt-in LLM extraction: one chat completion per document"""
+
+    def __init__(self):
+        from langchain.retrievers.document_compressors import LLMChainExtractor
+        from utils.llm.base import get_llm
+        self.compressor = LLMChainExtractor.from_llm(get_llm())
+
+    async def rerank(self, query: str, docs: List[Document], k: int) -> List[Document]:
+        compressed = await self.compressor.acompress_documents(docs, query)
+        return list(compressed)[:k]
+
+
+RERANKERS = {
+    "cosine": CosineSentenceReranker,
+    "cross_encoder": CrossEncoderReranker,
+    "llm": LLMExtractorReranker,
+    "none": NoopReranker
+}
+
+
+def get_reranker(name: Optional[str] = None, embeddings: Optional[EduSearchEmbeddings] = None) -> BaseReranker:
+    settings = get_settings()
+    name = name or settings.RERANKER
+    if name not in RERANKERS:
+        raise ValueError(f"Unknown reranker '{name}', expected one of {sorted(RERANKERS)}")
+    if name == "cosine":
+        return CosineSentenceReranker(
+            embeddings=embeddings,
+            sentence_threshold=settings.RERANKER_SENTENCE_THRESHOLD
+        )
+    if name == "cross_encoder":
+        return CrossEncoderReranker(settings.RERANKER_CROSS_ENCODER_MODEL)
+    return RERANKERS[name]()
@@ -1,43 +1,80 @@
-from typing import List, Dict, Optional
+from typing import Awaitable, List, Dict, Optional, Tuple
 from langchain.schema import Document
-from langchain.retrievers import ContextualCompressionRetriever
-from langchain.retrievers.document_compressors import LLMChainExtractor
 from utils.llm.base import get_llm
-from utils.vector_db.pinecone_client import PineconeClient
-from langchain.embeddings import OpenAIEmbeddings
-from functools import lru_cache
+from backend.utils.vectorDb.local_client import get_vector_client
+from backend.rag.retrieval_cache import retrieval_cache, course_tags
+from backend.rag.sparse_index import get_sparse_index
+from backend.rag.reranker import get_reranker
+from backend.rag.embeddings import EduSearchEmbeddings
+from backend.app.config import get_settings
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 class AdaptiveRetriever:
     def __init__(self):
-        self.client = PineconeClient()
+        self.client = get_vector_client()
+        self.sparse_index = get_sparse_index()
+        settings = get_settings()
+        self.rrf_k = settings.RRF_K
+        self.rerank_fetch_multiplier = settings.RERANKER_FETCH_MULTIPLIER
+        self.deadlines = {
+            "dense": settings.RETRIEVAL_DENSE_TIMEOUT,
+            "expansion": settings.RETRIEVAL_EXPANSION_TIMEOUT,
+            "keyword": settings.RETRIEVAL_KEYWORD_TIMEOUT
+        }
         self.llm = get_llm()
-        # Ensure embeddings match Pinecone index dimensions
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small",  # This model uses 384 dimensions
-            dimensions=384  # Explicitly set dimensions
+        # Cache-backed query embeddings, shared with the reranker so it reuses the dense search's vector
+        self.embeddings = EduSearchEmbeddings()
+        # Local rerank/compress stage; the LLM extractor is opt-in via RERANKER=llm
+        self.reranker = get_reranker(embeddings=self.embeddings)
+    
+    @staticmethod
+    def _cache_key(query: str, k: int, filter: Optional[Dict], namespace: str) -> str:
+        normalized_query = " ".join(query.lower().split())
+        return json.dumps(
+            [normalized_query, k, filter or {}, namespace],
+            sort_keys=True,
+            default=str
         )
-        self.base_compressor = LLMChainExtractor.from_llm(self.llm)
-        # Use the langchain retriever from our PineconeClient
-        self.compression_retriever = ContextualCompressionRetriever(
-            base_compressor=self.base_compressor,
-            base_retriever=self.client.get_langchain_retriever(
-                embedding=self.embeddings
-            )
+    
+    async def _cached_retrieval(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict] = None,
+        namespace: str = ""
+    ) -> List[Document]:
+        """Retrieve through the shared TTL/LRU cache with single-flight loading"""
+        result = await retrieval_cache.get_or_compute(
+            self._cache_key(query, k, filter, namespace),
+            lambda: self._retrieve_and_rerank(query, k, filter, namespace),
+            tags=course_tags(filter)
         )
-        self.cache = {}
+        # Callers extend the list, so never hand out the cached object
+        return list(result)
     
-    @lru_cache(maxsize=1000)
-    async def _cached_retrieval(self, query: str, cache_key: Optional[str] = None):
-        if cache_key and cache_key in self.cache:
-            return self.cache[cache_key]
-            
-        # Your existing retrieval logic
-        result = await self.compression_retriever.aget_relevant_documents(query)
-        
-        if cache_key:
-            self.cache[cache_key] = result
-            
-        return result
+    async def _retrieve_and_rerank(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[Dict],
+        namespace: str
+    ) -> List[Document]:
+        """Over-fetch from the vector store, then let the reranker pick the top k"""
+        # Embedded through the shared cache, so the reranker's lookup of the same query is a hit
+        query_vector = await self.embeddings.embed_query(query)
+        matches = await self.client.fetch_segments(
+            query_vector,
+            top_k=k * self.rerank_fetch_multiplier,
+            filter=filter,
+            namespace=namespace,
+            include_values=True
+        )
+        docs = [doc for doc in map(self.client._to_document, matches) if doc is not None]
+        return await self.reranker.rerank(query, docs, k)
 
     async def retrieve(
         self,
@@ -49,18 +86,59 @@ class AdaptiveRetriever:
                 # Adjust retrieval based on query analysis
                 k = 6 if analysis.get('depth') == 'advanced' else 4
                 
-                # Initial retrieval using compression retriever
-                docs = await self._cached_retrieval(query)
+                # Launch every applicable strategy at once; expansion runs
+                # speculatively and is only kept if the dense results are thin
+                strategies = {
+                    "dense": (self._cached_retrieval(query, k=k), self.deadlines["dense"])
+                }
+                if analysis.get('topics'):
+                    strategies["expansion"] = (
+                        self._expand_retrieval(pinecone, query, [], analysis),
+                        self.deadlines["expansion"]
+                    )
+                if analysis.get('requires_factual', False) and self.sparse_index is not None:
+                    strategies["keyword"] = (
+                        self._keyword_search(query, k=k),
+                        self.deadlines["keyword"]
+                    )
+                results = await self._run_strategies(strategies)
+                
+                docs = results.get("dense", [])
+                if results.get("keyword"):
+                    docs = self._merge_results(docs, results["keyword"])
                 
                 # Check if we need more context
-                if len(docs) < 2 or self._needs_expansion(docs, analysis):
-                    expanded_docs = await self._expand_retrieval(pinecone, query, docs, analysis)
-                    docs.extend(expanded_docs)
+                if results.get("expansion") and (len(docs) < 2 or self._needs_expansion(docs, analysis)):
+                    docs.extend(results["expansion"])
                 
                 return docs
             except Exception as e:
                 raise Exception(f"Retrieval failed: {str(e)}")
 
+    async def _run_strategies(self, strategies: Dict[str, Tuple[Awaitable, float]]) -> Dict[str, List[Document]]:
+        """Run strategies concurrently, keeping whatever finishes within its deadline"""
+        names = list(strategies)
+        outcomes = await asyncio.gather(
+            *(asyncio.wait_for(coro, timeout) for coro, timeout in strategies.values()),
+            return_exceptions=True
+        )
+        
+        results = {}
+        failures = []
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, asyncio.TimeoutError):
+                logger.warning(f"{name} retrieval missed its {strategies[name][1]}s deadline")
+            elif isinstance(outcome, Exception):
+                logger.warning(f"{name} retrieval failed: {str(outcome)}")
+                failures.append(outcome)
+            else:
+                results[name] = outcome
+        
+        # Only surface an error when no strategy produced anything usable
+        if not results and failures:
+            raise failures[0]
+        return results
+
     def _needs_expansion(self, docs: List[Document], analysis: Dict) -> bool:
         total_content = sum(len(doc.page_content) for doc in docs)
         return (total_content < 1000 and 
@@ -83,19 +161,18 @@ class AdaptiveRetriever:
                 "topics": {"$in": topics}
             }
             
-            results = await pinecone_client.similarity_search(
-                query=query,
-                k=4,  # Adjust based on needs
-                filter=filter_conditions,
-                namespace="edu-content"  # Add your namespace if using one
-            )
+            # The client's retriever keeps each match's score (and vector) in metadata
+            results = await pinecone_client.get_langchain_retriever({
+                "k": 4,  # Adjust based on needs
+                "filter": filter_conditions,
+                "namespace": "edu-content"  # Add your namespace if using one
+            }).ainvoke(query)
             
             return [
                 Document(
-                    page_content=result.metadata.get('text', ''),
+                    page_content=result.page_content,
                     metadata={
                         **result.metadata,
-                        'score': result.score,  # Include relevance score
                         'retrieval_type': 'expansion'
                     }
                 ) for result in results
@@ -110,65 +187,70 @@ class AdaptiveRetriever:
         k: int = 4
     ) -> List[Document]:
         """Implement hybrid search combining semantic and keyword search"""
-        semantic_results = await self._cached_retrieval(query)
+        strategies = {"dense": (self._cached_retrieval(query, k=k), self.deadlines["dense"])}
         
         # Get keyword results if needed
         if analysis.get('requires_factual', False):
-            keyword_results = await self._keyword_search(query, k=k)
-            return self._merge_results(semantic_results, keyword_results)
-            
-        return semantic_results
+            strategies["keyword"] = (self._keyword_search(query, k=k), self.deadlines["keyword"])
+        results = await self._run_strategies(strategies)
+        
+        if results.get("keyword"):
+            return self._merge_results(results.get("dense", []), results["keyword"])
+        return results.get("dense", [])
     
-    async def _keyword_search(self, query: str, k: int = 4) -> List[Document]:
-        """Implement keyword-based search for factual queries"""
+    async def _keyword_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict] = None
+    ) -> List[Document]:
+        """BM25 search over the local sparse index for exact-term recall"""
+        if self.sparse_index is None:
+            return []
         try:
-            # Use Pinecone's keyword matching capabilities
-            filter_conditions = {
-                "$or": [
-                    {"text": {"$contains": keyword}} 
-                    for keyword in query.lower().split()
-                ]
-            }
-            
-            results = await self.client.similarity_search(
-                query=query,
-                k=k,
-                filter=filter_conditions,
-                namespace="edu-content"
-            )
-            
             return [
                 Document(
-                    page_content=result.metadata.get('text', ''),
+                    page_content=record["text"],
                     metadata={
-                        **result.metadata,
+                        **record.get("metadata", {}),
+                        'id': record["id"],
+                        'score': score,
                         'retrieval_type': 'keyword'
                     }
-                ) for result in results
+                ) for record, score in self.sparse_index.search(query, k=k, filter=filter)
             ]
         except Exception as e:
             raise Exception(f"Keyword search failed: {str(e)}")
     
+    @staticmethod
+    def _fusion_key(doc: Document):
+        metadata = doc.metadata
+        if metadata.get('document') is not None and metadata.get('chunk_id') is not None:
+            return (metadata['document'], metadata['chunk_id'])
+        return metadata.get('id') or doc.page_content
+    
     def _merge_results(
         self,
         semantic_docs: List[Document],
         keyword_docs: List[Document]
     ) -> List[Document]:
-        """Merge and deduplicate results with score-based ranking"""
-        doc_map = {}
+        """Fuse dense and sparse rankings with reciprocal-rank fusion"""
+        fused_scores: Dict = {}
+        doc_map: Dict = {}
         
-        for doc in semantic_docs + keyword_docs:
-            doc_id = doc.metadata.get('id')
-            score = doc.metadata.get('score', 0.0)
-            
-            if doc_id not in doc_map or score > doc_map[doc_id].metadata.get('score', 0.0):
-                doc_map[doc_id] = doc
-                
-        # Sort by score and return top results
-        sorted_docs = sorted(
-            doc_map.values(),
-            key=lambda x: x.metadata.get('score', 0.0),
-            reverse=True
-        )
+        for ranking in (semantic_docs, keyword_docs):
+            for rank, doc in enumerate(ranking):
+                key = self._fusion_key(doc)
+                fused_scores[key] = fused_scores.get(key, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+                # Prefer the fuller chunk text when both sides return the same chunk
+                if key not in doc_map or len(doc.page_content) > len(doc_map[key].page_content):
+                    doc_map[key] = doc
         
-        return sorted_docs[:max(len(semantic_docs), len(keyword_docs))]
\ No newline at end of file
+        ranked_keys = sorted(fused_scores, key=fused_scores.get, reverse=True)
+        return [
+            Document(
+                page_content=doc_map[key].page_content,
+                metadata={**doc_map[key].metadata, 'rrf_score': fused_scores[key]}
+            )
+            for key in ranked_keys[:max(len(semantic_docs), len(keyword_docs))]
+        ]
@@ -0,0 +1,46 @@
+from typing import Dict, Iterable, List, Optional
+from backend.app.config import get_settings
+from backend.utils.async_cache import AsyncTTLCache
+from backend.rag.answer_cache import answer_cache, course_key
+
+settings = get_settings()
+
+# Process-wide so every retriever instance shares hits and in-flight queries
+retrieval_cache = AsyncTTLCache(
+    max_entries=settings.RETRIEVAL_CACHE_SIZE,
+    ttl_seconds=settings.RETRIEVAL_CACHE_TTL
+)
+
+ALL_COURSES_TAG = "course:*"
+
+def course_tags(filter: Optional[Dict]) -> List[str]:
+    """Tag a retrieval with the course its filter pins, or with all courses"""
+    course = (filter or {}).get("course")
+    if isinstance(course, dict):
+        course = course.get("$eq")
+    if isinstance(course, str) and course_key(course):
+        return [f"course:{course_key(course)}"]
+    return [ALL_COURSES_TAG]
+
+def invalidate_course_cache(course: Optional[str] = None) -> int:
+    """Drop cached retrievals and answers that may include vectors of ``course``.
+    
+    Unfiltered retrievals can surface any course, so they are dropped too.
+    Without a course the whole cache is cleared.
+    """
+    answer_cache.invalidate_course(course)
+    if course is None:
+        removed = len(retrieval_cache)
+        retrieval_cache.clear()
+        return removed
+    return (
+        retrieval_cache.invalidate_tag(f"course:{course_key(course)}")
+        + retrieval_cache.invalidate_tag(ALL_COURSES_TAG)
+    )
+
+def invalidate_for_metadata(metadatas: Iterable[Dict]) -> int:
+    """Invalidate every course touched by a batch of upserted vectors"""
+    courses = {metadata.get("course") for metadata in metadatas}
+    if None in courses or not courses:
+        return invalidate_course_cache()
+    return sum(invalidate_course_cache(course) for course in courses)
@@ -0,0 +1,193 @@
+"""BM25 inverted index over the ``*_chunks.json`` files written by ``process_pdf``.
+
+Build it offline after the Airflow parsing task has run:
+
+    python -m backend.rag.sparse_index parsed_content data/sparse_index
+
+The index is stored as CSR postings with precomputed BM25 impact scores, so a
+query is a handful of NumPy slice-and-add operations over memory-mapped arrays.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from functools import lru_cache
+from pathlib import Path
+import json
+import math
+import re
+import sys
+import numpy as np
+from backend.app.config import get_settings
+from backend.utils.vectorDb.local_client import matches_filter
+
+VOCAB_FILE = "vocab.json"
+OFFSETS_FILE = "offsets.npy"
+DOC_IDS_FILE = "doc_ids.npy"
+IMPACTS_FILE = "impacts.npy"
+DOCS_FILE = "docs.jsonl"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has in is it its of on or that the this to was
+were what which who will with how why when where does do did can i me my you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Read-only BM25 index with precomputed per-posting impact scores"""
+
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        impacts: np.ndarray,
+        docs: List[Dict[str, Any]]
+    ):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.impacts = impacts
+        self.docs = docs
+
+    @classmethod
+    def build(cls, records: Iterable[Dict[str, Any]], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """Build from records with ``id``, ``text`` and ``metadata`` keys"""
+        docs: List[Dict[str, Any]] = []
+        term_postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths: List[int] = []
+
+        for record in records:
+            tokens = tokenize(record["text"])
+            if not tokens:
+                continue
+            doc_index = len(docs)
+            docs.append(record)
+            lengths.append(len(tokens))
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                term_postings.setdefault(token, []).append((doc_index, tf))
+
+        num_docs = len(docs)
+        avg_length = (sum(lengths) / num_docs) if num_docs else 0.0
+        lengths_array = np.asarray(lengths, dtype=np.float32)
+
+        vocab: Dict[str, int] = {}
+        offsets = [0]
+        doc_id_parts: List[np.ndarray] = []
+        impact_parts: List[np.ndarray] = []
+
+        for term in sorted(term_postings):
+            postings = term_postings[term]
+            ids = np.fromiter((doc for doc, _ in postings), dtype=np.int32, count=len(postings))
+            tfs = np.fromiter((tf for _, tf in postings), dtype=np.float32, count=len(postings))
+            idf = math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            norms = k1 * (1 - b + b * lengths_array[ids] / avg_length)
+            vocab[term] = len(vocab)
+            doc_id_parts.append(ids)
+            impact_parts.append((idf * tfs * (k1 + 1) / (tfs + norms)).astype(np.float32))
+            offsets.append(offsets[-1] + len(postings))
+
+        return cls(
+            vocab=vocab,
+            offsets=np.asarray(offsets, dtype=np.int64),
+            doc_ids=np.concatenate(doc_id_parts) if doc_id_parts else np.zeros(0, dtype=np.int32),
+            impacts=np.concatenate(impact_parts) if impact_parts else np.zeros(0, dtype=np.float32),
+            docs=docs
+        )
+
+    @classmethod
+    def from_chunk_files(cls, parsed_content_dir: str, **kwargs) -> "BM25Index":
+        """Build from the ``*_chunks.json`` files produced by the Airflow DAG"""
+        def records():
+            for path in sorted(Path(parsed_content_dir).rglob("*_chunks.json")):
+                with path.open("r") as fp:
+                    for chunk in json.load(fp):
+                        text = chunk.get("text", "").strip()
+                        if not text:
+                            continue
+                        metadata = {key: value for key, value in chunk.items() if key != "text"}
+                        yield {
+                            "id": f"{chunk.get('document', 'unknown')}_{chunk.get('chunk_id', 'unknown')}",
+                            "text": text,
+                            "metadata": metadata
+                        }
+        return cls.build(records(), **kwargs)
+
+    def save(self, path: str):
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        with (directory / VOCAB_FILE).open("w") as fp:
+            json.dump(self.vocab, fp)
+        np.save(directory / OFFSETS_FILE, self.offsets)
+        np.save(directory / DOC_IDS_FILE, self.doc_ids)
+        np.save(directory / IMPACTS_FILE, self.impacts)
+        with (directory / DOCS_FILE).open("w") as fp:
+            for doc in self.docs:
+                fp.write(json.dumps(doc, ensure_ascii=False) + "\n")
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Load with the posting arrays memory-mapped"""
+        directory = Path(path)
+        with (directory / VOCAB_FILE).open("r") as fp:
+            vocab = json.load(fp)
+        with (directory / DOCS_FILE).open("r") as fp:
+            docs = [json.loads(line) for line in fp]
+        return cls(
+            vocab=vocab,
+            offsets=np.load(directory / OFFSETS_FILE, mmap_mode="r"),
+            doc_ids=np.load(directory / DOC_IDS_FILE, mmap_mode="r"),
+            impacts=np.load(directory / IMPACTS_FILE, mmap_mode="r"),
+            docs=docs
+        )
+
+    def search(self, query: str, k: int = 4, filter: Optional[Dict] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """Return the top-k ``(record, score)`` pairs for the query terms"""
+        term_ids = {self.vocab[token] for token in tokenize(query) if token in self.vocab}
+        if not term_ids:
+            return []
+
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # Doc ids are unique within a posting list, so fancy-index add is safe
+            scores[self.doc_ids[start:end]] += self.impacts[start:end]
+
+        candidates = np.flatnonzero(scores)
+        if filter:
+            candidates = np.array([
+                i for i in candidates if matches_filter(self.docs[i].get("metadata", {}), filter)
+            ], dtype=np.int64)
+        if len(candidates) == 0:
+            return []
+
+        k = min(k, len(candidates))
+        best = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        best = best[np.argsort(-scores[best])]
+        return [(self.docs[i], float(scores[i])) for i in best]
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+
+@lru_cache()
+def get_sparse_index() -> Optional[BM25Index]:
+    """Load the configured index once per process; None when it hasn't been built"""
+    path = get_settings().SPARSE_INDEX_PATH
+    if not path or not (Path(path) / VOCAB_FILE).exists():
+        return None
+    return BM25Index.load(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python -m backend.rag.sparse_index <parsed_content_dir> <output_dir>")
+        sys.exit(1)
+    index = BM25Index.from_chunk_files(sys.argv[1])
+    index.save(sys.argv[2])
+    print(f"Indexed {len(index)} chunks with {len(index.vocab)} terms into {sys.argv[2]}")
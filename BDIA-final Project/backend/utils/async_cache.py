@@ -0,0 +1,131 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set
+from collections import OrderedDict
+import asyncio
+import time
+
+
+class AsyncTTLCache:
+    """TTL + LRU cache for coroutine results with single-flight loading.
+
+    Concurrent ``get_or_compute`` calls for the same key share one in-flight
+    computation instead of each awaiting their own. Entries can carry tags
+    (e.g. ``course:<id>``) so a whole group can be invalidated at once.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = ()):
+        tags = tuple(tags)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        tags: Iterable[str] = ()
+    ) -> Any:
+        """Return the cached value or run ``compute`` once for all concurrent callers"""
+        value = self.get(key)
+        if value is not None:
+            self._stats["hits"] += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The owning caller was cancelled (e.g. hit a deadline); load it ourselves
+                if inflight.cancelled():
+                    return await self.get_or_compute(key, compute, tags)
+                raise
+
+        self._stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure doesn't log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            # Skip caching results that raced with an invalidation
+            if generation == self._generation:
+                self.set(key, value, tags)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, key: Hashable):
+        self._generation += 1
+        if key in self._entries:
+            self._remove(key)
+            self._stats["invalidations"] += 1
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Drop every entry carrying ``tag`` and return how many were removed"""
+        self._generation += 1
+        keys = list(self._tags.get(tag, ()))
+        for key in keys:
+            self._remove(key)
+        self._stats["invalidations"] += len(keys)
+        return len(keys)
+
+    def clear(self):
+        self._generation += 1
+        self._stats["invalidations"] += len(self._entries)
+        self._entries.clear()
+        self._tags.clear()
+
+    def _remove(self, key: Hashable):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0
+        return stats
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,168 @@
+from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+from google.cloud import bigquery
+from backend.app.config import get_settings
+from backend.utils.async_cache import AsyncTTLCache
+from backend.utils.course_catalog import CourseCatalog, course_catalog
+from backend.utils.logging_config import logger
+
+settings = get_settings()
+
+# Named, parameterized queries; {course}, {courses} and {lecture_notes} are filled
+# with fully qualified table names, everything user-supplied goes through @params
+QUERY_TEMPLATES = {
+    "course_description": """
+        SELECT description
+        FROM {course}
+        WHERE title = @course_title
+    """,
+    "course_summary": """
+        SELECT title, description
+        FROM {course}
+        WHERE LOWER(title) = LOWER(@course_title)
+        OR playlist_id = @course_title
+        LIMIT 1
+    """,
+    "course_cards": """
+        SELECT
+            playlist_id,
+            title,
+            description,
+            ANY_VALUE(instructors) AS instructors,
+            ARRAY_AGG(DISTINCT t.topic IGNORE NULLS) AS topics,
+            ARRAY_AGG(DISTINCT subtopic IGNORE NULLS) AS subtopics
+        FROM {courses}
+        LEFT JOIN UNNEST(topics) AS t
+        LEFT JOIN UNNEST(t.subtopics) AS subtopic
+        GROUP BY playlist_id, title, description
+        ORDER BY title
+        LIMIT 1000
+    """,
+    "lecture_titles": """
+        SELECT course_id, title
+        FROM {lecture_notes}
+        WHERE LOWER(course_id) LIKE LOWER(@course_pattern)
+        ORDER BY lecture_id
+    """,
+    "lecture_urls": """
+        SELECT course_id, lecture_id, title, url
+        FROM {lecture_notes}
+        WHERE LOWER(course_id) LIKE LOWER(@course_pattern)
+    """
+}
+
+PARAMETER_TYPES = {bool: "BOOL", int: "INT64", float: "FLOAT64", str: "STRING"}
+
+
+class BigQueryRepository:
+    """Async access to the course tables through one shared BigQuery client.
+
+    Templates the local catalog snapshot can answer never reach BigQuery.
+    Otherwise blocking ``query().result()`` calls run on a bounded thread pool
+    so they never stall the event loop, and rows are cached by
+    ``(template, params)`` with single-flight loading.
+    """
+
+    def __init__(
+        self,
+        project: str,
+        dataset: str,
+        tables: Dict[str, str],
+        max_workers: int = 8,
+        cache_size: int = 500,
+        cache_ttl: float = 600.0,
+        timeout: float = 30.0,
+        catalog: Optional[CourseCatalog] = None
+    ):
+        self.project = project
+        self.dataset = dataset
+        self.tables = tables
+        self.timeout = timeout
+        self.catalog = catalog
+        self.cache = AsyncTTLCache(max_entries=cache_size, ttl_seconds=cache_ttl)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bigquery")
+        self._client: Optional[bigquery.Client] = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> bigquery.Client:
+        # Created on first use so importing this module needs no credentials
+        with self._lock:
+            if self._client is None:
+                self._client = bigquery.Client(project=self.project)
+            return self._client
+
+    def table(self, name: str) -> str:
+        return f"`{self.project}.{self.dataset}.{self.tables.get(name, name)}`"
+
+    def render(self, template: str) -> str:
+        return QUERY_TEMPLATES[template].format(
+            **{name: self.table(name) for name in self.tables}
+        )
+
+    async def fetch(
+        self,
+        template: str,
+        params: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Run a named query and return its rows as dicts"""
+        if template not in QUERY_TEMPLATES:
+            raise ValueError(f"Unknown BigQuery template '{template}'")
+        params = params or {}
+        if self.catalog is not None:
+            rows = self.catalog.resolve(template, params)
+            if rows is not None:
+                return rows
+        key = (template, tuple(sorted(params.items())))
+
+        async def load() -> List[Dict[str, Any]]:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._run, template, params)
+
+        rows = await (self.cache.get_or_compute(key, load) if use_cache else load())
+        # Callers get their own dicts so the cached rows stay intact
+        return [dict(row) for row in rows]
+
+    async def fetch_one(self, template: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        rows = await self.fetch(template, params)
+        return rows[0] if rows else None
+
+    def _run(self, template: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter(name, PARAMETER_TYPES[type(value)], value)
+                for name, value in params.items()
+            ]
+        )
+        logger.info(f"Executing BigQuery template '{template}' with {params}")
+        query_job = self.client.query(self.render(template), job_config=job_config)
+        return [dict(row.items()) for row in query_job.result(timeout=self.timeout)]
+
+    def invalidate(self):
+        """Forget cached rows, e.g. after the pipeline reloads the tables"""
+        self.cache.clear()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+bigquery_repository = BigQueryRepository(
+    project=settings.BIGQUERY_PROJECT_ID or "finalproject-442400",
+    dataset=settings.BIGQUERY_DATASET or "coursesdata",
+    tables={
+        "course": settings.BIGQUERY_TABLE or "Course",
+        "courses": settings.BIGQUERY_COURSES_TABLE,
+        "lecture_notes": settings.BIGQUERY_LECTURE_NOTES_TABLE
+    },
+    max_workers=settings.BIGQUERY_MAX_WORKERS,
+    cache_size=settings.BIGQUERY_CACHE_SIZE,
+    cache_ttl=settings.BIGQUERY_CACHE_TTL,
+    timeout=settings.BIGQUERY_QUERY_TIMEOUT,
+    catalog=course_catalog
+)
@@ -0,0 +1,275 @@
+from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from pathlib import Path
+import os
+import re
+import shutil
+import threading
+import time
+from backend.app.config import get_settings
+from backend.utils.logging_config import logger
+
+settings = get_settings()
+
+CURRENT_FILE = "CURRENT"
+MAX_MEMOIZED_PATTERNS = 1024
+TABLE_FILES = {
+    "courses": "courses.parquet",
+    "lecture_notes": "lecture_notes.parquet",
+    "transcripts": "transcripts.parquet"
+}
+
+
+@lru_cache(maxsize=256)
+def like_to_regex(pattern: str) -> "re.Pattern":
+    """Case-insensitive regex equivalent of ``LOWER(x) LIKE LOWER(pattern)``"""
+    parts = []
+    for char in pattern:
+        if char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.IGNORECASE | re.DOTALL)
+
+
+class CatalogSnapshot:
+    """One immutable version of the course tables, indexed for point lookups"""
+
+    def __init__(self, version: str, tables: Dict[str, List[Dict[str, Any]]]):
+        self.version = version
+        self.courses = tables["courses"]
+        self.lecture_notes = sorted(tables["lecture_notes"], key=lambda row: row.get("lecture_id") or "")
+        self.transcripts = tables["transcripts"]
+
+        self.course_by_id = {row["course_id"]: row for row in self.courses if row.get("course_id")}
+        self.course_by_title = {row["title"].lower(): row for row in self.courses if row.get("title")}
+        self.course_by_playlist = {row["playlist_id"]: row for row in self.courses if row.get("playlist_id")}
+        self.lecture_by_id = {row["lecture_id"]: row for row in self.lecture_notes if row.get("lecture_id")}
+        self.lectures_by_course: Dict[str, List[Dict[str, Any]]] = {}
+        for row in self.lecture_notes:
+            self.lectures_by_course.setdefault(row.get("course_id"), []).append(row)
+        self.transcripts_by_course: Dict[str, List[Dict[str, Any]]] = {}
+        for row in self.transcripts:
+            self.transcripts_by_course.setdefault(row.get("course_id"), []).append(row)
+        # Pattern lookups are memoized; the snapshot never changes once built
+        self._like_matches: Dict[str, List[Dict[str, Any]]] = {}
+        self._course_cards: Optional[List[Dict[str, Any]]] = None
+
+    def course(self, key: str) -> Optional[Dict[str, Any]]:
+        """Find a course by exact title (case-insensitive), course_id or playlist_id"""
+        if not key:
+            return None
+        return (
+            self.course_by_title.get(key.lower())
+            or self.course_by_id.get(key)
+            or self.course_by_playlist.get(key)
+        )
+
+    def course_cards(self) -> List[Dict[str, Any]]:
+        """Courses with their distinct topics and subtopics flattened, by title"""
+        if self._course_cards is None:
+            cards = []
+            for row in sorted(self.courses, key=lambda row: row.get("title") or ""):
+                topics = row.get("topics") or []
+                cards.append({
+                    "playlist_id": row.get("playlist_id"),
+                    "title": row.get("title"),
+                    "description": row.get("description"),
+                    "instructors": row.get("instructors") or [],
+                    "topics": list(dict.fromkeys(t["topic"] for t in topics if t.get("topic"))),
+                    "subtopics": list(dict.fromkeys(
+                        subtopic for t in topics for subtopic in (t.get("subtopics") or []) if subtopic
+                    ))
+                })
+            self._course_cards = cards
+        return self._course_cards
+
+    def lectures_like(self, course_pattern: str) -> List[Dict[str, Any]]:
+        """Lecture notes whose course_id matches a SQL LIKE pattern, in lecture_id order"""
+        matches = self._like_matches.get(course_pattern)
+        if matches is None:
+            if len(self._like_matches) >= MAX_MEMOIZED_PATTERNS:
+                self._like_matches.clear()
+            regex = like_to_regex(course_pattern)
+            course_ids = {course_id for course_id in self.lectures_by_course if course_id and regex.fullmatch(course_id)}
+            matches = self._like_matches[course_pattern] = [
+                row for row in self.lecture_notes if row.get("course_id") in course_ids
+            ]
+        return matches
+
+
+class CourseCatalog:
+    """Serves course metadata from the pipeline's Parquet snapshot instead of BigQuery.
+
+    The DAG writes each export to ``<path>/<version>/`` and then flips
+    ``<path>/CURRENT``; this class memory-maps the current version and picks
+    up a new one within ``reload_interval`` seconds. Lookups mirror the
+    ``BigQueryRepository`` templates so the repository can answer from here.
+
+    When ``bucket`` is set, a background thread mirrors the DAG's GCS copy
+    (``<prefix>/CURRENT`` and ``<prefix>/<version>/``) into ``path`` every
+    ``sync_interval`` seconds, so the backend needs no shared volume.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        reload_interval: float = 30.0,
+        bucket: Optional[str] = None,
+        prefix: str = "catalog",
+        sync_interval: float = 300.0,
+        keep_versions: int = 3
+    ):
+        self.path = Path(path) if path else None
+        self.reload_interval = reload_interval
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.sync_interval = sync_interval
+        self.keep_versions = keep_versions
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._sync_thread: Optional[threading.Thread] = None
+        self._stop_sync = threading.Event()
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        if time.monotonic() - self._checked_at >= self.reload_interval:
+            self.refresh()
+        return self._snapshot
+
+    def refresh(self) -> bool:
+        """Load the current snapshot version if it changed; returns True on reload"""
+        if self.path is None:
+            return False
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                version = (self.path / CURRENT_FILE).read_text().strip()
+            except FileNotFoundError:
+                return False
+            if not version or (self._snapshot is not None and self._snapshot.version == version):
+                return False
+            try:
+                snapshot = CatalogSnapshot(version, self._read_tables(self.path / version))
+            except Exception as e:
+                # Keep serving the previous version rather than none
+                logger.error(f"Failed to load catalog snapshot {version}: {str(e)}")
+                return False
+            self._snapshot = snapshot
+        logger.info(
+            f"Loaded catalog snapshot {version}: {len(snapshot.courses)} courses, "
+            f"{len(snapshot.lecture_notes)} lecture notes, {len(snapshot.transcripts)} transcripts"
+        )
+        return True
+
+    def sync(self) -> bool:
+        """Download the bucket's current version if it is new; returns True on download"""
+        if self.path is None or not self.bucket:
+            return False
+        from google.cloud import storage
+
+        bucket = storage.Client().bucket(self.bucket)
+        version = bucket.blob(f"{self.prefix}/{CURRENT_FILE}").download_as_text().strip()
+        current = self.path / CURRENT_FILE
+        if not version or (current.exists() and current.read_text().strip() == version):
+            return False
+
+        version_dir = self.path / version
+        version_dir.mkdir(parents=True, exist_ok=True)
+        for filename in TABLE_FILES.values():
+            bucket.blob(f"{self.prefix}/{version}/{filename}").download_to_filename(str(version_dir / filename))
+
+        # Same flip as the DAG: readers only ever see complete versions
+        current_tmp = self.path / f"{CURRENT_FILE}.tmp"
+        current_tmp.write_text(version)
+        os.replace(current_tmp, current)
+        logger.info(f"Synced catalog snapshot {version} from gs://{self.bucket}/{self.prefix}")
+
+        versions = sorted(p for p in self.path.iterdir() if p.is_dir())
+        for old_dir in versions[:-self.keep_versions]:
+            shutil.rmtree(old_dir, ignore_errors=True)
+        return True
+
+    def start_sync(self):
+        """Keep the local snapshot in step with the bucket from a daemon thread"""
+        if not self.bucket or self.path is None or self._sync_thread is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    if self.sync():
+                        self.refresh()
+                except Exception as e:
+                    logger.warning(f"Failed to sync catalog snapshot from GCS: {str(e)}")
+                if self._stop_sync.wait(self.sync_interval):
+                    return
+
+        self._sync_thread = threading.Thread(target=run, name="catalog-sync", daemon=True)
+        self._sync_thread.start()
+
+    def stop_sync(self):
+        self._stop_sync.set()
+
+    @staticmethod
+    def _read_tables(directory: Path) -> Dict[str, List[Dict[str, Any]]]:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("The course catalog snapshot requires the pyarrow package")
+        return {
+            name: pq.read_table(directory / filename, memory_map=True).to_pylist()
+            for name, filename in TABLE_FILES.items()
+        }
+
+    def resolve(self, template: str, params: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Rows for a ``BigQueryRepository`` template, or None to fall through to BigQuery"""
+        snapshot = self.snapshot
+        if snapshot is None:
+            return None
+        if template in ("course_description", "course_summary"):
+            title = params["course_title"]
+            if template == "course_description":
+                # Exact, case-sensitive title match like the SQL template
+                course = snapshot.course_by_title.get(title.lower())
+                course = course if course and course["title"] == title else None
+            else:
+                course = snapshot.course_by_title.get(title.lower()) or snapshot.course_by_playlist.get(title)
+            if course is None:
+                return []
+            columns = ("description",) if template == "course_description" else ("title", "description")
+            return [{column: course.get(column) for column in columns}]
+        if template == "course_cards":
+            # Shallow copies so callers can't edit the shared snapshot
+            return [dict(row) for row in snapshot.course_cards()]
+        if template in ("lecture_titles", "lecture_urls"):
+            columns = (
+                ("course_id", "title") if template == "lecture_titles"
+                else ("course_id", "lecture_id", "title", "url")
+            )
+            return [
+                {column: row.get(column) for column in columns}
+                for row in snapshot.lectures_like(params["course_pattern"])
+            ]
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "courses": len(snapshot.courses) if snapshot else 0,
+            "lecture_notes": len(snapshot.lecture_notes) if snapshot else 0,
+            "transcripts": len(snapshot.transcripts) if snapshot else 0
+        }
+
+
+course_catalog = CourseCatalog(
+    settings.CATALOG_SNAPSHOT_PATH,
+    reload_interval=settings.CATALOG_RELOAD_INTERVAL,
+    bucket=settings.CATALOG_GCS_BUCKET,
+    prefix=settings.CATALOG_GCS_PREFIX,
+    sync_interval=settings.CATALOG_SYNC_INTERVAL
+)
@@ -143,12 +143,13 @@ class StateManager:
         self.errors.append(error)
         return await self.error_handler.handle_error(error, self)
     
-    def update_context_metrics(self, total_tokens: int, used_tokens: int):
+    def update_context_metrics(self, total_tokens: int, used_tokens: int, **extra: Any):
         """Update context metrics"""
         self.context_metrics.update({
             "total_tokens": total_tokens,
             "used_tokens": used_tokens,
-            "remaining_tokens": total_tokens - used_tokens
+            "remaining_tokens": total_tokens - used_tokens,
+            **extra
         })
     
     def get_context_metrics(self) -> Dict[str, Any]:
@@ -1,27 +1,29 @@
-from langchain_community.chat_models import ChatOpenAI
+from langchain_openai import ChatOpenAI
 from backend.app.config import get_settings
-import tiktoken
+from backend.utils.llm.tokenizer import get_token_counter
+from backend.utils.llm.client_registry import client_registry
 from typing import Optional
 from langchain.callbacks.manager import CallbackManager
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 import asyncio
 
 class LLMManager:
     def __init__(self, model_name: str = "gpt-4-turbo-preview"):
         self.settings = get_settings()
         self.model_name = model_name
-        self.tokenizer = tiktoken.encoding_for_model(model_name)
+        self.token_counter = get_token_counter(model_name)
         self.llm = None
         self._cleanup_task = None
         self._is_initialized = False
         
     async def initialize(self):
-        self.llm = ChatOpenAI()
+        self.llm = client_registry.get_chat_model(model=self.model_name)
         self._cleanup_task = asyncio.create_task(self._periodic_cleanup())
         
     async def cleanup(self):
+        # Only this manager's task; the shared registry is closed by the app shutdown hook
         if self._cleanup_task:
             self._cleanup_task.cancel()
+            self._cleanup_task = None
         
     def get_llm(
         self, 
@@ -42,22 +44,18 @@ class LLMManager:
         Returns:
             ChatOpenAI: Configured LLM instance
         """
-        # Set up default callbacks for streaming if needed
-        if streaming and not callbacks:
-            callbacks = CallbackManager([StreamingStdOutCallbackHandler()])
-            
-        return ChatOpenAI(
-            model_name=self.model_name,
+        # Shared per configuration; streaming gets stdout callbacks by default
+        return client_registry.get_chat_model(
+            model=self.model_name,
             temperature=temperature,
-            max_tokens=max_tokens,
             streaming=streaming,
-            callback_manager=callbacks,
-            api_key=self.settings.OPENAI_API_KEY
+            max_tokens=max_tokens,
+            callbacks=callbacks
         )
     
     def count_tokens(self, text: str) -> int:
         """Count tokens in a text string"""
-        return len(self.tokenizer.encode(text))
+        return self.token_counter.count(text)
 
 # Singleton instance
 llm_manager = LLMManager()
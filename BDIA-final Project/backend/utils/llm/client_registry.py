@@ -0,0 +1,144 @@
+from typing import Dict, Optional, Tuple
+import importlib.util
+import threading
+import httpx
+from openai import AsyncOpenAI
+from langchain_openai import ChatOpenAI
+from langchain_core.callbacks import CallbackManager, StreamingStdOutCallbackHandler
+from backend.app.config import get_settings
+from backend.utils.llm.scheduler import ScheduledTransport, outbound_scheduler
+from backend.utils.logging_config import logger
+
+ClientKey = Tuple[str, float, bool, Optional[int]]
+
+
+class LLMClientRegistry:
+    """Hands out shared OpenAI clients that all ride one pooled HTTP connection pool.
+
+    Chat models are cached by ``(model, temperature, streaming, max_tokens)``, so
+    agents and endpoints reuse keep-alive (and HTTP/2) connections instead of
+    paying a TLS handshake per request.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._lock = threading.Lock()
+        self._async_http: Optional[httpx.AsyncClient] = None
+        self._sync_http: Optional[httpx.Client] = None
+        self._openai: Optional[AsyncOpenAI] = None
+        self._chat_models: Dict[ClientKey, ChatOpenAI] = {}
+        self._http2 = self.settings.LLM_HTTP2 and importlib.util.find_spec("h2") is not None
+        if self.settings.LLM_HTTP2 and not self._http2:
+            logger.warning("LLM_HTTP2 is enabled but the h2 package is missing; using HTTP/1.1")
+
+    def _http_options(self) -> Dict:
+        return {
+            "http2": self._http2,
+            "limits": httpx.Limits(
+                max_connections=self.settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=self.settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=self.settings.LLM_KEEPALIVE_EXPIRY
+            ),
+            "timeout": httpx.Timeout(self.settings.LLM_TIMEOUT, connect=10.0)
+        }
+
+    def async_http_client(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._async_http is None or self._async_http.is_closed:
+                options = self._http_options()
+                transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+                    http2=options.pop("http2"),
+                    limits=options.pop("limits")
+                )
+                if self.settings.LLM_SCHEDULER_ENABLED:
+                    transport = ScheduledTransport(transport, outbound_scheduler)
+                self._async_http = httpx.AsyncClient(transport=transport, **options)
+            return self._async_http
+
+    def sync_http_client(self) -> httpx.Client:
+        with self._lock:
+            if self._sync_http is None or self._sync_http.is_closed:
+                self._sync_http = httpx.Client(**self._http_options())
+            return self._sync_http
+
+    def openai_client(self) -> AsyncOpenAI:
+        """Shared raw AsyncOpenAI client for completions, streaming and embeddings"""
+        http_client = self.async_http_client()
+        with self._lock:
+            if self._openai is None:
+                self._openai = AsyncOpenAI(
+                    api_key=self.settings.OPENAI_API_KEY,
+                    http_client=http_client
+                )
+            return self._openai
+
+    def get_chat_model(
+        self,
+        model: Optional[str] = None,
+        temperature: float = 0.0,
+        streaming: bool = False,
+        max_tokens: Optional[int] = None,
+        callbacks: Optional[CallbackManager] = None
+    ) -> ChatOpenAI:
+        """Return the shared chat model for this configuration.
+
+        Custom callbacks are per-caller state, so those get a dedicated model
+        that still shares the connection pool.
+        """
+        model = model or self.settings.DEFAULT_MODEL
+        if callbacks is not None:
+            return self._build(model, temperature, streaming, max_tokens, callbacks)
+
+        key = (model, float(temperature), streaming, max_tokens)
+        chat_model = self._chat_models.get(key)
+        if chat_model is None:
+            default_callbacks = (
+                CallbackManager([StreamingStdOutCallbackHandler()]) if streaming else None
+            )
+            chat_model = self._chat_models.setdefault(
+                key, self._build(model, temperature, streaming, max_tokens, default_callbacks)
+            )
+        return chat_model
+
+    def _build(
+        self,
+        model: str,
+        temperature: float,
+        streaming: bool,
+        max_tokens: Optional[int],
+        callbacks: Optional[CallbackManager]
+    ) -> ChatOpenAI:
+        return ChatOpenAI(
+            model_name=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            streaming=streaming,
+            callbacks=callbacks,
+            api_key=self.settings.OPENAI_API_KEY,
+            http_client=self.sync_http_client(),
+            http_async_client=self.async_http_client()
+        )
+
+    def evict(self, model: Optional[str] = None):
+        """Forget cached chat models, for one model name or all of them"""
+        for key in [key for key in self._chat_models if model is None or key[0] == model]:
+            del self._chat_models[key]
+
+    async def aclose(self):
+        self.evict()
+        self._openai = None
+        if self._async_http is not None:
+            await self._async_http.aclose()
+        if self._sync_http is not None:
+            self._sync_http.close()
+
+
+client_registry = LLMClientRegistry()
+
+
+def get_chat_model(**kwargs) -> ChatOpenAI:
+    return client_registry.get_chat_model(**kwargs)
+
+
+def get_openai_client() -> AsyncOpenAI:
+    return client_registry.openai_client()
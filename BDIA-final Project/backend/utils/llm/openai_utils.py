@@ -1,10 +1,10 @@
 from typing import Dict, List, Any, Optional, AsyncGenerator
 import openai
-from openai import AsyncOpenAI
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
 from pydantic import BaseModel
-from app.config import get_settings
-from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory
+from backend.app.config import get_settings
+from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory, StateManager
+from backend.utils.llm.client_registry import get_openai_client
 
 settings = get_settings()
 
@@ -22,12 +22,16 @@ class OpenAIManager:
     """Manager class for OpenAI API operations"""
     
     def __init__(self, config: Optional[OpenAIConfig] = None):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = get_openai_client()
         self.config = config or OpenAIConfig()
+        self.state_manager = StateManager()
         
+    # 429s are paced by the outbound scheduler and the client's own
+    # retry-after handling; sleeping again here would only add latency
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_not_exception_type(openai.RateLimitError)
     )
     async def generate_completion(
         self,
@@ -93,10 +97,9 @@ class OpenAIManager:
     async def count_tokens(self, text: str) -> int:
         """Estimate token count for a given text"""
         try:
-            # Using tiktoken for accurate token counting
-            import tiktoken
-            encoding = tiktoken.encoding_for_model(self.config.model)
-            return len(encoding.encode(text))
+            # Shared encoding and memoized counts, see utils/llm/tokenizer.py
+            from backend.utils.llm.tokenizer import get_token_counter
+            return get_token_counter(self.config.model).count(text)
         except ImportError:
             # Fallback to approximate counting if tiktoken is not available
             return len(text.split()) * 1.3
@@ -140,8 +143,7 @@ class OpenAIStreamManager(OpenAIManager):
 async def validate_api_key() -> bool:
     """Validate OpenAI API key"""
     try:
-        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        await client.models.list()
+        await get_openai_client().models.list()
         return True
     except Exception:
         return False
@@ -149,8 +151,7 @@ async def validate_api_key() -> bool:
 async def get_available_models() -> List[str]:
     """Get list of available OpenAI models"""
     try:
-        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        models = await client.models.list()
+        models = await get_openai_client().models.list()
         return [model.id for model in models.data]
     except Exception as e:
         raise Exception(f"Failed to fetch models: {str(e)}")
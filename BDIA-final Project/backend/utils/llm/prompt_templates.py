@@ -9,15 +9,15 @@ QUERY_ANALYSIS_PROMPT = ChatPromptTemplate.from_messages([
     5. Whether it requires citations
     6. Estimated response length (short/medium/long)
     
-    Respond in JSON format:
-    {
-        "query_type": string,
-        "complexity": string,
+    Respond with a single JSON object and nothing else:
+    {{
+        "query_type": "factual" | "conceptual" | "procedural" | "analytical",
+        "complexity": "basic" | "intermediate" | "advanced",
         "topics": string[],
         "requires_context": boolean,
         "requires_citations": boolean,
-        "estimated_length": string
-    }"""),
+        "estimated_length": "short" | "medium" | "long"
+    }}"""),
     ("human", "{query}")
 ])
 
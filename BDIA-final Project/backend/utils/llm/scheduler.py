@@ -0,0 +1,330 @@
+from typing import Dict, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+import asyncio
+import heapq
+import itertools
+import json
+import re
+import time
+import httpx
+from backend.app.config import get_settings
+from backend.utils.logging_config import logger
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+SCHEDULED_PATHS = ("/chat/completions", "/completions", "/embeddings")
+
+
+class Priority(IntEnum):
+    """Lower values are dispatched first"""
+    INTERACTIVE = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.NORMAL)
+
+
+@contextmanager
+def llm_priority(priority: Priority):
+    """Run the enclosed OpenAI calls, including those in spawned tasks, at ``priority``"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse OpenAI reset durations such as ``"20ms"``, ``"1s"`` or ``"6m0s"``"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """Per-minute budget refilled continuously; unlimited until a limit is known"""
+
+    def __init__(self, per_minute: Optional[float] = None):
+        self.capacity = per_minute
+        self.level = per_minute or 0.0
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.capacity:
+            self.level = min(self.capacity, self.level + (now - self.updated_at) * self.capacity / 60.0)
+        self.updated_at = now
+
+    def clamp(self, amount: float) -> float:
+        """A request larger than the whole bucket waits for a full bucket instead of forever"""
+        return min(amount, self.capacity) if self.capacity else amount
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if not self.capacity:
+            return 0.0
+        self._refill(now)
+        deficit = self.clamp(amount) - self.level
+        return max(0.0, deficit * 60.0 / self.capacity)
+
+    def take(self, amount: float, now: float):
+        if self.capacity:
+            self._refill(now)
+            self.level -= self.clamp(amount)
+
+    def observe(self, limit: Optional[float], remaining: Optional[float], now: float):
+        """Resynchronise with the server's view from the rate-limit headers"""
+        if limit:
+            self.capacity = limit
+        if remaining is not None and self.capacity:
+            self._refill(now)
+            self.level = min(self.level, remaining)
+
+
+class ModelBudget:
+    """Admission control for one model: RPM/TPM buckets plus an AIMD concurrency window"""
+
+    def __init__(
+        self,
+        model: str,
+        initial_concurrency: float,
+        min_concurrency: float,
+        max_concurrency: float,
+        backoff: float,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None
+    ):
+        self.model = model
+        self.concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.backoff = backoff
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stats = {"dispatched": 0, "rate_limited": 0, "queued_seconds": 0.0}
+
+    async def acquire(self, tokens: float, priority: Priority):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), tokens, future))
+        queued_at = time.monotonic()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as the caller gave up; hand the slot back
+                self.release()
+            raise
+        self._stats["queued_seconds"] += time.monotonic() - queued_at
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        now = time.monotonic()
+        delay = 0.0
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight >= max(1, int(self.concurrency)):
+                # A release will dispatch again
+                return
+            # Strict priority order: the head waits rather than being overtaken
+            delay = max(
+                self.paused_until - now,
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(tokens, now)
+            )
+            if delay > 0:
+                break
+            heapq.heappop(self._waiters)
+            self.requests.take(1, now)
+            self.tokens.take(tokens, now)
+            self.in_flight += 1
+            self._stats["dispatched"] += 1
+            future.set_result(None)
+
+        if self._waiters and delay > 0 and self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def observe(self, status_code: int, headers: httpx.Headers):
+        now = time.monotonic()
+        self.requests.observe(
+            _header_float(headers, "x-ratelimit-limit-requests"),
+            _header_float(headers, "x-ratelimit-remaining-requests"),
+            now
+        )
+        self.tokens.observe(
+            _header_float(headers, "x-ratelimit-limit-tokens"),
+            _header_float(headers, "x-ratelimit-remaining-tokens"),
+            now
+        )
+        if status_code == 429:
+            # Multiplicative decrease, and hold everyone until the window resets
+            self._stats["rate_limited"] += 1
+            if now >= self.paused_until:
+                # Requests already in flight when the window closed don't back off again
+                self.concurrency = max(self.min_concurrency, self.concurrency * self.backoff)
+            retry_after = (
+                parse_duration(headers.get("retry-after"))
+                or max(
+                    parse_duration(headers.get("x-ratelimit-reset-requests")) or 0.0,
+                    parse_duration(headers.get("x-ratelimit-reset-tokens")) or 0.0
+                )
+                or 1.0
+            )
+            self.paused_until = max(self.paused_until, now + retry_after)
+            logger.warning(
+                f"OpenAI rate limit for {self.model}; concurrency now "
+                f"{self.concurrency:.1f}, pausing {retry_after:.2f}s"
+            )
+        elif status_code < 400:
+            # Additive increase: about one extra slot per window of successes
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "concurrency": round(self.concurrency, 2),
+            "in_flight": self.in_flight,
+            "queued": sum(1 for *_, future in self._waiters if not future.done()),
+            "requests_per_minute": self.requests.capacity,
+            "tokens_per_minute": self.tokens.capacity
+        }
+
+
+def _header_float(headers: httpx.Headers, name: str) -> Optional[float]:
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class OutboundScheduler:
+    """Process-wide admission control for OpenAI requests, one budget per model"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._budgets: Dict[str, ModelBudget] = {}
+
+    def budget(self, model: str) -> ModelBudget:
+        budget = self._budgets.get(model)
+        if budget is None:
+            budget = self._budgets[model] = ModelBudget(
+                model,
+                initial_concurrency=self.settings.LLM_INITIAL_CONCURRENCY,
+                min_concurrency=self.settings.LLM_MIN_CONCURRENCY,
+                max_concurrency=self.settings.LLM_MAX_CONCURRENCY,
+                backoff=self.settings.LLM_CONCURRENCY_BACKOFF
+            )
+        return budget
+
+    def estimate(self, request: httpx.Request) -> Tuple[Optional[str], float]:
+        """Model and token cost of a request, or ``(None, 0)`` if it is not scheduled"""
+        if request.method != "POST" or not request.url.path.endswith(SCHEDULED_PATHS):
+            return None, 0.0
+        try:
+            body = json.loads(request.content)
+        except (ValueError, httpx.RequestNotRead):
+            return None, 0.0
+        model = body.get("model")
+        if not model:
+            return None, 0.0
+
+        from backend.utils.llm.tokenizer import get_token_counter
+        counter = get_token_counter(model)
+        if "messages" in body:
+            texts = [
+                message["content"] for message in body["messages"]
+                if isinstance(message.get("content"), str)
+            ]
+            completion = body.get("max_tokens") or self.settings.LLM_DEFAULT_COMPLETION_TOKENS
+        else:
+            texts = body.get("input") or body.get("prompt") or []
+            texts = [texts] if isinstance(texts, str) else [t for t in texts if isinstance(t, str)]
+            completion = body.get("max_tokens") or 0
+        return model, float(sum(counter.count_many(texts)) + completion)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {model: budget.stats() for model, budget in self._budgets.items()}
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Keeps the concurrency slot until the response body is fully consumed or closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, budget: ModelBudget):
+        self.stream = stream
+        self.budget = budget
+        self.released = False
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self.stream.aclose()
+        finally:
+            if not self.released:
+                self.released = True
+                self.budget.release()
+
+
+class ScheduledTransport(httpx.AsyncBaseTransport):
+    """httpx transport that queues OpenAI requests through the ``OutboundScheduler``"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, scheduler: "OutboundScheduler"):
+        self.transport = transport
+        self.scheduler = scheduler
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        model, tokens = self.scheduler.estimate(request)
+        if model is None:
+            return await self.transport.handle_async_request(request)
+
+        budget = self.scheduler.budget(model)
+        await budget.acquire(tokens, current_priority())
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException:
+            budget.release()
+            raise
+        budget.observe(response.status_code, response.headers)
+        if response.is_closed:
+            # Body already buffered by the transport
+            budget.release()
+        else:
+            response.stream = _ReleasingStream(response.stream, budget)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+outbound_scheduler = OutboundScheduler()
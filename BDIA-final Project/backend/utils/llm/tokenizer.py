@@ -0,0 +1,108 @@
+from typing import Dict, Iterable, List
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
+import threading
+import tiktoken
+from backend.app.config import get_settings
+
+
+class TokenCounter:
+    """Process-wide token counting for one tiktoken encoding.
+
+    Counts are memoized in a bounded LRU keyed by a hash of the text, so the
+    same transcript chunk is only tokenized once no matter how many callers
+    (context packing, query routing, embedding batching) ask about it.
+    """
+
+    def __init__(self, encoding: tiktoken.Encoding, max_entries: int = 50000, num_threads: int = 4):
+        self.encoding = encoding
+        self.max_entries = max_entries
+        self.num_threads = num_threads
+        self._memo: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def count(self, text: str) -> int:
+        return self.count_many([text])[0]
+
+    def count_many(self, texts: Iterable[str]) -> List[int]:
+        """Count tokens for many texts, encoding only the misses via ``encode_batch``"""
+        texts = list(texts)
+        keys = [self._key(text) for text in texts]
+        counts: Dict[bytes, int] = {}
+        missing: Dict[bytes, str] = {}
+
+        with self._lock:
+            for text, key in zip(texts, keys):
+                count = self._memo.get(key)
+                if count is not None:
+                    self._memo.move_to_end(key)
+                    self._stats["hits"] += 1
+                    counts[key] = count
+                elif key not in missing:
+                    missing[key] = text
+
+        if missing:
+            # encode_batch releases the GIL and fans out across threads
+            encoded = self.encoding.encode_batch(list(missing.values()), num_threads=self.num_threads)
+            with self._lock:
+                for key, tokens in zip(missing, encoded):
+                    counts[key] = len(tokens)
+                    self._remember(key, len(tokens))
+                self._stats["misses"] += len(missing)
+
+        return [counts[key] for key in keys]
+
+    def _remember(self, key: bytes, count: int):
+        self._memo[key] = count
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
+
+    def encode(self, text: str) -> List[int]:
+        return self.encoding.encode(text)
+
+    def encode_batch(self, texts: List[str]) -> List[List[int]]:
+        return self.encoding.encode_batch(texts, num_threads=self.num_threads)
+
+    def decode(self, tokens: List[int]) -> str:
+        return self.encoding.decode(tokens)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._memo)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+@lru_cache()
+def get_encoding(model: str) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Unknown or newer model names fall back to the GPT-4 family encoding
+        return tiktoken.get_encoding("cl100k_base")
+
+
+_counters: Dict[str, TokenCounter] = {}
+
+
+def get_token_counter(model: str = "gpt-4") -> TokenCounter:
+    """Return the shared counter; models using the same encoding share one memo"""
+    encoding = get_encoding(model)
+    counter = _counters.get(encoding.name)
+    if counter is None:
+        settings = get_settings()
+        counter = _counters.setdefault(encoding.name, TokenCounter(
+            encoding,
+            max_entries=settings.TOKEN_COUNT_CACHE_SIZE,
+            num_threads=settings.TOKENIZER_THREADS
+        ))
+    return counter
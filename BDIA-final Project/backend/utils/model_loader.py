@@ -1,13 +1,13 @@
-from typing import Dict, Any, Optional
+from typing import Any, Optional
 from backend.utils.logging_config import logger
-from langchain_openai import ChatOpenAI
 from backend.config import get_settings
+from backend.utils.llm.client_registry import client_registry
 import asyncio
 from functools import lru_cache
 
 class ModelLoader:
+    """Thin front for the shared LLM client registry, kept for startup warmup"""
     _instance = None
-    _models: Dict[str, Any] = {}
     _lock = asyncio.Lock()
     
     def __new__(cls):
@@ -17,26 +17,20 @@ class ModelLoader:
     
     @classmethod
     async def load_model(cls, model_name: str, **kwargs) -> Any:
-        """Load and cache an ML model"""
+        """Get the shared client for a model from the registry"""
         async with cls._lock:
-            if model_name in cls._models:
-                logger.info(f"Using cached model: {model_name}")
-                return cls._models[model_name]
-            
             logger.info(f"Loading model: {model_name}")
             try:
                 settings = get_settings()
                 
                 if model_name.startswith("gpt"):
-                    model = ChatOpenAI(
-                        model_name=model_name,
-                        temperature=kwargs.get("temperature", settings.model_temperature),
-                        api_key=settings.openai_api_key
+                    model = client_registry.get_chat_model(
+                        model=model_name,
+                        temperature=kwargs.get("temperature", settings.model_temperature)
                     )
                 else:
                     raise ValueError(f"Unsupported model: {model_name}")
                 
-                cls._models[model_name] = model
                 logger.info(f"Model {model_name} loaded successfully")
                 return model
                 
@@ -53,16 +47,15 @@ class ModelLoader:
     async def unload_model(cls, model_name: str):
         """Unload a model from memory"""
         async with cls._lock:
-            if model_name in cls._models:
-                logger.info(f"Unloading model: {model_name}")
-                del cls._models[model_name]
+            logger.info(f"Unloading model: {model_name}")
+            client_registry.evict(model_name)
     
     @classmethod
     async def unload_all(cls):
         """Unload all models from memory"""
         async with cls._lock:
             logger.info("Unloading all models")
-            cls._models.clear()
+            client_registry.evict()
 
 # Create a singleton instance
 model_loader = ModelLoader()
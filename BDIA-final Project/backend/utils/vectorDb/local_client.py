@@ -0,0 +1,482 @@
+from typing import Dict, List, Any, Optional, Tuple
+from pathlib import Path
+import asyncio
+import json
+import threading
+import numpy as np
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun, AsyncCallbackManagerForRetrieverRun
+from langchain.schema import Document
+from langchain_community.embeddings import OpenAIEmbeddings
+from backend.app.config import get_settings
+from contextlib import asynccontextmanager
+from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory, StateManager
+from backend.rag.retrieval_cache import invalidate_for_metadata
+
+settings = get_settings()
+
+VECTORS_FILE = "vectors.npy"
+RECORDS_FILE = "records.jsonl"
+CENTROIDS_FILE = "centroids.npy"
+ASSIGNMENTS_FILE = "assignments.npy"
+MANIFEST_FILE = "manifest.json"
+
+
+class VectorMatch:
+    """Query match with the same attributes as a Pinecone ``ScoredVector``"""
+    __slots__ = ("id", "score", "metadata", "values")
+
+    def __init__(self, id: str, score: float, metadata: Dict[str, Any], values: Optional[List[float]] = None):
+        self.id = id
+        self.score = score
+        self.metadata = metadata
+        self.values = values or []
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict]) -> bool:
+    """Evaluate a Pinecone-style metadata filter against a single record"""
+    if not filter:
+        return True
+
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        else:
+            if not _matches_condition(metadata.get(key), condition, key in metadata):
+                return False
+    return True
+
+
+def _matches_condition(value: Any, condition: Any, present: bool) -> bool:
+    # A bare value is shorthand for {"$eq": value}
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+
+    # List-valued metadata matches when any element satisfies the operator
+    values = value if isinstance(value, list) else [value]
+
+    for op, operand in condition.items():
+        if op == "$exists":
+            ok = present == bool(operand)
+        elif op == "$eq":
+            ok = present and operand in values
+        elif op == "$ne":
+            ok = operand not in values
+        elif op == "$in":
+            ok = present and any(v in operand for v in values)
+        elif op == "$nin":
+            ok = not any(v in operand for v in values)
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            ok = present and any(_compare(v, op, operand) for v in values)
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if not ok:
+            return False
+    return True
+
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    try:
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+        if op == "$lt":
+            return value < operand
+        return value <= operand
+    except TypeError:
+        return False
+
+
+class IVFFlatIndex:
+    """Inverted-file index over L2-normalized vectors.
+
+    Vectors are clustered with spherical k-means; a query only scans the
+    members of its ``nprobe`` closest centroids instead of the full matrix.
+    """
+
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray):
+        self.centroids = centroids
+        self.assignments = assignments
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(centroids))]
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: Optional[int] = None, iterations: int = 10, seed: int = 0) -> "IVFFlatIndex":
+        n = len(vectors)
+        nlist = nlist or max(1, int(np.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(seed)
+        centroids = np.array(vectors[rng.choice(n, size=nlist, replace=False)], dtype=np.float32)
+
+        assignments = np.zeros(n, dtype=np.int32)
+        for _ in range(iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+            for c in range(nlist):
+                members = vectors[assignments == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    if norm > 0:
+                        centroids[c] = centroid / norm
+        return cls(centroids, assignments)
+
+    def assign(self, vectors: np.ndarray, rows: np.ndarray) -> "IVFFlatIndex":
+        """Index with ``rows`` of ``vectors`` (new or replaced) moved to their nearest centroid"""
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        assignments[:len(self.assignments)] = self.assignments
+        assignments[rows] = np.argmax(vectors[rows] @ self.centroids.T, axis=1)
+        return IVFFlatIndex(self.centroids, assignments)
+
+    def is_skewed(self, skew: float) -> bool:
+        """True once lists have outgrown the trained layout and k-means should be rerun"""
+        sizes = np.array([len(members) for members in self._lists])
+        mean = sizes.mean()
+        # Trained lists hold about nlist vectors each (nlist = sqrt(n))
+        return mean > skew * len(self.centroids) or sizes.max() > skew * mean
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        nprobe = min(nprobe, len(self.centroids))
+        closest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self._lists[c] for c in closest])
+
+
+class LocalVectorClient:
+    """In-process vector store with the same interface as ``PineconeClient``.
+
+    Vectors live in a float32 matrix that is memory-mapped from disk at
+    startup, so the whole course corpus can be served without network calls.
+    Search uses an IVF-Flat index once the corpus exceeds
+    ``LOCAL_VECTOR_EXACT_THRESHOLD`` vectors and exact scan below that.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        # Singleton pattern to avoid loading the matrix more than once
+        if cls._instance is None:
+            cls._instance = super(LocalVectorClient, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, path: Optional[str] = None, embeddings=None):
+        # Initialize only once
+        if not hasattr(self, "path"):
+            self.path = Path(path or settings.LOCAL_VECTOR_STORE_PATH)
+            self.nprobe = settings.LOCAL_VECTOR_NPROBE
+            self.exact_threshold = settings.LOCAL_VECTOR_EXACT_THRESHOLD
+            self.state_manager = StateManager()
+            self.embeddings = embeddings or OpenAIEmbeddings(
+                model="text-embedding-3-small",
+                dimensions=384
+            )
+            self.rebuild_skew = settings.LOCAL_VECTOR_REBUILD_SKEW
+            self._lock = threading.RLock()
+            # Serializes writers; they only take _lock briefly to publish
+            self._write_lock = threading.Lock()
+            self._load()
+
+    def _load(self):
+        """Memory-map the persisted matrix and records, if present"""
+        vectors_path = self.path / VECTORS_FILE
+        self.ids: List[str] = []
+        self.namespaces: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self._positions: Dict[Tuple[str, str], int] = {}
+        self._namespace_array: Optional[np.ndarray] = None
+        self._index: Optional[IVFFlatIndex] = None
+        self._dirty = False
+
+        if not vectors_path.exists():
+            self.vectors = np.zeros((0, 0), dtype=np.float32)
+            return
+
+        self.vectors = np.load(vectors_path, mmap_mode="r")
+        with (self.path / RECORDS_FILE).open("r") as fp:
+            for line in fp:
+                record = json.loads(line)
+                self._append_record(record["id"], record.get("namespace", ""), record.get("metadata", {}))
+
+        if (self.path / CENTROIDS_FILE).exists():
+            self._index = IVFFlatIndex(
+                np.load(self.path / CENTROIDS_FILE),
+                np.load(self.path / ASSIGNMENTS_FILE, mmap_mode="r")
+            )
+
+    def _append_record(self, id: str, namespace: str, metadata: Dict[str, Any]):
+        self._positions[(namespace, id)] = len(self.ids)
+        self.ids.append(id)
+        self.namespaces.append(namespace)
+        self.metadata.append(metadata)
+        self._namespace_array = None
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
+
+    @asynccontextmanager
+    async def get_connection(self):
+        """Async context manager mirroring ``PineconeClient.get_connection``"""
+        try:
+            yield self
+        except Exception as e:
+            raise Exception(f"Local vector store operation failed: {str(e)}")
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        namespace: str = "",
+        include_values: bool = False
+    ) -> List[VectorMatch]:
+        """Synchronous top-k search over the local index"""
+        with self._lock:
+            if not self.ids:
+                return []
+
+            query = self._normalize(np.asarray(vector, dtype=np.float32))
+            if self._index is not None and len(self.ids) > self.exact_threshold:
+                rows = self._index.candidates(query, self.nprobe)
+                rows = self._filter_rows(rows, filter, namespace)
+                # Fall back to an exact scan when the probed lists are too sparse
+                if len(rows) < top_k:
+                    rows = self._filter_rows(np.arange(len(self.ids)), filter, namespace)
+            else:
+                rows = self._filter_rows(np.arange(len(self.ids)), filter, namespace)
+
+            if len(rows) == 0:
+                return []
+
+            scores = self.vectors[rows] @ query
+            k = min(top_k, len(rows))
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+
+            return [
+                VectorMatch(
+                    id=self.ids[rows[i]],
+                    score=float(scores[i]),
+                    metadata=self.metadata[rows[i]],
+                    values=self.vectors[rows[i]].tolist() if include_values else None
+                )
+                for i in best
+            ]
+
+    def _filter_rows(self, rows: np.ndarray, filter: Optional[Dict], namespace: str) -> np.ndarray:
+        if self._namespace_array is None:
+            self._namespace_array = np.asarray(self.namespaces, dtype=object)
+        rows = rows[self._namespace_array[rows] == namespace]
+        if not filter:
+            return rows
+        return np.array([
+            row for row in rows if matches_filter(self.metadata[row], filter)
+        ], dtype=np.int64)
+
+    async def fetch_segments(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        namespace: str = "",
+        include_values: bool = False
+    ) -> List[VectorMatch]:
+        """Fetch relevant segments from the local index"""
+        try:
+            return self.query(
+                vector=query_vector,
+                top_k=top_k,
+                filter=filter,
+                namespace=namespace,
+                include_values=include_values
+            )
+        except Exception as e:
+            raise Exception(f"Error fetching from local vector store: {str(e)}")
+
+    async def update_segment(
+        self,
+        id: str,
+        metadata: Dict[str, Any],
+        namespace: str = ""
+    ):
+        """Update segment with enriched metadata"""
+        with self._lock:
+            position = self._positions.get((namespace, id))
+            if position is None:
+                raise Exception(f"Vector {id} not found")
+            self.metadata[position] = {**self.metadata[position], **metadata}
+            self._dirty = True
+        invalidate_for_metadata([self.metadata[position]])
+
+    async def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict] = None,
+        namespace: str = ""
+    ) -> List[Document]:
+        """Embed the query and search the local index"""
+        try:
+            query_vector = await self.embeddings.aembed_query(query)
+            matches = self.query(query_vector, top_k=k, filter=filter, namespace=namespace)
+            return [self._to_document(match) for match in matches]
+        except Exception as e:
+            error = WorkflowError(
+                code="VECTOR_SEARCH_ERROR",
+                message=str(e),
+                severity=ErrorSeverity.HIGH,
+                category=ErrorCategory.PROCESSING,
+                context={"query": query, "k": k}
+            )
+            await self.state_manager.add_error(error)
+            raise
+
+    @staticmethod
+    def _to_document(match: VectorMatch) -> Document:
+        metadata = {**match.metadata, "id": match.id, "score": match.score}
+        if match.values:
+            # Lets ContextWindowManager score without re-embedding the text
+            metadata["embedding"] = match.values
+        return Document(
+            page_content=match.metadata.get("text", ""),
+            metadata=metadata
+        )
+
+    async def batch_upsert(
+        self,
+        vectors: List[Tuple[str, List[float], Dict[str, Any]]],
+        batch_size: int = 100,
+        namespace: str = ""
+    ):
+        """Upsert vectors, update the index and persist; ``batch_size`` is kept for interface parity"""
+        try:
+            # Matrix copies, index updates and disk writes stay off the event loop
+            await asyncio.to_thread(self.upsert, vectors, namespace)
+            await asyncio.to_thread(self.persist)
+            invalidate_for_metadata(metadata or {} for _, _, metadata in vectors)
+        except Exception as e:
+            raise Exception(f"Batch upsert failed: {str(e)}")
+
+    def upsert(self, vectors: List[Tuple[str, List[float], Dict[str, Any]]], namespace: str = ""):
+        """Insert or replace vectors.
+
+        The new matrix and index are built aside and swapped in under the
+        lock, so concurrent queries keep reading the previous version.
+        """
+        if not vectors:
+            return
+        with self._write_lock:
+            incoming = self._normalize(np.asarray([values for _, values, _ in vectors], dtype=np.float32))
+            with self._lock:
+                base = self.vectors
+                count = len(self.ids)
+                positions = [self._positions.get((namespace, id)) for id, _, _ in vectors]
+
+            added: Dict[str, int] = {}
+            rows = np.asarray([
+                position if position is not None else added.setdefault(id, count + len(added))
+                for (id, _, _), position in zip(vectors, positions)
+            ], dtype=np.int64)
+            matrix = np.empty((count + len(added), incoming.shape[1]), dtype=np.float32)
+            if count:
+                matrix[:count] = base
+            # Later duplicates of an id win, as with sequential upserts
+            matrix[rows] = incoming
+            index = self._update_index(matrix, rows)
+
+            with self._lock:
+                for (id, _, metadata), row in zip(vectors, rows):
+                    if row == len(self.ids):
+                        self._append_record(id, namespace, metadata or {})
+                    else:
+                        self.metadata[row] = metadata or {}
+                self.vectors = matrix
+                self._index = index
+                self._dirty = True
+
+    def _update_index(self, matrix: np.ndarray, rows: np.ndarray) -> Optional[IVFFlatIndex]:
+        """Assign changed rows to the existing lists; rerun k-means only once they drift"""
+        if settings.LOCAL_VECTOR_INDEX != "ivf_flat" or len(matrix) <= self.exact_threshold:
+            return None
+        if self._index is not None:
+            index = self._index.assign(matrix, rows)
+            if not index.is_skewed(self.rebuild_skew):
+                return index
+        return IVFFlatIndex.build(matrix)
+
+    def persist(self):
+        """Write the matrix, records and index to disk for memory-mapped loading"""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                # Published matrices are never modified, so a reference is a stable snapshot
+                vectors = self.vectors
+                records = list(zip(self.ids, self.namespaces, self.metadata))
+                index = self._index
+                self._dirty = False
+
+            try:
+                self._write_files(vectors, records, index)
+            except Exception:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def _write_files(self, vectors: np.ndarray, records: List[Tuple[str, str, Dict[str, Any]]], index: Optional[IVFFlatIndex]):
+        self.path.mkdir(parents=True, exist_ok=True)
+        np.save(self.path / VECTORS_FILE, np.asarray(vectors, dtype=np.float32))
+        with (self.path / RECORDS_FILE).open("w") as fp:
+            for id, namespace, metadata in records:
+                fp.write(json.dumps({"id": id, "namespace": namespace, "metadata": metadata}) + "\n")
+        if index is not None:
+            np.save(self.path / CENTROIDS_FILE, index.centroids)
+            np.save(self.path / ASSIGNMENTS_FILE, index.assignments)
+        else:
+            for name in (CENTROIDS_FILE, ASSIGNMENTS_FILE):
+                (self.path / name).unlink(missing_ok=True)
+        with (self.path / MANIFEST_FILE).open("w") as fp:
+            json.dump({"count": len(records), "dimension": int(vectors.shape[1])}, fp)
+
+    def get_langchain_retriever(self, search_kwargs: Optional[Dict] = None):
+        """Get LangChain retriever for RAG operations"""
+        return LocalVectorRetriever(client=self, search_kwargs=search_kwargs or {"k": 4})
+
+
+class LocalVectorRetriever(BaseRetriever):
+    """LangChain retriever backed by ``LocalVectorClient``"""
+    client: Any
+    search_kwargs: Dict[str, Any]
+
+    def _search(self, query_vector: List[float]) -> List[Document]:
+        matches = self.client.query(
+            query_vector,
+            top_k=self.search_kwargs.get("k", 4),
+            filter=self.search_kwargs.get("filter"),
+            namespace=self.search_kwargs.get("namespace", ""),
+            include_values=True
+        )
+        return [self.client._to_document(match) for match in matches]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self._search(self.client.embeddings.embed_query(query))
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self._search(await self.client.embeddings.aembed_query(query))
+
+
+def get_vector_client():
+    """Return the vector store client selected by ``VECTOR_STORE_BACKEND``"""
+    if settings.VECTOR_STORE_BACKEND == "local":
+        return LocalVectorClient()
+    from backend.utils.vectorDb.pinecone_client import PineconeClient
+    return PineconeClient()
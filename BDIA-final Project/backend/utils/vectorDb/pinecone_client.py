@@ -3,10 +3,14 @@ import pinecone
 import asyncio
 from langchain_community.vectorstores import Pinecone
 from langchain_community.embeddings import OpenAIEmbeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun, AsyncCallbackManagerForRetrieverRun
+from langchain.schema import Document
 from backend.app.config import get_settings
 from contextlib import asynccontextmanager
 from backend.utils.error_handling import WorkflowError, ErrorSeverity, ErrorCategory, StateManager
 from backend.utils.retry_strategy import RetryStrategy
+from backend.rag.retrieval_cache import invalidate_for_metadata
 
 settings = get_settings()
 
@@ -62,7 +66,8 @@ class PineconeClient:
         query_vector: List[float], 
         top_k: int = 5,
         filter: Optional[Dict] = None,
-        namespace: str = ""
+        namespace: str = "",
+        include_values: bool = False
     ) -> List[Dict]:
         """Fetch relevant segments from Pinecone with retries"""
         max_retries = 3
@@ -72,6 +77,7 @@ class PineconeClient:
                     vector=query_vector,
                     top_k=top_k,
                     include_metadata=True,
+                    include_values=include_values,
                     filter=filter,
                     namespace=namespace
                 )
@@ -101,6 +107,7 @@ class PineconeClient:
                     **metadata
                 })
             ], namespace=namespace)
+            invalidate_for_metadata([vector_data.vectors[id].metadata])
         except Exception as e:
             raise Exception(f"Error updating Pinecone: {str(e)}")
 
@@ -148,11 +155,57 @@ class PineconeClient:
                 batch = vectors[i:i + batch_size]
                 self.index.upsert(vectors=batch, namespace=namespace)
                 await asyncio.sleep(0.5)  # Rate limiting
+            invalidate_for_metadata(metadata for _, _, metadata in vectors)
         except Exception as e:
             raise Exception(f"Batch upsert failed: {str(e)}")
 
+    @staticmethod
+    def _to_document(match: Any) -> Optional[Document]:
+        metadata = dict(match.metadata or {})
+        text = metadata.pop("text", None)
+        if text is None:
+            return None
+        metadata.update({"id": match.id, "score": match.score})
+        if match.values:
+            # Lets ContextWindowManager and the reranker score without re-embedding the text
+            metadata["embedding"] = list(match.values)
+        return Document(page_content=text, metadata=metadata)
+
     def get_langchain_retriever(self, search_kwargs: Optional[Dict] = None):
-        """Get LangChain retriever for RAG operations"""
-        return self.vectorstore.as_retriever(
-            search_kwargs=search_kwargs or {"k": 4}
+        """Get LangChain retriever for RAG operations; documents carry their stored vectors"""
+        return PineconeVectorRetriever(client=self, search_kwargs=search_kwargs or {"k": 4})
+
+
+class PineconeVectorRetriever(BaseRetriever):
+    """LangChain retriever that queries Pinecone with ``include_values=True``"""
+    client: Any
+    search_kwargs: Dict[str, Any]
+
+    def _documents(self, matches) -> List[Document]:
+        documents = [self.client._to_document(match) for match in matches]
+        return [document for document in documents if document is not None]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        results = self.client.index.query(
+            vector=self.client.embeddings.embed_query(query),
+            top_k=self.search_kwargs.get("k", 4),
+            include_metadata=True,
+            include_values=True,
+            filter=self.search_kwargs.get("filter"),
+            namespace=self.search_kwargs.get("namespace", "")
+        )
+        return self._documents(results.matches)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        matches = await self.client.fetch_segments(
+            await self.client.embeddings.aembed_query(query),
+            top_k=self.search_kwargs.get("k", 4),
+            filter=self.search_kwargs.get("filter"),
+            namespace=self.search_kwargs.get("namespace", ""),
+            include_values=True
         )
+        return self._documents(matches)
@@ -0,0 +1,32 @@
+from backend.rag.context_packing import _minhash_signatures, find_near_duplicates
+
+BASE = (
+    "Dynamic programming solves problems by combining the solutions of overlapping "
+    "subproblems and storing each answer in a table so that it is computed only once, "
+    "which turns many exponential recursions into polynomial time algorithms that are "
+    "easy to analyse and implement in practice for shortest paths and sequence alignment"
+)
+
+
+def _agreement(first: str, second: str) -> float:
+    signatures = _minhash_signatures([first, second])
+    return float((signatures[0] == signatures[1]).mean())
+
+
+def test_distinct_texts_fall_below_threshold():
+    first = "Another distinct sentence 0 here."
+    second = "Another distinct sentence 2 here."
+    assert _agreement(first, second) < 0.8
+    assert find_near_duplicates([first, second], threshold=0.8) == [False, False]
+
+
+def test_near_copies_exceed_threshold():
+    near_copy = BASE.replace("practice", "general")
+    assert _agreement(BASE, near_copy) > 0.8
+    assert find_near_duplicates([BASE, near_copy], threshold=0.8) == [False, True]
+
+
+def test_signatures_vary_across_permutations():
+    # Every permutation picking the same shingle would make agreement all-or-nothing
+    agreement = _agreement(BASE, BASE.split(" which ")[0] + " which is unrelated filler text entirely")
+    assert 0.0 < agreement < 1.0
@@ -7,5 +7,6 @@ ENDPOINTS = {
     "qa": f"{API_BASE_URL}/qa",
     "search": f"{API_BASE_URL}/search",
     "notes": f"{API_BASE_URL}/notes",
-    "citations": f"{API_BASE_URL}/citations"
+    "citations": f"{API_BASE_URL}/citations",
+    "catalog": f"{API_BASE_URL}/catalog"
 }
\ No newline at end of file
@@ -1,92 +1,28 @@
 import streamlit as st
-from google.cloud import bigquery
 import asyncio
-import aiohttp
 from config.api_config import ENDPOINTS
-from utils.api_client import APIClient
+from utils.api_client import APIClient, get_json_with_etag
 from utils.state_management import StateManager
 
-def fetch_playlists():
-    """
-    Fetches playlist details (playlist_id, title, description, instructors, topics, subtopics) 
-    from the Courses table in BigQuery.
-    Returns:
-        list of dict: A list of dictionaries with course details.
-    """
-    try:
-        # Initialize BigQuery client
-        client = bigquery.Client()
-        
-        # Query to fetch course details
-        query = """
-        SELECT 
-            playlist_id, 
-            title, 
-            description, 
-            instructors, 
-            ARRAY_AGG(DISTINCT t.topic) AS topics,
-            ARRAY_AGG(DISTINCT subtopic) AS subtopics
-        FROM `finalproject-442400.coursesdata.Courses`,
-        UNNEST(topics) AS t,
-        UNNEST(t.subtopics) AS subtopic
-        GROUP BY playlist_id, title, description, instructors
-        LIMIT 1000
-        """
-        query_job = client.query(query)  # Execute the query
-        results = query_job.result()    # Get the query results
-        
-        # Extract course details into a list of dictionaries
-        playlists = []
-        for row in results:
-            # Handle hierarchical topics and subtopics
-            topics = ", ".join(row.topics) if row.topics else "N/A"
-            subtopics = ", ".join(row.subtopics) if row.subtopics else "N/A"
-            topic_details = f"{topics} ({subtopics})" if subtopics != "N/A" else topics
+PAGE_SIZE = 6  # Number of cards per page
 
-            # Append course details
-            playlists.append({
-                "playlist_id": row.playlist_id,
-                "title": row.title,
-                "description": row.description or "N/A",
-                "instructors": row.instructors or "N/A",
-                "topics": topic_details,
-            })
-        
-        # Enrich with API data
-        async def enrich_with_api_data():
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(f"{ENDPOINTS['playlists']}/metadata") as response:
-                        if response.status == 200:
-                            api_data = await response.json()
-                            # Merge API data with BigQuery results
-                            for playlist in playlists:
-                                if playlist['playlist_id'] in api_data:
-                                    playlist.update({
-                                        'processed': api_data[playlist['playlist_id']].get('processed', False),
-                                        'last_updated': api_data[playlist['playlist_id']].get('last_updated', None)
-                                    })
-            except Exception as e:
-                st.warning(f"Could not fetch API data: {str(e)}")
-        
-        # Run API enrichment
-        asyncio.run(enrich_with_api_data())
-        return playlists
-    except Exception as e:
-        st.error(f"Error fetching playlists: {e}")
-        return []
 
-
-def paginate_list(items, page_size):
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_course_page(page, page_size=PAGE_SIZE):
     """
-    Divides a list into pages of a given size.
+    Fetches one page of pre-aggregated course cards from the backend catalog.
+    Cached for a minute per page; after that the request is revalidated with
+    its ETag, so an unchanged catalog costs a 304 instead of a new payload.
     Args:
-        items (list): The list of items to paginate.
-        page_size (int): The number of items per page.
+        page (int): 1-based page number.
+        page_size (int): Number of cards per page.
     Returns:
-        list of lists: Paginated lists.
+        dict: ``items``, ``page``, ``page_size``, ``total`` and ``total_pages``.
     """
-    return [items[i:i + page_size] for i in range(0, len(items), page_size)]
+    return get_json_with_etag(
+        f"{ENDPOINTS['catalog']}/courses",
+        params={"page": page, "page_size": page_size}
+    )
 
 
 def show_dashboard(set_active_page):
@@ -113,33 +49,34 @@ def show_dashboard(set_active_page):
     # Divider for visual separation
     st.markdown("<hr style='border: 1px solid #E0E0E0;'>", unsafe_allow_html=True)
 
-    # Fetch playlists dynamically from BigQuery
+    # Fetch the current page of courses from the backend catalog
+    st.session_state.setdefault("dashboard_page", 1)
     with st.spinner("Fetching courses..."):
-        playlists = fetch_playlists()
+        try:
+            catalog = fetch_course_page(st.session_state.dashboard_page)
+            if st.session_state.dashboard_page > catalog["total_pages"]:
+                st.session_state.dashboard_page = catalog["total_pages"]
+                catalog = fetch_course_page(st.session_state.dashboard_page)
+        except Exception as e:
+            st.error(f"Error fetching courses: {e}")
+            return
 
     # Check if playlists are available
-    if not playlists:
+    if not catalog["items"]:
         st.warning("No courses available at the moment. Please check back later.")
         return
 
-    # Implement pagination if the number of courses exceeds the limit
-    page_size = 6  # Number of cards per page
-    paginated_playlists = paginate_list(playlists, page_size)
-
     # Select a page
-    total_pages = len(paginated_playlists)
-    if total_pages > 1:
-        page_number = st.sidebar.number_input(
+    if catalog["total_pages"] > 1:
+        st.sidebar.number_input(
             "Page Number",
             min_value=1,
-            max_value=total_pages,
-            value=1,
-            step=1
-        ) - 1
-    else:
-        page_number = 0
+            max_value=catalog["total_pages"],
+            step=1,
+            key="dashboard_page"
+        )
 
-    current_page = paginated_playlists[page_number]
+    current_page = catalog["items"]
 
     # Display each course in a grid layout (2 columns)
     cols = st.columns(2)  # 2 cards per row
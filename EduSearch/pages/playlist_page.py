@@ -1,7 +1,8 @@
 import streamlit as st
-from google.cloud import bigquery
-from utils.api_client import APIClient
+from config.api_config import ENDPOINTS
+from utils.api_client import APIClient, get_json_with_etag
 import asyncio
+import json
 import requests
 from googleapiclient.discovery import build
 import os
@@ -11,6 +12,28 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+def stream_qa_answer(question, course_title):
+    """Yield answer tokens from the streaming QA endpoint as they arrive"""
+    with requests.post(
+        "http://localhost:8000/api/v1/qa",
+        json={
+            "question": question,
+            "course_title": course_title,
+            "stream": True
+        },
+        headers={"Content-Type": "application/json"},
+        stream=True
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["type"] == "token":
+                yield event["content"]
+            elif event["type"] == "error":
+                raise RuntimeError(event.get("message", "Failed to get answer"))
+
 # YouTube API setup with error handling
 def get_youtube_client():
     try:
@@ -29,42 +52,17 @@ def get_youtube_client():
 async def load_playlist_data(playlist_id: str):
     return await APIClient.get_playlist_details(playlist_id)
 
+@st.cache_data(ttl=300, show_spinner=False)
+def _load_course_card(playlist_id):
+    # Failures raise, so they are never cached
+    return get_json_with_etag(f"{ENDPOINTS['catalog']}/courses/{requests.utils.quote(playlist_id, safe='')}")
+
 def fetch_playlist_details(playlist_id):
     """
     Fetches detailed information for a specific playlist using its playlist_id.
     """
     try:
-        client = bigquery.Client()
-        query = f"""
-        SELECT
-            playlist_id,
-            title,
-            description,
-            instructors,
-            ARRAY_AGG(DISTINCT t.topic) AS topics,
-            ARRAY_AGG(DISTINCT subtopic) AS subtopics
-        FROM `finalproject-442400.coursesdata.Courses`,
-        UNNEST(topics) AS t,
-        UNNEST(t.subtopics) AS subtopic
-        WHERE playlist_id = '{playlist_id}'
-        GROUP BY playlist_id, title, description, instructors
-        LIMIT 1
-        """
-        query_job = client.query(query)
-        results = query_job.result()
-
-        for row in results:
-            topics = ", ".join(row.topics) if row.topics else "N/A"
-            subtopics = ", ".join(row.subtopics) if row.subtopics else "N/A"
-            topic_details = f"{topics} ({subtopics})" if subtopics != "N/A" else topics
-
-            return {
-                "playlist_id": row.playlist_id,
-                "title": row.title,
-                "description": row.description or "No description available.",
-                "instructors": row.instructors or "No instructors available.",
-                "topics": topic_details or "No topics available.",
-            }
+        return _load_course_card(playlist_id)
     except Exception as e:
         st.error(f"Error fetching playlist details: {e}")
         return None
@@ -217,18 +215,23 @@ def show_playlist_page(set_active_page):
             st.markdown("<div class='qa-section'>", unsafe_allow_html=True)
             st.markdown("### 💬 Q&A Section")
             question = st.text_input("Ask a question:", placeholder="Type your question here...")
+            stream_answer = st.checkbox("Stream answer", value=True)
             if st.button("Get Answer"):
                 if question:
-                    with st.spinner("Processing your question..."):
-                        try:
-                            response = requests.post(
-                                "http://localhost:8000/api/v1/qa",
-                                json={
-                                    "question": question,
-                                    "course_title": selected_playlist_title
-                                },
-                                headers={"Content-Type": "application/json"}
-                            )
+                    try:
+                        if stream_answer:
+                            st.write("Answer:")
+                            st.write_stream(stream_qa_answer(question, selected_playlist_title))
+                        else:
+                            with st.spinner("Processing your question..."):
+                                response = requests.post(
+                                    "http://localhost:8000/api/v1/qa",
+                                    json={
+                                        "question": question,
+                                        "course_title": selected_playlist_title
+                                    },
+                                    headers={"Content-Type": "application/json"}
+                                )
                             if response.status_code == 200:
                                 data = response.json()
                                 if data.get("success"):
@@ -237,8 +240,8 @@ def show_playlist_page(set_active_page):
                                     st.error(data.get("message", "Failed to get answer"))
                             else:
                                 st.error(f"Server error: {response.status_code}")
-                        except Exception as e:
-                            st.error(f"An error occurred: {str(e)}")
+                    except Exception as e:
+                        st.error(f"An error occurred: {str(e)}")
             st.markdown("</div>", unsafe_allow_html=True)
 
         # Tools Section
@@ -1,9 +1,27 @@
 # EduSearch/utils/api_client.py
 import requests
 import aiohttp
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from config.api_config import ENDPOINTS
 
+# (url, params) -> (etag, payload); lives as long as the Streamlit process
+_etag_cache: Dict[Tuple, Tuple[str, Any]] = {}
+
+def get_json_with_etag(url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10) -> Any:
+    """GET JSON, revalidating a previous response with If-None-Match"""
+    key = (url, tuple(sorted((params or {}).items())))
+    cached = _etag_cache.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    response = requests.get(url, params=params, headers=headers, timeout=timeout)
+    if response.status_code == 304 and cached:
+        return cached[1]
+    response.raise_for_status()
+    payload = response.json()
+    etag = response.headers.get("ETag")
+    if etag:
+        _etag_cache[key] = (etag, payload)
+    return payload
+
 class APIClient:
     @staticmethod
     async def get_playlist_details(playlist_id: str) -> Dict[str, Any]:
@@ -2,6 +2,8 @@ import os
 import requests
 from urllib.parse import urljoin
 import json
+import base64
+import hashlib
 import logging
 import time
 import re
@@ -52,9 +54,16 @@ gcs_client = storage.Client(project=os.getenv('GCP_PROJECT_ID'))
 # Get environment variables
 bucket_name = os.getenv('GCS_BUCKET_NAME')
 dataset_id = os.getenv('BQ_DATASET_ID')
+# Parquet catalog snapshot; the backend syncs the GCS mirror (catalog/) into its CATALOG_SNAPSHOT_PATH
+CATALOG_SNAPSHOT_DIR = os.getenv('CATALOG_SNAPSHOT_DIR', 'catalog_snapshot')
+# What earlier runs downloaded, parsed and embedded, so each stage only redoes what changed
+PIPELINE_MANIFEST_PATH = os.getenv('PIPELINE_MANIFEST_PATH', 'pipeline_manifest.json')
+PIPELINE_MANIFEST_BLOB = "manifest/pipeline_manifest.json"
+PIPELINE_FORCE_FULL_RUN = os.getenv('PIPELINE_FORCE_FULL_RUN', 'false').lower() == 'true'
+MANIFEST_SECTIONS = ("urls", "pdfs", "embedded", "bigquery", "orphans")
 
 
-EXCLUDED_DIRS = {'logs', 'dags', 'plugins', 'parsed_content', 'config'}
+EXCLUDED_DIRS = {'logs', 'dags', 'plugins', 'parsed_content', 'config', 'catalog_snapshot'}
 BATCH_SIZE = 1
 
 
@@ -98,6 +107,117 @@ course_data_urls = {
      }
 }
 
+def load_manifest():
+    """
+    Load the run manifest: the local copy if present, else the GCS mirror.
+
+    Sections:
+        urls:     url -> {etag, last_modified, sha256, path}
+        pdfs:     pdf path -> {sha256, chunks_hash, chunks_file}
+        embedded: parsed file -> {hash, id_scheme, vectors: {vector_id: content_hash}}
+        bigquery: {hash} of the last loaded tables
+        orphans:  vector ids still to be deleted from Pinecone
+    """
+    manifest = {}
+    if not PIPELINE_FORCE_FULL_RUN:
+        manifest_path = Path(PIPELINE_MANIFEST_PATH)
+        try:
+            if manifest_path.exists():
+                manifest = json.loads(manifest_path.read_text())
+            elif bucket_name:
+                blob = gcs_client.bucket(bucket_name).blob(PIPELINE_MANIFEST_BLOB)
+                if blob.exists():
+                    manifest = json.loads(blob.download_as_text())
+        except Exception as e:
+            logging.warning(f"Failed to read pipeline manifest, processing everything: {e}")
+            manifest = {}
+    for section in MANIFEST_SECTIONS:
+        manifest.setdefault(section, [] if section == "orphans" else {})
+    return manifest
+
+
+def save_manifest(manifest, mirror=False):
+    """
+    Atomically write the manifest; with mirror=True also copy it to GCS so a
+    fresh worker picks up where the last run left off.
+    """
+    manifest_path = Path(PIPELINE_MANIFEST_PATH)
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp_path, manifest_path)
+    if mirror and bucket_name:
+        try:
+            gcs_client.bucket(bucket_name).blob(PIPELINE_MANIFEST_BLOB).upload_from_filename(str(manifest_path))
+        except Exception as e:
+            logging.warning(f"Failed to mirror pipeline manifest to GCS: {e}")
+
+
+def sha256_file(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_set_hash(chunks):
+    """Hash of a PDF's parsed chunks; unchanged chunks need no re-embedding."""
+    return hashlib.sha256(json.dumps(chunks, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def conditional_download(url, file_path, manifest, content_type=None):
+    """
+    Download url to file_path unless the server or the content says it is unchanged.
+
+    Sends If-None-Match / If-Modified-Since from the last run; a 304, or a body
+    whose sha256 matches the last download, leaves the local file untouched.
+
+    :param manifest: Manifest from load_manifest(); its urls section is updated.
+    :param content_type: Required substring of the Content-Type header, if any.
+    :return: True if file_path was (re)written.
+    """
+    file_path = Path(file_path)
+    entry = manifest["urls"].get(url)
+    headers = {}
+    if entry and file_path.exists() and entry.get("path") == str(file_path):
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    with requests.get(url, headers=headers, stream=True, timeout=120) as response:
+        if response.status_code == 304:
+            logging.info(f"Not modified: {url}")
+            return False
+        response.raise_for_status()
+        if content_type and content_type not in response.headers.get("Content-Type", ""):
+            raise ValueError(f"Invalid content type for: {url}. Expected {content_type}.")
+
+        digest = hashlib.sha256()
+        tmp_path = file_path.with_name(file_path.name + ".part")
+        try:
+            with open(tmp_path, "wb") as file:
+                for chunk in response.iter_content(chunk_size=8192):
+                    file.write(chunk)
+                    digest.update(chunk)
+            sha256 = digest.hexdigest()
+            changed = not (entry and entry.get("sha256") == sha256 and file_path.exists())
+            if changed:
+                os.replace(tmp_path, file_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        manifest["urls"][url] = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "sha256": sha256,
+            "path": str(file_path),
+        }
+    logging.info(f"{'Saved' if changed else 'Unchanged'}: {file_path}")
+    return changed
+
+
 def fetch_html(url):
     from bs4 import BeautifulSoup
     """Fetch HTML content for a given URL."""
@@ -211,8 +331,8 @@ def normalize_lecture_note_title(title, course_title):
     return re.sub(r"\s+", " ", cleaned_title).strip()
 
 
-def download_lecture_notes(course_title, lecture_notes):
-    """Download lecture notes to local storage."""
+def download_lecture_notes(course_title, lecture_notes, manifest):
+    """Download lecture notes to local storage, skipping ones unchanged since the last run."""
     formatted_course_title = course_title.replace(" ", "_").replace(":", "_").replace("/", "_")
     lecture_notes_dir = os.path.join(formatted_course_title, f"{formatted_course_title}_Lecture_Notes")
     os.makedirs(lecture_notes_dir, exist_ok=True)
@@ -222,21 +342,12 @@ def download_lecture_notes(course_title, lecture_notes):
             file_name = f"{formatted_course_title}_{note['title'].replace(' ', '_').replace(':', '_').replace('/', '_')}.pdf"
             file_path = os.path.join(lecture_notes_dir, file_name)
             logging.info(f"Downloading: {note['url']}")
-            response = requests.get(note["url"], stream=True)
-            response.raise_for_status()
-
             # Ensure valid PDF content
-            if 'application/pdf' in response.headers.get('Content-Type', ''):
-                with open(file_path, "wb") as file:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        file.write(chunk)
-                logging.info(f"Saved to: {file_path}")
-            else:
-                logging.error(f"Invalid content type for: {note['url']}. Expected PDF.")
+            conditional_download(note["url"], file_path, manifest, content_type="application/pdf")
         except Exception as e:
             logging.error(f"Failed to download: {note['url']}, Error: {e}")
 
-def download_transcripts(course_title, video_gallery_url, course_data):
+def download_transcripts(course_title, video_gallery_url, course_data, manifest):
     """Download transcripts from all subpages of the video gallery and update metadata."""
     try:
         formatted_course_title = course_title.replace(" ", "_").replace(":", "_").replace("/", "_")
@@ -249,7 +360,8 @@ def download_transcripts(course_title, video_gallery_url, course_data):
             if not soup:
                 return []
             video_links = soup.find_all('a', href=True)
-            return list(set(
+            # Sorted so transcript ids are stable from run to run
+            return sorted(set(
                 urljoin(page_url, link['href']) for link in video_links
                 if 'courses/' in link['href'] and 'video_galleries' not in link['href']
             ))
@@ -268,19 +380,17 @@ def download_transcripts(course_title, video_gallery_url, course_data):
 
                 # Download transcript
                 logging.info(f"Downloading transcript: {transcript_url}")
-                response = requests.get(transcript_url)
-                if response.status_code == 200:
-                    with open(transcript_filepath, "wb") as file:
-                        file.write(response.content)
-                    logging.info(f"Saved transcript to: {transcript_filepath}")
-                    # Add transcript metadata
-                    course_data["transcripts"].append({
-                        "title": transcript_name,
-                        "url": transcript_url,
-                        "path": transcript_filepath
-                    })
-                else:
-                    logging.error(f"Failed to download transcript: {transcript_url}")
+                try:
+                    conditional_download(transcript_url, transcript_filepath, manifest)
+                except Exception as e:
+                    logging.error(f"Failed to download transcript: {transcript_url}, Error: {e}")
+                    continue
+                # Add transcript metadata
+                course_data["transcripts"].append({
+                    "title": transcript_name,
+                    "url": transcript_url,
+                    "path": transcript_filepath
+                })
 
         # Main transcript downloading workflow
         video_pages = get_video_pages(video_gallery_url)
@@ -299,7 +409,16 @@ def normalize_transcript_title(transcript_name, lecture_notes):
             return f"{note['title']} - Transcript"
     return f"Transcript - {transcript_name}"  # Fallback if no match
 
-def upload_folder_to_gcs(local_folder_path, bucket_name, gcs_base_path=""):
+def file_md5_base64(file_path):
+    """MD5 of a file in the base64 form GCS reports as ``blob.md5_hash``."""
+    digest = hashlib.md5()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return base64.b64encode(digest.digest()).decode("ascii")
+
+
+def upload_folder_to_gcs(local_folder_path, bucket_name, gcs_base_path="", skip_unchanged=True):
     """
     Upload a local folder and its contents to GCS, preserving the folder structure.
     Excludes unnecessary files like .DS_Store.
@@ -307,10 +426,14 @@ def upload_folder_to_gcs(local_folder_path, bucket_name, gcs_base_path=""):
     :param local_folder_path: Path to the local folder to upload.
     :param bucket_name: Name of the GCS bucket.
     :param gcs_base_path: Base path in the GCS bucket where files will be uploaded.
+    :param skip_unchanged: Skip files whose MD5 matches the object already in GCS.
     """
     try:
         client = storage.Client()
         bucket = client.bucket(bucket_name)
+        existing = {}
+        if skip_unchanged:
+            existing = {blob.name: blob.md5_hash for blob in client.list_blobs(bucket_name, prefix=gcs_base_path)}
 
         for root, _, files in os.walk(local_folder_path):
             for file in files:
@@ -322,6 +445,8 @@ def upload_folder_to_gcs(local_folder_path, bucket_name, gcs_base_path=""):
                 local_file_path = os.path.join(root, file)
                 relative_path = os.path.relpath(local_file_path, local_folder_path)
                 gcs_blob_path = os.path.join(gcs_base_path, relative_path).replace("\\", "/")  # Ensure correct GCS path
+                if gcs_blob_path in existing and existing[gcs_blob_path] == file_md5_base64(local_file_path):
+                    continue
                 blob = bucket.blob(gcs_blob_path)
                 blob.upload_from_filename(local_file_path)
                 logging.info(f"Uploaded {local_file_path} to GCS as {gcs_blob_path}.")
@@ -354,9 +479,13 @@ def process_course_metadata(course_data_urls, bucket_name="mit_scraped_courses")
     Process courses to fetch metadata, download lecture notes and transcripts, 
     and upload results to Google Cloud Storage.
 
+    Downloads are conditional on the manifest from the previous run, so
+    unchanged lecture notes and transcripts are not fetched again.
+
     :param course_data_urls: Dictionary containing course data URLs and metadata.
     :param bucket_name: GCS bucket name where data will be uploaded.
     """
+    manifest = load_manifest()
     for course_key, urls in course_data_urls.items():
         course_url = urls["course_url"]
         video_gallery_url = urls["video_gallery_url"]
@@ -392,14 +521,15 @@ def process_course_metadata(course_data_urls, bucket_name="mit_scraped_courses")
             continue
 
         # Download transcripts
-        download_transcripts(course_title, video_gallery_url, course_data)
+        download_transcripts(course_title, video_gallery_url, course_data, manifest)
 
         # Download lecture notes
         lecture_notes_url = f"{course_url}pages/lecture-notes/"
         lecture_notes_soup = fetch_html(lecture_notes_url)
         if lecture_notes_soup:
             parse_lecture_notes(lecture_notes_soup, course_data)
-            download_lecture_notes(course_title, course_data["lecture_notes"])
+            download_lecture_notes(course_title, course_data["lecture_notes"], manifest)
+        save_manifest(manifest)
 
         # Save metadata to JSON
         try:
@@ -424,6 +554,8 @@ def process_course_metadata(course_data_urls, bucket_name="mit_scraped_courses")
         except Exception as e:
             logging.error(f"Failed to upload folder {formatted_course_title} to GCS: {e}")
 
+    save_manifest(manifest, mirror=True)
+
 # Helper function to list JSON files in GCS
 def list_json_files(bucket_name):
     bucket = gcs_client.bucket(bucket_name)
@@ -505,6 +637,17 @@ def load_data_into_bigquery():
     print("Loading JSON data into DataFrames...")
     courses_df, lecture_notes_df, transcripts_df = load_json_to_dataframes(bucket_name, json_files)
 
+    # The tables are rebuilt wholesale, so skip the reload when their content is unchanged
+    manifest = load_manifest()
+    tables_hash = hashlib.sha256(json.dumps(
+        [df.to_dict(orient="records") for df in (courses_df, lecture_notes_df, transcripts_df)],
+        sort_keys=True, default=str
+    ).encode("utf-8")).hexdigest()
+    snapshot_exists = (Path(CATALOG_SNAPSHOT_DIR) / "CURRENT").exists()
+    if manifest["bigquery"].get("hash") == tables_hash and snapshot_exists:
+        print("Course metadata unchanged since the last load. Skipping BigQuery load.")
+        return
+
     # Print DataFrame structures
     print("Courses DataFrame:")
     print(courses_df.head())
@@ -551,18 +694,80 @@ def load_data_into_bigquery():
     print("Loading Transcripts data into BigQuery...")
     load_table_to_bq(transcripts_df, "Transcripts", transcripts_schema)
 
+    print("Exporting catalog snapshot...")
+    export_catalog_snapshot(courses_df, lecture_notes_df, transcripts_df)
+
+    manifest["bigquery"] = {"hash": tables_hash, "loaded_at": datetime.utcnow().isoformat()}
+    save_manifest(manifest, mirror=True)
+
+
+def export_catalog_snapshot(courses_df, lecture_notes_df, transcripts_df, keep_versions=3):
+    """
+    Write the freshly loaded tables as a versioned Parquet snapshot the backend
+    serves metadata from, then point CURRENT at it. Also mirrored to GCS under
+    catalog/ so other hosts can sync it.
+
+    :param keep_versions: Number of snapshot versions to keep locally.
+    """
+    import shutil
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    snapshot_root = Path(CATALOG_SNAPSHOT_DIR)
+    version = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    version_dir = snapshot_root / version
+    version_dir.mkdir(parents=True, exist_ok=True)
+
+    tables = {
+        "courses.parquet": courses_df,
+        "lecture_notes.parquet": lecture_notes_df,
+        "transcripts.parquet": transcripts_df,
+    }
+    for file_name, df in tables.items():
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, version_dir / file_name, compression="zstd")
+
+    # Readers only ever see complete versions: CURRENT flips after all files exist
+    current_tmp = snapshot_root / "CURRENT.tmp"
+    current_tmp.write_text(version)
+    os.replace(current_tmp, snapshot_root / "CURRENT")
+    logging.info(f"Catalog snapshot {version} written to {version_dir}")
+
+    try:
+        bucket = gcs_client.bucket(bucket_name)
+        for file_name in tables:
+            bucket.blob(f"catalog/{version}/{file_name}").upload_from_filename(str(version_dir / file_name))
+        bucket.blob("catalog/CURRENT").upload_from_string(version)
+    except Exception as e:
+        logging.warning(f"Failed to mirror catalog snapshot {version} to GCS: {e}")
+
+    versions = sorted(p for p in snapshot_root.iterdir() if p.is_dir())
+    for old_dir in versions[:-keep_versions]:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
 from easyocr import Reader
 import os
 import logging
 
+EASYOCR_DIR = os.path.expanduser(os.getenv("EASYOCR_DIR", "~/.EasyOCR"))
+# Detector and English recognizer weights that Reader(['en']) downloads
+EASYOCR_MODEL_FILES = ("craft_mlt_25k.pth", "english_g2.pth")
+
+
 def setup_easyocr_environment():
     """
     Set up EasyOCR environment to avoid runtime downloads and ensure availability.
+    Docling's OCR stage loads its own Reader from this directory in each
+    process, so a Reader is only built here when the weights still need downloading.
     """
-    easyocr_dir = os.path.expanduser("~/.EasyOCR")
+    easyocr_dir = EASYOCR_DIR
     os.makedirs(easyocr_dir, exist_ok=True)
     os.environ["EASYOCR_DIR"] = easyocr_dir
 
+    if all(os.path.exists(os.path.join(easyocr_dir, name)) for name in EASYOCR_MODEL_FILES):
+        logging.info(f"EasyOCR models already present in: {easyocr_dir}")
+        return easyocr_dir
+
     try:
         # Initialize EasyOCR Reader
         reader = Reader(['en'], gpu=True, model_storage_directory=easyocr_dir)
@@ -570,8 +775,9 @@ def setup_easyocr_environment():
     except Exception as e:
         logging.warning(f"GPU not available for EasyOCR. Falling back to CPU: {e}")
         reader = Reader(['en'], gpu=False, model_storage_directory=easyocr_dir)
+    del reader
     logging.info(f"EasyOCR models are stored in: {easyocr_dir}")
-    return reader
+    return easyocr_dir
 
 
 def clean_text(text):
@@ -608,153 +814,492 @@ def wait_for_resources(memory_threshold=75, cpu_threshold=90, check_interval=5):
         time.sleep(check_interval)
 
 
-def process_pdf(file_path, course_name, content_type):
+# Docling configuration constants
+IMAGE_RESOLUTION_SCALE = float(os.getenv("PDF_IMAGE_SCALE", "2.0"))
+# Only picture crops are saved, so full page and table renders are off unless asked for
+PDF_PAGE_IMAGES = os.getenv("PDF_PAGE_IMAGES", "false").lower() == "true"
+PDF_TABLE_IMAGES = os.getenv("PDF_TABLE_IMAGES", "false").lower() == "true"
+PDF_PICTURE_IMAGES = os.getenv("PDF_PICTURE_IMAGES", "true").lower() == "true"
+IMAGE_IO_WORKERS = int(os.getenv("IMAGE_IO_WORKERS", "4"))
+CHUNK_LENGTH_MIN = 500
+CHUNK_LENGTH_MAX = 1500
+CHUNK_OVERLAP = 50
+
+# Process-pool settings for parsing PDFs ("serial" keeps the one-at-a-time loop)
+PDF_PROCESSING_MODE = os.getenv("PDF_PROCESSING_MODE", "process")
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "0"))  # 0 sizes the pool from cores and memory
+PDF_WORKER_MEMORY_GB = float(os.getenv("PDF_WORKER_MEMORY_GB", "2.5"))
+PDF_TIMEOUT_SECONDS = int(os.getenv("PDF_TIMEOUT_SECONDS", "900"))
+# Pools rebuilt after a worker dies (e.g. OOM kill) before parsing falls back to serial
+PDF_POOL_MAX_RESTARTS = int(os.getenv("PDF_POOL_MAX_RESTARTS", "2"))
+
+
+def build_document_converter():
     """
-    Process a single PDF for parsing and chunking.
-    Includes saving tables, images, and text chunks.
-    
-    :param file_path: Path to the PDF file.
-    :param course_name: Name of the course.
-    :param content_type: Content type (e.g., lecture_notes, transcripts).
+    Create a Docling converter that renders only the images configured above.
+    Loading its layout and OCR models is the expensive part, so callers reuse it.
     """
     from docling.datamodel.base_models import InputFormat
-    from docling.datamodel.pipeline_options import PdfPipelineOptions
+    from docling.datamodel.pipeline_options import EasyOcrOptions, PdfPipelineOptions
     from docling.document_converter import DocumentConverter, PdfFormatOption
+
+    pipeline_options = PdfPipelineOptions(
+        images_scale=IMAGE_RESOLUTION_SCALE,
+        generate_page_images=PDF_PAGE_IMAGES,
+        generate_table_images=PDF_TABLE_IMAGES,
+        generate_picture_images=PDF_PICTURE_IMAGES,
+        # Reuse the weights setup_easyocr_environment() fetched
+        ocr_options=EasyOcrOptions(lang=["en"], model_storage_directory=EASYOCR_DIR)
+    )
+    return DocumentConverter(
+        format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
+    )
+
+
+class ModelWarmPool:
+    """
+    Per-process holder of the Docling converter and the layout, table and
+    EasyOCR models behind it.
+
+    The models load once, on first use or from a pool worker's initializer,
+    and every later PDF in the process reuses them. Load and per-document
+    conversion times are recorded so the task can report where time goes.
+    """
+
+    def __init__(self):
+        self._converter = None
+        self.load_seconds = 0.0
+        self.documents = 0
+        self.convert_seconds = 0.0
+
+    @property
+    def converter(self):
+        if self._converter is None:
+            from docling.datamodel.base_models import InputFormat
+
+            start = time.perf_counter()
+            converter = build_document_converter()
+            # Docling otherwise loads the pipeline models inside the first convert()
+            converter.initialize_pipeline(InputFormat.PDF)
+            self.load_seconds = time.perf_counter() - start
+            self._converter = converter
+            _log.info(f"Loaded PDF models in {self.load_seconds:.1f}s (pid {os.getpid()})")
+        return self._converter
+
+    def convert(self, file_path):
+        """
+        Convert one PDF with the warm models.
+
+        :return: Tuple of (conversion result, seconds spent converting).
+        """
+        converter = self.converter
+        start = time.perf_counter()
+        conv_res = converter.convert(file_path)
+        elapsed = time.perf_counter() - start
+        self.documents += 1
+        self.convert_seconds += elapsed
+        return conv_res, elapsed
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "load_seconds": round(self.load_seconds, 3),
+            "documents": self.documents,
+            "convert_seconds": round(self.convert_seconds, 3),
+        }
+
+
+# One warm pool per process: the coordinator in serial mode, each worker otherwise
+_model_pool = None
+
+
+def get_model_pool():
+    global _model_pool
+    if _model_pool is None:
+        _model_pool = ModelWarmPool()
+    return _model_pool
+
+
+def parse_pdf(models, file_path, course_name, content_type):
+    """
+    Convert and chunk one PDF without touching the output directory.
+    Tables and pictures are collected in one traversal; the chunker makes a
+    second one over the same converted document.
+
+    :param models: The process's ModelWarmPool.
+    :return: Dict with the tables as CSV text, pictures as PNG bytes, the text
+             chunks and this document's model metrics.
+    """
+    import io
     from docling_core.types.doc import PictureItem, TableItem
     from docling_core.transforms.chunker import HierarchicalChunker
 
-    # Configuration constants
-    IMAGE_RESOLUTION_SCALE = 2.0
-    CHUNK_LENGTH_MIN = 500
-    CHUNK_LENGTH_MAX = 1500
-    CHUNK_OVERLAP = 50
+    logging.info(f"Processing file: {file_path}")
+    conv_res, convert_seconds = models.convert(file_path)
+    doc_filename = Path(file_path).stem
 
-    # Ensure resources are available before processing
-    wait_for_resources()
+    def encode_png(pil_image):
+        buffer = io.BytesIO()
+        pil_image.save(buffer, "PNG")
+        return buffer.getvalue()
 
-    try:
-        logging.info(f"Processing file: {file_path}")
-        # Configure pipeline options for Docling
-        pipeline_options = PdfPipelineOptions(
-            images_scale=IMAGE_RESOLUTION_SCALE,
-            generate_page_images=True,
-            generate_table_images=True,
-            generate_picture_images=True
-        )
-        doc_converter = DocumentConverter(
-            format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
-        )
+    with ThreadPoolExecutor(max_workers=IMAGE_IO_WORKERS) as image_pool:
+        tables = []
+        picture_futures = []
 
-        # Convert the PDF
-        conv_res = doc_converter.convert(file_path)
-        doc_filename = Path(file_path).stem
-        course_output_dir = output_dir / course_name / content_type
-        course_output_dir.mkdir(parents=True, exist_ok=True)
+        def visit_table(element):
+            tables.append(pd.DataFrame(element.export_to_dataframe()).to_csv(index=False))
 
-        # Save tables
-        table_counter = 0
-        for element, _ in conv_res.document.iterate_items():
-            if isinstance(element, TableItem):
-                table_counter += 1
-                table_csv_filename = course_output_dir / f"{doc_filename}-table-{table_counter}.csv"
-                pd.DataFrame(element.export_to_dataframe()).to_csv(table_csv_filename, index=False)
-                logging.info(f"Saved table to {table_csv_filename}")
-
-        # Save images
-        picture_counter = 0
+        def visit_picture(element):
+            # PNG encoding overlaps with the rest of the traversal and the chunking
+            if element.image is not None:
+                picture_futures.append(image_pool.submit(encode_png, element.image.pil_image))
+
+        # One pass over the document for tables and pictures, dispatching on element type
+        visitors = ((TableItem, visit_table), (PictureItem, visit_picture))
         for element, _ in conv_res.document.iterate_items():
-            if isinstance(element, PictureItem):
-                picture_counter += 1
-                picture_image_filename = course_output_dir / f"{doc_filename}-picture-{picture_counter}.png"
-                with picture_image_filename.open("wb") as fp:
-                    element.image.pil_image.save(fp, "PNG")
-                logging.info(f"Saved picture to {picture_image_filename}")
-
-        # Chunk text content
+            for item_type, visit in visitors:
+                if isinstance(element, item_type):
+                    visit(element)
+                    break
+
+        # Text keeps the chunker's own walk: it tracks headings and merges list
+        # items across elements, and its output fixes the chunk ids and content
+        # hashes the embed manifest is keyed on. Re-walking the in-memory tree
+        # is cheap next to conversion.
         chunks = list(HierarchicalChunker(
             min_chunk_length=CHUNK_LENGTH_MIN,
             max_chunk_length=CHUNK_LENGTH_MAX,
             split_by="paragraph",
             overlap=CHUNK_OVERLAP
         ).chunk(conv_res.document))
+        pictures = [future.result() for future in picture_futures]
+
+    chunk_data = []
+    for i, chunk in enumerate(chunks):
+        cleaned_text = unicodedata.normalize("NFKD", chunk.text.strip())
+        if cleaned_text:
+            chunk_data.append({
+                "course": course_name,
+                "content_type": content_type,
+                "document": doc_filename,
+                "chunk_id": i,
+                "text": cleaned_text
+            })
+
+    return {
+        "file_path": str(file_path),
+        "course_name": course_name,
+        "content_type": content_type,
+        "doc_filename": doc_filename,
+        "tables": tables,
+        "pictures": pictures,
+        "chunks": chunk_data,
+        "metrics": {
+            "pid": os.getpid(),
+            "load_seconds": models.load_seconds,
+            "convert_seconds": convert_seconds,
+        },
+    }
 
-        chunk_data = []
-        for i, chunk in enumerate(chunks):
-            cleaned_text = unicodedata.normalize("NFKD", chunk.text.strip())
-            if cleaned_text:
-                chunk_data.append({
-                    "course": course_name,
-                    "content_type": content_type,
-                    "document": doc_filename,
-                    "chunk_id": i,
-                    "text": cleaned_text
-                })
+
+def write_pdf_outputs(result):
+    """
+    Save the tables, pictures and chunks parsed from one PDF under output_dir.
+    Only the coordinating process calls this, so files have a single writer.
+
+    :return: Path of the chunks JSON file.
+    """
+    doc_filename = result["doc_filename"]
+    course_output_dir = output_dir / result["course_name"] / result["content_type"]
+    course_output_dir.mkdir(parents=True, exist_ok=True)
+
+    # A re-parsed PDF may have fewer tables or pictures than before
+    for stale_file in [*course_output_dir.glob(f"{doc_filename}-table-*.csv"),
+                       *course_output_dir.glob(f"{doc_filename}-picture-*.png")]:
+        stale_file.unlink()
+
+    for table_counter, table_csv in enumerate(result["tables"], 1):
+        table_csv_filename = course_output_dir / f"{doc_filename}-table-{table_counter}.csv"
+        table_csv_filename.write_text(table_csv)
+        logging.info(f"Saved table to {table_csv_filename}")
+
+    # Pictures are written in the background while the chunks are saved
+    with ThreadPoolExecutor(max_workers=IMAGE_IO_WORKERS) as image_pool:
+        picture_writes = []
+        for picture_counter, picture_png in enumerate(result["pictures"], 1):
+            picture_image_filename = course_output_dir / f"{doc_filename}-picture-{picture_counter}.png"
+            picture_writes.append((image_pool.submit(picture_image_filename.write_bytes, picture_png), picture_image_filename))
 
         # Save text chunks to JSON
         chunks_json_filename = course_output_dir / f"{doc_filename}_chunks.json"
         with chunks_json_filename.open("w") as json_fp:
-            json.dump(chunk_data, json_fp, indent=4, ensure_ascii=False)
+            json.dump(result["chunks"], json_fp, indent=4, ensure_ascii=False)
         logging.info(f"Chunks saved to {chunks_json_filename}")
 
-        logging.info(f"Processing completed for file: {file_path}")
+        for future, picture_image_filename in picture_writes:
+            future.result()
+            logging.info(f"Saved picture to {picture_image_filename}")
+    logging.info(f"Processing completed for file: {result['file_path']}")
+    return chunks_json_filename
+
+
+def process_pdf(file_path, course_name, content_type, on_written=None):
+    """
+    Process a single PDF for parsing and chunking.
+    Includes saving tables, images, and text chunks.
+    
+    :param file_path: Path to the PDF file.
+    :param course_name: Name of the course.
+    :param content_type: Content type (e.g., lecture_notes, transcripts).
+    :param on_written: Optional callback(result, chunks_file) after the outputs are saved.
+    """
+    # Ensure resources are available before processing
+    wait_for_resources()
 
+    try:
+        result = parse_pdf(get_model_pool(), file_path, course_name, content_type)
+        chunks_file = write_pdf_outputs(result)
+        if on_written:
+            on_written(result, chunks_file)
     except Exception as e:
         logging.error(f"Error processing {file_path}: {e}")
 
-        # Chunk text content
-        chunks = list(HierarchicalChunker(
-            min_chunk_length=CHUNK_LENGTH_MIN,
-            max_chunk_length=CHUNK_LENGTH_MAX,
-            split_by="paragraph",
-            overlap=CHUNK_OVERLAP
-        ).chunk(conv_res.document))
-        
-        chunk_data = []
-        for i, chunk in enumerate(chunks):
-            cleaned_text = clean_text(chunk.text)
-            if cleaned_text:
-                chunk_data.append({
-                    "course": course_name,
-                    "content_type": content_type,
-                    "document": doc_filename,
-                    "chunk_id": i,
-                    "text": cleaned_text
-                })
 
-        # Save text chunks to JSON
-        chunks_json_filename = course_output_dir / f"{doc_filename}_chunks.json"
-        with chunks_json_filename.open("w") as json_fp:
-            json.dump(chunk_data, json_fp, indent=4, ensure_ascii=False)
-        _log.info(f"Chunks saved to {chunks_json_filename}")
-        
-        _log.info(f"Processed {file_path} in {time.time() - start_time:.2f} seconds.")
-    except Exception as e:
-        _log.error(f"Error processing {file_path}: {e}")
+def _init_pdf_worker():
+    # Load the models before the first task arrives
+    get_model_pool().converter
 
-def process_courses(base_dir):
+
+def _parse_pdf_in_worker(file_path, course_name, content_type):
+    """Pool task: parse one PDF with the worker's warm models (the coordinator enforces the deadline)"""
+    return parse_pdf(get_model_pool(), file_path, course_name, content_type)
+
+
+def pdf_worker_count():
     """
-    Process all courses and their PDFs in the base directory.
+    Size the pool from free cores and available memory; each worker holds
+    its own Docling models, so memory is usually the binding limit.
     """
-    if not base_dir.exists() not in EXCLUDED_DIRS:
-        _log.error(f"Base directory {base_dir} does not exist.")
-        return
+    if PDF_WORKERS > 0:
+        return PDF_WORKERS
+    by_cpu = max(1, (os.cpu_count() or 2) - 1)
+    by_memory = int(psutil.virtual_memory().available / (PDF_WORKER_MEMORY_GB * 1024 ** 3))
+    return max(1, min(by_cpu, by_memory))
+
 
+def list_course_pdfs(base_dir):
+    """
+    Yield (pdf_file, course_name, content_type) for every PDF of every course.
+    """
     for course_dir in base_dir.iterdir():
-        if course_dir.is_dir():
+        if course_dir.is_dir() and course_dir.name not in EXCLUDED_DIRS:
             course_name = course_dir.name
-            _log.info(f"Processing course: {course_name}")
-            
-            # Process Lecture Notes
             lecture_notes_dir = course_dir / f"{course_name}_Lecture_Notes"
             if lecture_notes_dir.exists():
                 for pdf_file in lecture_notes_dir.glob("*.pdf"):
-                    process_pdf(pdf_file, course_name, "lecture_notes")
-            
-            # Process Transcripts
+                    yield pdf_file, course_name, "lecture_notes"
             transcripts_dir = course_dir / f"{course_name}_transcripts"
             if transcripts_dir.exists():
                 for pdf_file in transcripts_dir.glob("*.pdf"):
-                    process_pdf(pdf_file, course_name, "transcripts")
+                    yield pdf_file, course_name, "transcripts"
+
+
+def process_pdfs_in_pool(pdf_jobs, on_written=None):
+    """
+    Parse PDFs on a process pool and write each result as it arrives.
+
+    At most two tasks per worker are queued at once, so memory stays bounded
+    however many PDFs there are. Failures are logged per file.
+
+    A PDF still running after PDF_TIMEOUT_SECONDS fails, and its pool's
+    workers are killed: a signal cannot interrupt Docling's native code, and
+    a converter stopped mid-document should not be reused. The other PDFs
+    that were in flight go to a fresh pool.
+
+    If a worker dies on its own (OOM kill, failed model load) the pool
+    breaks: its in-flight PDFs are counted as failed and a new pool takes the
+    remaining ones, up to PDF_POOL_MAX_RESTARTS times before parsing
+    continues serially.
+
+    :param pdf_jobs: Iterable of (pdf_file, course_name, content_type).
+    :param on_written: Optional callback(result, chunks_file) after each PDF's outputs are saved.
+    :return: Tuple of (processed, failed) counts.
+    """
+    import itertools
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    from concurrent.futures.process import BrokenProcessPool
+
+    workers = pdf_worker_count()
+    max_pending = workers * 2
+    poll_seconds = min(5, PDF_TIMEOUT_SECONDS)
+
+    processed = failed = 0
+    jobs = iter(pdf_jobs)
+    breaks = 0
+
+    def save(result):
+        chunks_file = write_pdf_outputs(result)
+        if on_written:
+            on_written(result, chunks_file)
+
+    while breaks <= PDF_POOL_MAX_RESTARTS:
+        _log.info(f"Parsing PDFs with {workers} worker processes")
+        pending = {}
+        started = {}
+        timed_out = []
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_pdf_worker) as executor:
+                while not timed_out:
+                    for job in jobs:
+                        try:
+                            pending[executor.submit(_parse_pdf_in_worker, *job)] = job
+                        except BrokenProcessPool:
+                            # Never started, so the next pool can take it
+                            jobs = itertools.chain([job], jobs)
+                            raise
+                        if len(pending) >= max_pending:
+                            break
+                    if not pending:
+                        return processed, failed
+
+                    done, _ = wait(pending, timeout=poll_seconds, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pdf_file = pending[future][0]
+                        try:
+                            result = future.result()
+                        except BrokenProcessPool:
+                            raise
+                        except Exception as e:
+                            _log.error(f"Error processing {pdf_file}: {e}")
+                            failed += 1
+                            del pending[future]
+                            continue
+                        del pending[future]
+                        try:
+                            save(result)
+                            processed += 1
+                        except Exception as e:
+                            _log.error(f"Error processing {pdf_file}: {e}")
+                            failed += 1
+
+                    # The clock starts once a worker has picked the PDF up, not at submit
+                    now = time.monotonic()
+                    for future in pending:
+                        if future.running():
+                            started.setdefault(future, now)
+                    timed_out = [
+                        future for future in pending
+                        if future in started and now - started[future] > PDF_TIMEOUT_SECONDS
+                    ]
+                    if timed_out:
+                        # No public API stops one worker; kill them all and start a fresh pool
+                        for process in list(executor._processes.values()):
+                            process.kill()
+        except BrokenProcessPool as e:
+            if not timed_out:
+                # Any of the in-flight PDFs may have killed the worker; don't retry them
+                for pdf_file, _, _ in pending.values():
+                    _log.error(f"Error processing {pdf_file}: worker process died ({e})")
+                failed += len(pending)
+                breaks += 1
+                _log.warning(f"PDF worker pool broke (attempt {breaks} of {PDF_POOL_MAX_RESTARTS + 1})")
+                continue
+
+        for future in timed_out:
+            pdf_file = pending.pop(future)[0]
+            _log.error(f"Error processing {pdf_file}: exceeded {PDF_TIMEOUT_SECONDS} seconds")
+            failed += 1
+        # Collateral of the recycle, not at fault: run them again first
+        jobs = itertools.chain(list(pending.values()), jobs)
+
+    _log.warning("PDF worker pool kept breaking. Parsing the remaining PDFs serially.")
+    for pdf_file, course_name, content_type in jobs:
+        wait_for_resources()
+        try:
+            save(parse_pdf(get_model_pool(), pdf_file, course_name, content_type))
+            processed += 1
+        except Exception as e:
+            _log.error(f"Error processing {pdf_file}: {e}")
+            failed += 1
+    return processed, failed
+
+
+def pdfs_needing_parse(pdf_jobs, manifest, source_hashes):
+    """
+    Filter out PDFs whose bytes match the last successful parse and whose
+    chunks file is still on disk.
+
+    :param source_hashes: Filled with pdf path -> sha256 for the PDFs yielded.
+    """
+    skipped = 0
+    for pdf_file, course_name, content_type in pdf_jobs:
+        sha256 = sha256_file(pdf_file)
+        entry = manifest["pdfs"].get(str(pdf_file))
+        if entry and entry.get("sha256") == sha256 and Path(entry.get("chunks_file", "")).exists():
+            skipped += 1
+            continue
+        source_hashes[str(pdf_file)] = sha256
+        yield pdf_file, course_name, content_type
+    _log.info(f"Skipped {skipped} PDFs unchanged since the last run.")
+
+
+def log_model_metrics(metrics):
+    """
+    Summarise model load and conversion times from the per-document metrics
+    returned by parse_pdf().
+    """
+    if not metrics:
+        return
+    load_by_process = {m["pid"]: m["load_seconds"] for m in metrics}
+    convert_times = [m["convert_seconds"] for m in metrics]
+    total_load = sum(load_by_process.values())
+    _log.info(
+        f"PDF model load: {len(load_by_process)} processes, {total_load:.1f}s total "
+        f"({total_load / len(load_by_process):.1f}s each). Conversion: {len(convert_times)} PDFs, "
+        f"{sum(convert_times):.1f}s total, mean {sum(convert_times) / len(convert_times):.2f}s, "
+        f"max {max(convert_times):.2f}s."
+    )
+
+
+def process_courses(base_dir):
+    """
+    Process all courses and their PDFs in the base directory.
+    Only PDFs that changed since the last run are parsed again.
+    """
+    if not base_dir.exists():
+        _log.error(f"Base directory {base_dir} does not exist.")
+        return
+
+    start_time = time.time()
+    manifest = load_manifest()
+    source_hashes = {}
+    model_metrics = []
+
+    def record_parsed_pdf(result, chunks_file):
+        model_metrics.append(result["metrics"])
+        manifest["pdfs"][result["file_path"]] = {
+            "sha256": source_hashes[result["file_path"]],
+            "chunks_hash": chunk_set_hash(result["chunks"]),
+            "chunks_file": str(chunks_file),
+        }
+        save_manifest(manifest)
+
+    pdf_jobs = pdfs_needing_parse(list_course_pdfs(base_dir), manifest, source_hashes)
+    try:
+        if PDF_PROCESSING_MODE == "serial":
+            for pdf_file, course_name, content_type in pdf_jobs:
+                process_pdf(pdf_file, course_name, content_type, on_written=record_parsed_pdf)
+            _log.info(f"Processed courses serially in {time.time() - start_time:.2f} seconds.")
+            return
+
+        processed, failed = process_pdfs_in_pool(pdf_jobs, on_written=record_parsed_pdf)
+        _log.info(
+            f"Processed {processed} PDFs ({failed} failed) in {time.time() - start_time:.2f} seconds."
+        )
+    finally:
+        save_manifest(manifest, mirror=True)
+        log_model_metrics(model_metrics)
 
 
 def run_processing_pipeline(base_dir):
@@ -762,6 +1307,248 @@ def run_processing_pipeline(base_dir):
     process_courses(base_dir)
     BASE_DIR = Path(".") 
 
+# Embedding and upload batching
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+EMBED_PROCESSES = int(os.getenv("EMBED_PROCESSES", "0"))  # >1 encodes text on a multi-process pool
+IMAGE_BATCH_SIZE = int(os.getenv("IMAGE_BATCH_SIZE", "32"))
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "200"))
+UPSERT_WORKERS = int(os.getenv("UPSERT_WORKERS", "4"))
+UPSERT_RETRIES = 3
+DELETE_BATCH_SIZE = 1000
+# Sub-chunk size in embedding-model tokens; 0 fills the model's max_seq_length
+EMBED_CHUNK_MAX_TOKENS = int(os.getenv("EMBED_CHUNK_MAX_TOKENS", "0"))
+EMBED_CHUNK_OVERLAP_TOKENS = int(os.getenv("EMBED_CHUNK_OVERLAP_TOKENS", "32"))
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+# Bump when vector_id() or sub-chunking changes so every file is re-embedded and old ids are cleaned up
+VECTOR_ID_SCHEME = 3
+MANIFEST_SAVE_INTERVAL = 30  # seconds between manifest checkpoints while embedding
+
+UPLOAD_STAT_KEYS = {"text_chunk": "text_chunks", "table": "tables", "image": "images"}
+
+
+def content_hash(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def vector_id(course, content_type, document, chunk_id, sub_index, digest):
+    """
+    Stable, collision-free Pinecone id for one embedded piece of content.
+    The same content at the same position always maps to the same id, and
+    changed content gets a new one, so re-runs never overwrite live vectors.
+    """
+    key = "\x1f".join(str(part) for part in (course, content_type, document, chunk_id, sub_index, digest))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:40]
+
+
+def pack_text_chunks(text, tokenizer, max_tokens, overlap_tokens=0):
+    """
+    Split text into sub-chunks of at most max_tokens tokens of the embedding
+    model's own tokenizer, packing whole sentences so each chunk is nearly full.
+
+    Sentences longer than max_tokens are cut on token boundaries. Up to
+    overlap_tokens worth of trailing sentences are repeated at the start of
+    the next chunk.
+
+    :param tokenizer: A Hugging Face fast tokenizer (needs offset mappings).
+    :return: List of sub-chunk strings.
+    """
+    sentences = [sentence for sentence in SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+    if not sentences:
+        return []
+    encoded = tokenizer(sentences, add_special_tokens=False, return_offsets_mapping=True)
+
+    units = []  # (text, token count)
+    for sentence, offsets in zip(sentences, encoded["offset_mapping"]):
+        if len(offsets) <= max_tokens:
+            units.append((sentence, len(offsets)))
+            continue
+        for start in range(0, len(offsets), max_tokens):
+            window = offsets[start:start + max_tokens]
+            units.append((sentence[window[0][0]:window[-1][1]], len(window)))
+
+    chunks = []
+    current, size = [], 0
+    for unit in units:
+        if current and size + unit[1] > max_tokens:
+            chunks.append(" ".join(piece for piece, _ in current))
+            carried, carried_size = [], 0
+            for previous in reversed(current):
+                if carried_size + previous[1] > overlap_tokens or carried_size + previous[1] + unit[1] > max_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_size += previous[1]
+            current, size = carried, carried_size
+        current.append(unit)
+        size += unit[1]
+    if current:
+        chunks.append(" ".join(piece for piece, _ in current))
+    return chunks
+
+
+class VectorUploader:
+    """
+    Upserts vectors to Pinecone in batches from a small thread pool.
+
+    At most two batches per worker are in flight; add() blocks beyond that,
+    so embedding never runs far ahead of the upload. Vectors are tracked per
+    source file, and on_file_done(source, vectors) fires with the file's
+    {vector_id: content_hash} ledger once every new vector of a finished file
+    is stored, so the manifest only records complete files.
+    """
+
+    def __init__(self, index, on_file_done, batch_size=UPSERT_BATCH_SIZE, workers=UPSERT_WORKERS):
+        self.index = index
+        self.on_file_done = on_file_done
+        self.batch_size = batch_size
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pinecone-upsert")
+        self.in_flight = threading.BoundedSemaphore(workers * 2)
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.files = {}
+        self.stats = {"text_chunks": 0, "tables": 0, "images": 0, "reused": 0, "failed": 0}
+        self.courses = set()
+
+    def _file(self, source):
+        return self.files.setdefault(source, {"vectors": {}, "pending": 0, "closed": False, "failed": False})
+
+    def add(self, source, vector_id, values, metadata, digest):
+        with self.lock:
+            state = self._file(source)
+            state["vectors"][vector_id] = digest
+            state["pending"] += 1
+        self.buffer.append((source, (vector_id, values, metadata)))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def keep(self, source, vector_id, digest):
+        """Carry an already stored, unchanged vector into the file's ledger."""
+        with self.lock:
+            self._file(source)["vectors"][vector_id] = digest
+            self.stats["reused"] += 1
+
+    def finish_file(self, source):
+        """No more vectors will be added for source."""
+        with self.lock:
+            self._file(source)["closed"] = True
+            self._maybe_complete(source)
+
+    def fail_file(self, source):
+        with self.lock:
+            state = self._file(source)
+            state["failed"] = state["closed"] = True
+
+    def flush(self):
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        self.in_flight.acquire()
+        future = self.executor.submit(self._upsert, [vector for _, vector in batch])
+        future.add_done_callback(lambda f: self._on_done(batch, f))
+
+    def _upsert(self, vectors):
+        for attempt in range(1, UPSERT_RETRIES + 1):
+            try:
+                self.index.upsert(vectors=vectors)
+                return
+            except Exception as e:
+                if attempt == UPSERT_RETRIES:
+                    raise
+                logging.warning(f"Upsert of {len(vectors)} vectors failed (attempt {attempt}): {e}")
+                sleep(2 ** attempt)
+
+    def _on_done(self, batch, future):
+        error = future.exception()
+        with self.lock:
+            for source, (_, _, metadata) in batch:
+                state = self.files[source]
+                state["pending"] -= 1
+                if error is not None:
+                    state["failed"] = True
+                    self.stats["failed"] += 1
+                else:
+                    self.stats[UPLOAD_STAT_KEYS[metadata["type"]]] += 1
+                    if metadata.get("course"):
+                        self.courses.add(metadata["course"])
+            for source in {source for source, _ in batch}:
+                self._maybe_complete(source)
+        if error is not None:
+            logging.error(f"Failed to upsert {len(batch)} vectors: {error}")
+        self.in_flight.release()
+
+    def _maybe_complete(self, source):
+        state = self.files[source]
+        if state["closed"] and state["pending"] == 0 and not state.get("done"):
+            state["done"] = True
+            if not state["failed"]:
+                self.on_file_done(source, state["vectors"])
+
+    def close(self):
+        """Upload what is buffered and wait for every batch to finish."""
+        self.flush()
+        self.executor.shutdown(wait=True)
+
+
+def live_vector_ids(manifest):
+    """Every vector id a current ledger in manifest["embedded"] still points at."""
+    return {
+        vid for entry in manifest["embedded"].values()
+        for vid in (entry.get("vectors") or entry.get("vector_ids", []))
+    }
+
+
+def queue_unrecorded_vectors(index, manifest):
+    """
+    Queue every id in an index the manifest has no ledger for (filled before
+    the manifest existed, e.g. with the old unversioned ids, or a forced full
+    run) as an orphan. Ids this run uploads again are live by the time
+    delete_orphaned_vectors runs and are kept, so only stale vectors go.
+    """
+    try:
+        total = index.describe_index_stats().total_vector_count
+    except Exception as e:
+        logging.warning(f"Could not read index stats, skipping the unrecorded vector purge: {e}")
+        return
+    if not total:
+        return
+    try:
+        ids = [vid for page in index.list() for vid in page]
+    except Exception as e:
+        # index.list() only exists for serverless indexes
+        logging.warning(
+            f"Could not list the {total} vectors already in the index ({e}). Vectors from before "
+            f"the pipeline manifest stay until the namespace is reset with index.delete(delete_all=True)."
+        )
+        return
+    manifest["orphans"].extend(ids)
+    logging.info(f"Queued {len(ids)} vectors without a manifest record for deletion once this run's uploads finish.")
+
+
+def delete_orphaned_vectors(index, manifest):
+    """
+    Delete the vector ids queued in manifest["orphans"] (replaced or removed
+    content). Ids that fail stay queued for the next run. Ids a current ledger
+    lists again (content that came back with the same id) are dropped unsent.
+
+    :return: Number of vectors deleted.
+    """
+    live = live_vector_ids(manifest)
+    orphans = [vid for vid in dict.fromkeys(manifest["orphans"]) if vid not in live]
+    remaining = []
+    for start in range(0, len(orphans), DELETE_BATCH_SIZE):
+        batch = orphans[start:start + DELETE_BATCH_SIZE]
+        try:
+            index.delete(ids=batch)
+        except Exception as e:
+            logging.warning(f"Failed to delete {len(batch)} orphaned vectors: {e}")
+            remaining.extend(batch)
+    deleted = len(orphans) - len(remaining)
+    logging.info(f"Deleted {deleted} orphaned vectors.")
+    manifest["orphans"] = remaining
+    return deleted
+
+
 def embedandpineconeupload():
     """
     Run the pipeline for embedding and uploading parsed content to Pinecone.
@@ -790,6 +1577,63 @@ def embedandpineconeupload():
     # Load environment variables
     load_dotenv()
 
+    # Directory containing parsed content
+    parsed_content_dir = "parsed_content"
+
+    # Only files whose content changed since they were last embedded need work
+    manifest = load_manifest()
+    embedded = manifest["embedded"]
+
+    def previous_vectors(entry):
+        # Entries from before the per-vector ledger only kept a list of ids
+        return entry.get("vectors") or dict.fromkeys(entry.get("vector_ids", []))
+
+    # Sources that were removed, e.g. tables a re-parsed PDF no longer has
+    for path in [path for path in embedded if not os.path.exists(path) and os.path.isdir(os.path.dirname(path))]:
+        manifest["orphans"].extend(previous_vectors(embedded.pop(path)))
+
+    def pending(files, content_hash_of):
+        jobs = []
+        for path in files:
+            digest = content_hash_of(path)
+            entry = embedded.get(path, {})
+            if entry.get("hash") != digest or entry.get("id_scheme") != VECTOR_ID_SCHEME:
+                jobs.append((path, digest))
+        return jobs
+
+    def chunks_file_hash(path):
+        with open(path, "r") as f:
+            return chunk_set_hash(json.load(f))
+
+    chunk_jobs = pending(glob.glob(os.path.join(parsed_content_dir, "**", "*_chunks.json"), recursive=True), chunks_file_hash)
+    table_jobs = pending(glob.glob(os.path.join(parsed_content_dir, "**", "*-table-*.csv"), recursive=True), sha256_file)
+    image_jobs = pending(glob.glob(os.path.join(parsed_content_dir, "**", "*.png"), recursive=True), sha256_file)
+    logging.info(
+        f"Files to embed: {len(chunk_jobs)} chunk files, {len(table_jobs)} tables, {len(image_jobs)} images; "
+        f"{len(manifest['orphans'])} orphaned vectors to delete"
+    )
+    if not (chunk_jobs or table_jobs or image_jobs or manifest["orphans"]):
+        logging.info("Nothing changed since the last upload.")
+        return
+
+    # Every vector already in Pinecone, so unchanged pieces of a changed file are not re-embedded
+    stored_ids = {
+        vid for entry in embedded.values()
+        if entry.get("id_scheme") == VECTOR_ID_SCHEME
+        for vid in previous_vectors(entry)
+    }
+    digests = dict(chunk_jobs + table_jobs + image_jobs)
+    last_saved = [time.monotonic()]
+
+    def record_embedded(path, vectors):
+        # Runs on an upload thread under the uploader's lock
+        previous = previous_vectors(embedded.get(path, {}))
+        manifest["orphans"].extend(vid for vid in previous if vid not in vectors)
+        embedded[path] = {"hash": digests[path], "id_scheme": VECTOR_ID_SCHEME, "vectors": dict(vectors)}
+        if time.monotonic() - last_saved[0] >= MANIFEST_SAVE_INTERVAL:
+            save_manifest(manifest)
+            last_saved[0] = time.monotonic()
+
     # Pinecone configuration
     pinecone_api_key = os.getenv("PINECONE_API_KEY")
     pinecone_env = os.getenv("PINECONE_ENV", "us-east-1")
@@ -819,13 +1663,17 @@ def embedandpineconeupload():
     index = pc.Index(index_name)
     logging.info(f"Connected to Pinecone index: {index_name}")
 
-    # Directory containing parsed content
-    parsed_content_dir = "parsed_content"
+    # No ledger at all: whatever the index already holds is unaccounted for
+    if not embedded:
+        queue_unrecorded_vectors(index, manifest)
+
+    # Leave room for the [CLS] and [SEP] tokens the model adds
+    max_chunk_tokens = min(EMBED_CHUNK_MAX_TOKENS or embedding_model.max_seq_length, embedding_model.max_seq_length) - 2
 
     # Helper Functions
-    def chunk_text(text, max_length=512):
-        """Chunks text into smaller parts for embedding."""
-        return [text[i : i + max_length] for i in range(0, len(text), max_length)]
+    def chunk_text(text):
+        """Chunks text into sentence-packed parts that fit the embedding model."""
+        return pack_text_chunks(text, embedding_model.tokenizer, max_chunk_tokens, EMBED_CHUNK_OVERLAP_TOKENS)
 
     def validate_and_log_metadata(metadata):
         """Logs metadata and validates it."""
@@ -835,66 +1683,180 @@ def embedandpineconeupload():
         logging.debug(f"Metadata: {json.dumps(metadata, indent=2)}")
         return True
 
-    # Summary Stats
-    upload_stats = {"text_chunks": 0, "tables": 0, "images": 0}
-
-    # Process Text Chunks
-    for json_file in glob.glob(os.path.join(parsed_content_dir, "**", "*_chunks.json"), recursive=True):
-        logging.info(f"Processing text chunks from: {json_file}")
-        try:
-            with open(json_file, "r") as f:
-                chunks = json.load(f)
-                for chunk in chunks:
-                    text = chunk.get("text", "").strip()
-                    document = chunk.get("document", "unknown")
-                    chunk_id = chunk.get("chunk_id", "unknown")
-                    if not text:
-                        logging.warning(f"Skipping empty text chunk in {json_file}")
-                        continue
-                    for text_chunk in chunk_text(text):
-                        embedding = embedding_model.encode(text_chunk).tolist()
-                        metadata = {"document": document, "chunk_id": chunk_id, "type": "text_chunk"}
-                        if validate_and_log_metadata(metadata):
-                            index.upsert([(f"{document}_{chunk_id}", embedding, metadata)])
-                            upload_stats["text_chunks"] += 1
-        except Exception as e:
-            logging.error(f"Error processing text chunks in {json_file}: {e}")
-
-    # Process Tables
-    for table_file in glob.glob(os.path.join(parsed_content_dir, "**", "*-table-*.csv"), recursive=True):
-        logging.info(f"Processing table: {table_file}")
-        try:
-            table_data = pd.read_csv(table_file).to_string()
+    def source_location(path):
+        """(course, content_type) from parsed_content/<course>/<content_type>/<file>"""
+        parent = Path(path).parent
+        return parent.parent.name, parent.name
+
+    def iter_text_items():
+        """
+        Lazily yield (source, vector_id, text, metadata, digest) from the changed
+        chunk files and tables, then (source, None, ...) once a file is exhausted.
+        Pieces already stored under the same id are kept without re-embedding.
+        """
+        for json_file, _ in chunk_jobs:
+            logging.info(f"Processing text chunks from: {json_file}")
+            try:
+                with open(json_file, "r") as f:
+                    chunks = json.load(f)
+            except Exception as e:
+                logging.error(f"Error processing text chunks in {json_file}: {e}")
+                uploader.fail_file(json_file)
+                continue
+            for chunk in chunks:
+                text = chunk.get("text", "").strip()
+                document = chunk.get("document", "unknown")
+                chunk_id = chunk.get("chunk_id", "unknown")
+                if not text:
+                    logging.warning(f"Skipping empty text chunk in {json_file}")
+                    continue
+                course = chunk.get("course", "unknown")
+                content_type = chunk.get("content_type", "unknown")
+                metadata = {"document": document, "chunk_id": chunk_id, "type": "text_chunk", "course": course}
+                if validate_and_log_metadata(metadata):
+                    for sub_index, text_chunk in enumerate(chunk_text(text)):
+                        digest = content_hash(text_chunk)
+                        vid = vector_id(course, content_type, document, chunk_id, sub_index, digest)
+                        if vid in stored_ids:
+                            uploader.keep(json_file, vid, digest)
+                        else:
+                            yield json_file, vid, text_chunk, metadata, digest
+            yield json_file, None, None, None, None
+
+        for table_file, file_digest in table_jobs:
+            logging.info(f"Processing table: {table_file}")
+            try:
+                table_data = pd.read_csv(table_file).to_string()
+            except Exception as e:
+                logging.error(f"Error processing table {table_file}: {e}")
+                uploader.fail_file(table_file)
+                continue
             if not table_data.strip():
                 logging.warning(f"Skipping empty table file: {table_file}")
-                continue
-            doc_name = Path(table_file).stem.split("-table")[0]
-            embedding = embedding_model.encode(table_data).tolist()
-            metadata = {"document": doc_name, "type": "table", "filename": os.path.basename(table_file)}
-            if validate_and_log_metadata(metadata):
-                index.upsert([(f"{doc_name}_table", embedding, metadata)])
-                upload_stats["tables"] += 1
-        except Exception as e:
-            logging.error(f"Error processing table {table_file}: {e}")
+            else:
+                stem = Path(table_file).stem
+                doc_name, _, table_number = stem.rpartition("-table-")
+                metadata = {"document": doc_name, "type": "table", "filename": os.path.basename(table_file)}
+                if validate_and_log_metadata(metadata):
+                    course, content_type = source_location(table_file)
+                    vid = vector_id(course, content_type, doc_name, f"table-{table_number}", 0, file_digest)
+                    yield table_file, vid, table_data, metadata, file_digest
+            yield table_file, None, None, None, None
+
+    def encode_texts(texts):
+        if encode_pool is not None:
+            return embedding_model.encode_multi_process(texts, encode_pool, batch_size=EMBED_BATCH_SIZE)
+        return embedding_model.encode(
+            texts, batch_size=EMBED_BATCH_SIZE, convert_to_numpy=True, show_progress_bar=False
+        )
 
-    # Process Images
-    for img_file in glob.glob(os.path.join(parsed_content_dir, "**", "*.png"), recursive=True):
-        logging.info(f"Processing image: {img_file}")
-        try:
-            doc_name = Path(img_file).stem.split("-")[0]
-            image = Image.open(img_file)
-            inputs = clip_processor(images=image, return_tensors="pt")
-            with torch.no_grad():
-                image_embedding = clip_model.get_image_features(**inputs).squeeze().tolist()
+    def embed_text_batch(batch, finished_files):
+        """Encode a batch in one call, queue its vectors, then close the files it completed."""
+        if batch:
+            embeddings = encode_texts([text for _, _, text, _, _ in batch])
+            for (source, vid, _, metadata, digest), embedding in zip(batch, embeddings):
+                uploader.add(source, vid, embedding.tolist(), metadata, digest)
+        for source in finished_files:
+            uploader.finish_file(source)
+
+    def embed_image_batch(batch):
+        images = []
+        for img_file, digest in batch:
+            try:
+                with Image.open(img_file) as image:
+                    images.append((img_file, digest, image.convert("RGB")))
+            except Exception as e:
+                logging.error(f"Error processing image {img_file}: {e}")
+                uploader.fail_file(img_file)
+        if not images:
+            return
+        inputs = clip_processor(images=[image for _, _, image in images], return_tensors="pt")
+        with torch.no_grad():
+            image_embeddings = clip_model.get_image_features(**inputs).tolist()
+        for (img_file, digest, _), image_embedding in zip(images, image_embeddings):
+            stem = Path(img_file).stem
+            doc_name = stem.split("-")[0]
             metadata = {"document": doc_name, "type": "image", "filename": os.path.basename(img_file)}
             if validate_and_log_metadata(metadata):
-                index.upsert([(f"{doc_name}_{Path(img_file).stem}", image_embedding[:embedding_dimension], metadata)])
-                upload_stats["images"] += 1
-        except Exception as e:
-            logging.error(f"Error processing image {img_file}: {e}")
+                course, content_type = source_location(img_file)
+                vid = vector_id(course, content_type, stem, "image", 0, digest)
+                uploader.add(img_file, vid, image_embedding[:embedding_dimension], metadata, digest)
+            uploader.finish_file(img_file)
+
+    uploader = VectorUploader(index, record_embedded)
+    encode_pool = None
+    if EMBED_PROCESSES > 1 and (chunk_jobs or table_jobs):
+        encode_pool = embedding_model.start_multi_process_pool(target_devices=["cpu"] * EMBED_PROCESSES)
+
+    try:
+        # Text chunks and tables: stream lazily, encode in large batches
+        batch, finished_files = [], []
+        for source, vid, text, metadata, digest in iter_text_items():
+            if vid is None:
+                finished_files.append(source)
+            else:
+                batch.append((source, vid, text, metadata, digest))
+            if len(batch) >= EMBED_BATCH_SIZE:
+                embed_text_batch(batch, finished_files)
+                batch, finished_files = [], []
+        embed_text_batch(batch, finished_files)
+
+        # Images
+        for start in range(0, len(image_jobs), IMAGE_BATCH_SIZE):
+            batch = image_jobs[start:start + IMAGE_BATCH_SIZE]
+            logging.info(f"Processing images {start + 1}-{start + len(batch)} of {len(image_jobs)}")
+            try:
+                embed_image_batch(batch)
+            except Exception as e:
+                logging.error(f"Error processing image batch starting at {batch[0][0]}: {e}")
+                for img_file, _ in batch:
+                    uploader.fail_file(img_file)
+    finally:
+        uploader.close()
+        if encode_pool is not None:
+            embedding_model.stop_multi_process_pool(encode_pool)
+        save_manifest(manifest)
+
+    # Replaced vectors go only after their successors are live
+    orphans_deleted = delete_orphaned_vectors(index, manifest)
 
     # Summary
+    upload_stats = uploader.stats
     logging.info(f"Data upload completed. Summary: {upload_stats}")
+    save_manifest(manifest, mirror=True)
+
+    # Tables, images and orphaned ids carry no course, so a full flush is
+    # needed when they change
+    if upload_stats["tables"] or upload_stats["images"] or orphans_deleted:
+        notify_backend_cache_invalidation([None])
+    else:
+        notify_backend_cache_invalidation(sorted(uploader.courses))
+
+
+def notify_backend_cache_invalidation(courses):
+    """
+    Ask the backend to drop cached retrievals for re-indexed courses.
+    Best effort: cached entries still expire by TTL if the backend is unreachable.
+
+    :param courses: Course names to invalidate; None invalidates every course.
+    """
+    backend_url = os.getenv("BACKEND_API_URL")  # e.g. http://backend:8000/api/v1
+    if not backend_url:
+        logging.info("BACKEND_API_URL not set. Skipping cache invalidation.")
+        return
+
+    for course in courses:
+        try:
+            response = requests.post(
+                f"{backend_url.rstrip('/')}/search/cache/invalidate",
+                json={"course": course},
+                headers={"X-API-Key": os.getenv("BACKEND_API_KEY", "")},
+                timeout=10
+            )
+            response.raise_for_status()
+            logging.info(f"Invalidated backend cache for course: {course or 'all'}")
+        except Exception as e:
+            logging.warning(f"Failed to invalidate backend cache for {course or 'all'}: {e}")
 
 
 # Define the DAG